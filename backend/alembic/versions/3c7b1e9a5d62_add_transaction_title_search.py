@@ -0,0 +1,61 @@
+"""add transaction title search
+
+Revision ID: 3c7b1e9a5d62
+Revises: e5a8c1d94b07
+Create Date: 2025-07-24 10:41:18.502936
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7b1e9a5d62'
+down_revision: Union[str, None] = 'e5a8c1d94b07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FTS_TABLE = 'transactions_fts'
+FTS_DDL = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, content='transactions')",
+    f"""CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON transactions BEGIN
+    INSERT INTO {FTS_TABLE}(rowid, title) VALUES (new.rowid, new.title);
+END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON transactions BEGIN
+    INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title) VALUES ('delete', old.rowid, old.title);
+END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF title ON transactions BEGIN
+    INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title) VALUES ('delete', old.rowid, old.title);
+    INSERT INTO {FTS_TABLE}(rowid, title) VALUES (new.rowid, new.title);
+END""",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index('ix_transactions_title_tsvector', 'transactions',
+                        [sa.text("to_tsvector('simple'::regconfig, title)")], unique=False, postgresql_using='gin')
+        op.create_index('ix_transactions_title_trgm', 'transactions', ['title'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'})
+    elif dialect == 'sqlite':
+        for statement in FTS_DDL:
+            op.execute(statement)
+        # Index the existing rows
+        op.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.drop_index('ix_transactions_title_trgm', table_name='transactions', postgresql_using='gin')
+        op.drop_index('ix_transactions_title_tsvector', table_name='transactions', postgresql_using='gin')
+    elif dialect == 'sqlite':
+        for trigger in ('insert', 'delete', 'update'):
+            op.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{trigger}')
+        op.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
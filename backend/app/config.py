@@ -21,6 +21,15 @@ class Settings(BaseSettings):
     SENDER_EMAIL: str
     EMAIL_ACCOUNT_VERIFICATION: bool
 
+    # In-memory ledgers of hot groups, 0 disables the cache
+    BALANCE_CACHE_BYTES: int = 0
+
+    # Attachment Settings
+    ATTACHMENT_DIR: str = "attachments"
+    ATTACHMENT_MAX_BYTES: int = 20 * 1024 * 1024
+    # Processes rendering thumbnails, which needs Pillow installed
+    ATTACHMENT_THUMBNAIL_WORKERS: int = 2
+
     model_config = SettingsConfigDict(env_file=".env")
 
 
@@ -1,22 +1,37 @@
 from .base import BaseModel
-from .user import User, UserCreate, UserResponse
-from .group import Group, CreateGroup, GroupResponse, GroupExpandedResponse, UpdateGroup
+from .user import User, UserCreate, UserResponse, UserCompactResponse
+from .group import Group, CreateGroup, GroupResponse, GroupCompactResponse, GroupExpandedResponse, UpdateGroup
 from .invite import GroupInvite, GroupInviteCreate, GroupInviteResponse, InvitationTokenResponse
 from .users_groups import UsersGroups
 from .transaction import (
     Transaction,
     TransactionType,
+    TransactionExportFormat,
     TransactionCreate,
     TransactionRead,
+    TransactionCompactRead,
+    TransactionCompactList,
+    TransactionFilter,
     TransactionUpdate,
 )
+from . import transaction_search  # noqa: F401
 from .transaction_participant import (
     TransactionParticipant,
     TransactionParticipantCreate,
     TransactionParticipantRead,
+    TransactionParticipantCompactRead,
     TransactionParticipantUpdate,
 )
-from .balance import Balance, UserBalance
+from .transaction_attachment import TransactionAttachment, TransactionAttachmentRead
+from .recurring_rule import RecurrenceFrequency, RecurringRule, RecurringRuleCreate, RecurringRuleRead
+from .transaction_batch import BatchOperation, TransactionBatchItem, TransactionBatchResult
+from .transaction_import import TransactionImportError, TransactionImportResult
+from .balance import Balance, UserBalance, GroupBalanceTotals, PairBalance, GroupBalances, HistoryBucket, BalanceHistoryPoint
+from .pairwise_balance import PairwiseBalance, PairwiseBalanceVersion
+from .balance_checkpoint import BalanceCheckpoint, BalanceCheckpointEntry
+from .transaction_stats import TransactionMonthlyTotal, GroupStatsEntry, GroupStats
+from .settlement import SettlementPlan, SettlementTransfer
+from .sync_change import SyncEntity, SyncChange, SyncMembership, SyncTombstone, SyncChanges
 from .auth import (
     EmailPasswordLoginRequest,
     Token,
@@ -32,9 +47,16 @@ GroupResponse.model_rebuild()
 GroupExpandedResponse.model_rebuild()
 Transaction.model_rebuild()
 TransactionParticipant.model_rebuild()
+TransactionParticipantRead.model_rebuild()
+TransactionAttachment.model_rebuild()
+RecurringRule.model_rebuild()
 TransactionCreate.model_rebuild()
+TransactionUpdate.model_rebuild()
 TransactionRead.model_rebuild()
+TransactionCompactList.model_rebuild()
+TransactionBatchItem.model_rebuild()
 Balance.model_rebuild()
+SyncChanges.model_rebuild()
 
 __all__ = [
     "BaseModel",
@@ -42,10 +64,12 @@ __all__ = [
     "User",
     "UserCreate",
     "UserResponse",
+    "UserCompactResponse",
     # Group models
     "Group",
     "CreateGroup",
     "GroupResponse",
+    "GroupCompactResponse",
     "GroupExpandedResponse",
     "UpdateGroup",
     # Invite models
@@ -58,17 +82,59 @@ __all__ = [
     # Transaction models
     "Transaction",
     "TransactionType",
+    "TransactionExportFormat",
     "TransactionCreate",
     "TransactionRead",
+    "TransactionCompactRead",
+    "TransactionCompactList",
+    "TransactionFilter",
     "TransactionUpdate",
     # Transaction participant models
     "TransactionParticipant",
     "TransactionParticipantCreate",
     "TransactionParticipantRead",
+    "TransactionParticipantCompactRead",
     "TransactionParticipantUpdate",
+    # Transaction attachment models
+    "TransactionAttachment",
+    "TransactionAttachmentRead",
+    # Recurring transaction models
+    "RecurrenceFrequency",
+    "RecurringRule",
+    "RecurringRuleCreate",
+    "RecurringRuleRead",
+    # Transaction batch models
+    "BatchOperation",
+    "TransactionBatchItem",
+    "TransactionBatchResult",
+    # Transaction import models
+    "TransactionImportError",
+    "TransactionImportResult",
     # Balance models
     "Balance",
     "UserBalance",
+    "GroupBalanceTotals",
+    "PairBalance",
+    "GroupBalances",
+    "HistoryBucket",
+    "BalanceHistoryPoint",
+    "PairwiseBalance",
+    "PairwiseBalanceVersion",
+    "BalanceCheckpoint",
+    "BalanceCheckpointEntry",
+    # Statistics models
+    "TransactionMonthlyTotal",
+    "GroupStatsEntry",
+    "GroupStats",
+    # Settlement models
+    "SettlementPlan",
+    "SettlementTransfer",
+    # Sync models
+    "SyncEntity",
+    "SyncChange",
+    "SyncMembership",
+    "SyncTombstone",
+    "SyncChanges",
     # Auth models
     "EmailPasswordLoginRequest",
     "Token",
@@ -1,3 +1,5 @@
+from datetime import date
+from enum import Enum
 from typing import Optional
 from uuid import UUID
 from sqlmodel import SQLModel
@@ -10,6 +12,13 @@ class UserBalance(SQLModel):
     balance: int
 
 
+class GroupBalanceTotals(SQLModel):
+    group_id: UUID
+    total_balance: int
+    total_owed_to_others: int
+    total_owed_by_others: int
+
+
 class Balance(SQLModel):
     user_id: UUID
     group_id: Optional[UUID] = None
@@ -17,3 +26,28 @@ class Balance(SQLModel):
     total_owed_to_others: int
     total_owed_by_others: int
     user_balances: list[UserBalance]
+    groups: Optional[list[GroupBalanceTotals]] = None
+
+
+class PairBalance(SQLModel):
+    creditor_id: UUID
+    debtor_id: UUID
+    amount: int
+
+
+class GroupBalances(SQLModel):
+    group_id: UUID
+    members: list[UserBalance]
+    debts: list[PairBalance]
+
+
+class HistoryBucket(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+
+class BalanceHistoryPoint(SQLModel):
+    bucket: date
+    change: int
+    balance: int
@@ -0,0 +1,29 @@
+from datetime import datetime
+from uuid import UUID
+from sqlmodel import Field, SQLModel
+import sqlalchemy as sa
+
+
+class BalanceCheckpoint(SQLModel, table=True):
+    """Latest balance snapshot of a group.
+
+    Covers every transaction purchased on or before `checkpoint_at`; balances
+    are the snapshot entries plus the transactions purchased after it.
+    """
+    __tablename__ = "balance_checkpoints"
+    group_id: UUID = Field(
+        foreign_key="groups.id", primary_key=True, ondelete="CASCADE")
+    checkpoint_at: datetime = Field(
+        sa_type=sa.DateTime(timezone=True), nullable=False)
+
+
+class BalanceCheckpointEntry(SQLModel, table=True):
+    """Amount `user_b` owed `user_a` at the group's checkpoint"""
+    __tablename__ = "balance_checkpoint_entries"
+    group_id: UUID = Field(
+        foreign_key="balance_checkpoints.group_id", primary_key=True, ondelete="CASCADE")
+    user_a: UUID = Field(
+        foreign_key="users.id", primary_key=True, ondelete="CASCADE")
+    user_b: UUID = Field(
+        foreign_key="users.id", primary_key=True, ondelete="CASCADE")
+    net_amount: int = Field(nullable=False)
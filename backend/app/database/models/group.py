@@ -48,6 +48,11 @@ class GroupResponse(SQLModel):
     updated_at: datetime
 
 
+class GroupCompactResponse(SQLModel):
+    id: UUID
+    name: str
+
+
 class GroupExpandedResponse(SQLModel):
     id: UUID
     name: str
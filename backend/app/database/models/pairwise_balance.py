@@ -0,0 +1,32 @@
+from uuid import UUID
+import sqlalchemy as sa
+from sqlmodel import Field, SQLModel
+
+
+class PairwiseBalance(SQLModel, table=True):
+    """Running amount `user_b` owes `user_a` within a group.
+
+    One row per (group, creditor, debtor) direction, maintained incrementally
+    by `PairwiseBalanceService` whenever transactions or participants change.
+    """
+    __tablename__ = "pairwise_balances"
+    group_id: UUID = Field(
+        foreign_key="groups.id", primary_key=True, ondelete="CASCADE")
+    user_a: UUID = Field(
+        foreign_key="users.id", primary_key=True, index=True, ondelete="CASCADE")
+    user_b: UUID = Field(
+        foreign_key="users.id", primary_key=True, index=True, ondelete="CASCADE")
+    net_amount: int = Field(default=0, nullable=False)
+
+
+class PairwiseBalanceVersion(SQLModel, table=True):
+    """Token that changes whenever a group's ledger rows change.
+
+    Lets a process holding a copy of the ledger in memory check whether it
+    is still current. Tokens are random so a rolled back write can never
+    reuse one that a later commit produces.
+    """
+    __tablename__ = "pairwise_balance_versions"
+    group_id: UUID = Field(
+        foreign_key="groups.id", primary_key=True, ondelete="CASCADE")
+    version: int = Field(sa_type=sa.BigInteger, nullable=False)
@@ -0,0 +1,68 @@
+from datetime import datetime
+from enum import Enum
+from typing import TYPE_CHECKING, Optional
+from uuid import UUID
+import sqlalchemy as sa
+from sqlmodel import Field, Relationship, SQLModel
+
+from .base import BaseModel
+
+if TYPE_CHECKING:
+    from app.database.models.transaction import Transaction
+
+
+class RecurrenceFrequency(str, Enum):
+    DAILY = "DAILY"
+    WEEKLY = "WEEKLY"
+    MONTHLY = "MONTHLY"
+    YEARLY = "YEARLY"
+
+
+class RecurringRuleBase(SQLModel):
+    frequency: RecurrenceFrequency
+    interval: int = Field(
+        default=1, ge=1, le=1000, description="Repeat every `interval` days, weeks, months or years")
+    count: Optional[int] = Field(
+        default=None, ge=1, description="Occurrences in total, the template included")
+    until: Optional[datetime] = Field(
+        default=None, sa_type=sa.DateTime(timezone=True), description="No occurrences after this time")
+
+
+class RecurringRule(RecurringRuleBase, BaseModel, table=True):
+    """Schedule repeating a template transaction, like an iCalendar RRULE.
+
+    Occurrence n is purchased `n * interval` periods after `starts_on`, the
+    template's purchase time and occurrence 0. Monthly and yearly rules
+    move to the last day of shorter months. Occurrences are inserted once
+    they are due by `RecurringTransactionService`, never ahead of time.
+    """
+    __tablename__ = "recurring_rules"
+    __table_args__ = (
+        # The due rules of a scheduler tick and of a group's reads
+        sa.Index("ix_recurring_rules_next_occurrence", "next_occurrence"),
+        sa.Index("ix_recurring_rules_group_id_next_occurrence",
+                 "group_id", "next_occurrence"),
+    )
+    template_id: UUID = Field(
+        foreign_key="transactions.id", unique=True, ondelete="CASCADE")
+    group_id: UUID = Field(foreign_key="groups.id", ondelete="CASCADE")
+    starts_on: datetime = Field(sa_type=sa.DateTime(timezone=True), nullable=False)
+    # Occurrences inserted so far, the template included
+    occurrences: int = Field(default=1, nullable=False)
+    # Purchase time of the next occurrence, None once the rule has ended
+    next_occurrence: Optional[datetime] = Field(
+        default=None, sa_type=sa.DateTime(timezone=True))
+    template: "Transaction" = Relationship(back_populates="recurrence")
+
+
+class RecurringRuleCreate(RecurringRuleBase):
+    pass
+
+
+class RecurringRuleRead(RecurringRuleBase):
+    id: UUID
+    template_id: UUID
+    starts_on: datetime
+    occurrences: int
+    next_occurrence: Optional[datetime]
+    created_at: datetime
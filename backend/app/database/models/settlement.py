@@ -0,0 +1,13 @@
+from uuid import UUID
+from sqlmodel import SQLModel
+
+
+class SettlementTransfer(SQLModel):
+    from_user_id: UUID
+    to_user_id: UUID
+    amount: int
+
+
+class SettlementPlan(SQLModel):
+    group_id: UUID
+    transfers: list[SettlementTransfer]
@@ -0,0 +1,72 @@
+from enum import Enum
+from typing import TYPE_CHECKING, Dict, List, Optional
+from uuid import UUID
+import sqlalchemy as sa
+from sqlmodel import Field, SQLModel
+
+if TYPE_CHECKING:
+    from app.database.models.group import GroupCompactResponse
+    from app.database.models.transaction import TransactionCompactRead
+    from app.database.models.user import UserCompactResponse
+
+
+class SyncEntity(str, Enum):
+    TRANSACTION = "transaction"
+    GROUP = "group"
+    MEMBERSHIP = "membership"
+
+
+class SyncChange(SQLModel, table=True):
+    """Entry of the change log offline clients sync from.
+
+    Appended inside the database transaction of the write it describes.
+    `entity_id` is the transaction, the group or, for memberships, the
+    user. `xid` is the writing database transaction, so readers can skip
+    entries of transactions that may still commit behind them. Groups are
+    not referenced by foreign key so tombstones outlive what they describe.
+    """
+    __tablename__ = "sync_changes"
+    __table_args__ = (
+        sa.Index("ix_sync_changes_xid_seq", "xid", "seq"),
+        sa.Index("ix_sync_changes_group_id_xid_seq",
+                 "group_id", "xid", "seq"),
+        sa.Index("ix_sync_changes_entity_id_xid_seq",
+                 "entity_id", "xid", "seq"),
+    )
+    seq: Optional[int] = Field(
+        default=None,
+        primary_key=True,
+        sa_type=sa.BigInteger().with_variant(sa.Integer(), "sqlite")
+    )
+    xid: int = Field(sa_type=sa.BigInteger, nullable=False)
+    group_id: UUID = Field(nullable=False)
+    entity: SyncEntity = Field(nullable=False)
+    entity_id: UUID = Field(nullable=False)
+    deleted: bool = Field(default=False, nullable=False)
+
+
+class SyncMembership(SQLModel):
+    group_id: UUID
+    user_id: UUID
+
+
+class SyncTombstone(SQLModel):
+    entity: SyncEntity
+    id: UUID
+    group_id: UUID
+
+
+class SyncChanges(SQLModel):
+    """Everything that changed in the caller's groups since a cursor.
+
+    Rows carry the current state of what changed. A membership tombstone
+    for the caller means the group is gone for them, a new membership of
+    the caller that they have to fetch the group in full.
+    """
+    cursor: str
+    has_more: bool
+    groups: List["GroupCompactResponse"] = []
+    memberships: List[SyncMembership] = []
+    transactions: List["TransactionCompactRead"] = []
+    users: Dict[UUID, "UserCompactResponse"] = {}
+    tombstones: List[SyncTombstone] = []
@@ -1,18 +1,21 @@
 from datetime import datetime
 from enum import Enum
-from typing import TYPE_CHECKING, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 from uuid import UUID
 import sqlalchemy as sa
 from sqlmodel import Field, Relationship, SQLModel
 
-from app.database.models.transaction_participant import TransactionParticipantRead
+from app.database.models.transaction_attachment import TransactionAttachmentRead
+from app.database.models.transaction_participant import TransactionParticipantCompactRead, TransactionParticipantRead
 from .base import BaseModel
 
 if TYPE_CHECKING:
-    from app.database.models.user import User
-    from app.database.models.group import Group
+    from app.database.models.user import User, UserCompactResponse, UserResponse
+    from app.database.models.group import Group, GroupCompactResponse, GroupResponse
     from app.database.models.transaction_participant import TransactionParticipant
     from app.database.models.transaction_participant import TransactionParticipantCreate
+    from app.database.models.transaction_attachment import TransactionAttachment
+    from app.database.models.recurring_rule import RecurringRule
 
 
 class TransactionType(str, Enum):
@@ -21,6 +24,11 @@ class TransactionType(str, Enum):
     PERCENTAGE = "PERCENTAGE"
 
 
+class TransactionExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
 class TransactionBase(BaseModel):
     amount: int = Field(
         index=True, description="Total amount in smallest currency unit (e.g., cents)")
@@ -42,12 +50,49 @@ class TransactionBase(BaseModel):
 
 class Transaction(TransactionBase, table=True):
     __tablename__ = "transactions"
+    # Server-side timestamps come back with the INSERT instead of a reload
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        # Scanned backwards for the keyset pagination of TransactionPagination
+        sa.Index("ix_transactions_group_id_purchased_on_created_at_id",
+                 "group_id", "purchased_on", "created_at", "id"),
+        # Serve the payer and amount filters of TransactionFilter, the first
+        # also the payer half of the user's listing
+        sa.Index("ix_transactions_payer_id_purchased_on_created_at_id",
+                 "payer_id", "purchased_on", "created_at", "id"),
+        sa.Index("ix_transactions_group_id_payer_id_purchased_on_created_at_id",
+                 "group_id", "payer_id", "purchased_on", "created_at", "id"),
+        sa.Index("ix_transactions_group_id_amount", "group_id", "amount"),
+        # Occurrences of a recurring rule are inserted once
+        sa.UniqueConstraint("recurring_rule_id", "occurrence",
+                            name="uq_transactions_recurring_rule_id_occurrence"),
+    )
+    # Digest of the create payload, tells retries apart from reused ids
+    payload_hash: Optional[str] = Field(default=None, max_length=64)
+    # Set on the occurrences a RecurringRule inserted, the template has neither
+    recurring_rule_id: Optional[UUID] = None
+    occurrence: Optional[int] = None
+    # Serialized relationships raise instead of lazy loading, so reads have
+    # to load them up front with TransactionLoading.read_options
     group: "Group" = Relationship(
-        back_populates="transactions")
-    payer: "User" = Relationship()
+        back_populates="transactions",
+        sa_relationship_kwargs={"lazy": "raise_on_sql"})
+    payer: "User" = Relationship(
+        sa_relationship_kwargs={"lazy": "raise_on_sql"})
     participants: List["TransactionParticipant"] = Relationship(
         back_populates="transaction",
-        cascade_delete=True
+        cascade_delete=True,
+        sa_relationship_kwargs={"lazy": "raise_on_sql"}
+    )
+    attachments: List["TransactionAttachment"] = Relationship(
+        back_populates="transaction",
+        cascade_delete=True,
+        sa_relationship_kwargs={"lazy": "raise_on_sql"}
+    )
+    recurrence: Optional["RecurringRule"] = Relationship(
+        back_populates="template",
+        cascade_delete=True,
+        sa_relationship_kwargs={"lazy": "raise_on_sql", "uselist": False}
     )
 
 
@@ -57,8 +102,41 @@ class TransactionCreate(TransactionBase):
 
 class TransactionRead(TransactionBase):
     participants: List["TransactionParticipantRead"]
-    payer: "User"
-    group: "Group"
+    attachments: List[TransactionAttachmentRead]
+    recurring_rule_id: Optional[UUID] = None
+    payer: "UserResponse"
+    group: "GroupResponse"
+
+
+class TransactionCompactRead(TransactionBase):
+    id: UUID
+    created_at: datetime
+    updated_at: datetime
+    participants: List["TransactionParticipantCompactRead"]
+    attachments: List[TransactionAttachmentRead]
+    recurring_rule_id: Optional[UUID] = None
+
+
+class TransactionCompactList(SQLModel):
+    """A page of transactions referring to users and groups by id.
+
+    Every user and group the page mentions is listed once in `users` and
+    `groups` instead of being embedded in each row.
+    """
+    transactions: List[TransactionCompactRead]
+    users: Dict[UUID, "UserCompactResponse"]
+    groups: Dict[UUID, "GroupCompactResponse"]
+
+
+class TransactionFilter(SQLModel):
+    """Query parameters narrowing down transaction listings"""
+    purchased_from: Optional[datetime] = Field(
+        default=None, description="Only transactions purchased at or after this time")
+    purchased_to: Optional[datetime] = Field(
+        default=None, description="Only transactions purchased before this time")
+    payer_id: Optional[UUID] = None
+    min_amount: Optional[int] = None
+    max_amount: Optional[int] = None
 
 
 class TransactionUpdate(SQLModel):
@@ -67,3 +145,5 @@ class TransactionUpdate(SQLModel):
     purchased_on: Optional[datetime] = None
     transaction_type: Optional[TransactionType] = None
     payer_id: Optional[UUID] = None
+    # Replaces the participants, only rows that change are written
+    participants: Optional[List["TransactionParticipantCreate"]] = None
@@ -0,0 +1,44 @@
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional
+from uuid import UUID
+import sqlalchemy as sa
+from sqlmodel import Field, Relationship, SQLModel
+
+from .base import BaseModel
+
+if TYPE_CHECKING:
+    from app.database.models.transaction import Transaction
+
+
+class TransactionAttachment(BaseModel, table=True):
+    """A file such as a receipt attached to a transaction.
+
+    The content lives in the configured `AttachmentStorage` under
+    `storage_key`, the row only holds its metadata.
+    """
+    __tablename__ = "transaction_attachments"
+    transaction_id: UUID = Field(foreign_key="transactions.id", index=True)
+    filename: str = Field(max_length=255)
+    content_type: str = Field(max_length=255)
+    size: int = Field(sa_type=sa.BigInteger, nullable=False)
+    storage_key: str = Field(max_length=255)
+    # Set for images once a thumbnail could be rendered
+    thumbnail_key: Optional[str] = Field(default=None, max_length=255)
+    transaction: "Transaction" = Relationship(back_populates="attachments")
+
+    @property
+    def has_thumbnail(self) -> bool:
+        return self.thumbnail_key is not None
+
+    @property
+    def storage_keys(self) -> list[str]:
+        return [key for key in (self.storage_key, self.thumbnail_key) if key is not None]
+
+
+class TransactionAttachmentRead(SQLModel):
+    id: UUID
+    filename: str
+    content_type: str
+    size: int
+    has_thumbnail: bool
+    created_at: datetime
@@ -0,0 +1,39 @@
+from enum import Enum
+from typing import Optional
+from uuid import UUID
+from pydantic import model_validator
+from sqlmodel import SQLModel
+
+from app.database.models.transaction import TransactionCreate, TransactionUpdate
+
+
+class BatchOperation(str, Enum):
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+
+class TransactionBatchItem(SQLModel):
+    operation: BatchOperation
+    # Target of updates and deletes
+    transaction_id: Optional[UUID] = None
+    create: Optional[TransactionCreate] = None
+    update: Optional[TransactionUpdate] = None
+
+    @model_validator(mode="after")
+    def check_payload(self):
+        if self.operation == BatchOperation.CREATE and self.create is None:
+            raise ValueError("create requires a create payload")
+        if self.operation != BatchOperation.CREATE and self.transaction_id is None:
+            raise ValueError(f"{self.operation.value} requires a transaction_id")
+        if self.operation == BatchOperation.UPDATE and self.update is None:
+            raise ValueError("update requires an update payload")
+        return self
+
+
+class TransactionBatchResult(SQLModel):
+    index: int
+    operation: BatchOperation
+    status_code: int
+    transaction_id: Optional[UUID] = None
+    detail: Optional[str] = None
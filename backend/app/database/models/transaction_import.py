@@ -0,0 +1,14 @@
+from sqlmodel import SQLModel
+
+
+class TransactionImportError(SQLModel):
+    # Line of the CSV file the transaction starts on
+    line: int
+    detail: str
+
+
+class TransactionImportResult(SQLModel):
+    imported: int
+    failed: int
+    # At most IMPORT_MAX_ERRORS, `failed` counts all of them
+    errors: list[TransactionImportError]
@@ -1,3 +1,4 @@
+from decimal import Decimal
 from typing import TYPE_CHECKING, Optional
 from uuid import UUID
 from sqlmodel import Field, Relationship, SQLModel
@@ -6,7 +7,7 @@ from .base import BaseModel
 
 if TYPE_CHECKING:
     from app.database.models.transaction import Transaction
-    from app.database.models.user import User
+    from app.database.models.user import User, UserResponse
 
 
 class TransactionParticipantBase(SQLModel):
@@ -18,15 +19,22 @@ class TransactionParticipantBase(SQLModel):
 
 class TransactionParticipant(TransactionParticipantBase, BaseModel, table=True):
     __tablename__ = "transaction_participants"
+    __mapper_args__ = {"eager_defaults": True}
     transaction: "Transaction" = Relationship(
         back_populates="participants")
     debtor: "User" = Relationship(
-        back_populates="owed_transactions")
+        back_populates="owed_transactions",
+        sa_relationship_kwargs={"lazy": "raise_on_sql"})
 
 
 class TransactionParticipantCreate(SQLModel):
-    amount_owed: int
+    # Computed by TransactionSplitService when left out for every participant
+    amount_owed: Optional[int] = None
     debtor_id: UUID
+    weight: Optional[int] = Field(
+        default=None, ge=1, description="Share of an EVEN split, 1 if left out")
+    percentage: Optional[Decimal] = Field(
+        default=None, ge=0, le=100, decimal_places=4, description="Share of a PERCENTAGE split")
 
 
 class TransactionParticipantRead(TransactionParticipantBase):
@@ -34,7 +42,13 @@ class TransactionParticipantRead(TransactionParticipantBase):
     amount_owed: int
     created_at: datetime
     updated_at: datetime
-    debtor: "User"
+    debtor: "UserResponse"
+
+
+class TransactionParticipantCompactRead(SQLModel):
+    id: UUID
+    amount_owed: int
+    debtor_id: UUID
 
 
 class TransactionParticipantUpdate(SQLModel):
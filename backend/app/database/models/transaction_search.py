@@ -0,0 +1,49 @@
+"""Full-text indexes over transaction titles.
+
+Postgres indexes the title's `tsvector` for word matches and its trigrams
+for substring matches. SQLite keeps an FTS5 table over `transactions`,
+maintained by triggers so bulk writes are indexed too. It refers to rows
+by rowid, which `VACUUM` may renumber on tables without an integer key,
+so run `INSERT INTO transactions_fts(transactions_fts) VALUES ('rebuild')`
+after vacuuming.
+"""
+import sqlalchemy as sa
+
+from app.database.models.transaction import Transaction
+
+SEARCH_CONFIG = sa.text("'simple'::regconfig")
+FTS_TABLE = "transactions_fts"
+
+title = Transaction.__table__.c.title
+title_tsvector = sa.func.to_tsvector(SEARCH_CONFIG, title)
+
+sa.Index("ix_transactions_title_tsvector", title_tsvector,
+         postgresql_using="gin").ddl_if(dialect="postgresql")
+sa.Index("ix_transactions_title_trgm", title, postgresql_using="gin",
+         postgresql_ops={"title": "gin_trgm_ops"}).ddl_if(dialect="postgresql")
+
+sa.event.listen(
+    Transaction.metadata, "before_create",
+    sa.DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(
+        dialect="postgresql")
+)
+
+FTS_DDL = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, content='transactions')",
+    f"""CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON transactions BEGIN
+    INSERT INTO {FTS_TABLE}(rowid, title) VALUES (new.rowid, new.title);
+END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON transactions BEGIN
+    INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title) VALUES ('delete', old.rowid, old.title);
+END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF title ON transactions BEGIN
+    INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title) VALUES ('delete', old.rowid, old.title);
+    INSERT INTO {FTS_TABLE}(rowid, title) VALUES (new.rowid, new.title);
+END""",
+]
+
+for statement in FTS_DDL:
+    sa.event.listen(Transaction.__table__, "after_create",
+                    sa.DDL(statement).execute_if(dialect="sqlite"))
+sa.event.listen(Transaction.__table__, "before_drop", sa.DDL(
+    f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect="sqlite"))
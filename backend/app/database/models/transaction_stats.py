@@ -0,0 +1,41 @@
+from datetime import date
+from typing import Optional
+from uuid import UUID
+import sqlalchemy as sa
+from sqlmodel import Field, SQLModel
+
+from app.database.models.balance import HistoryBucket
+
+
+class TransactionMonthlyTotal(SQLModel, table=True):
+    """Amount a payer spent within a group in a calendar month (UTC).
+
+    One row per (group, month, payer), maintained incrementally by
+    `TransactionStatsService` whenever transactions change, so statistics
+    of whole months never scan the transactions themselves.
+    """
+    __tablename__ = "transaction_monthly_totals"
+    group_id: UUID = Field(
+        foreign_key="groups.id", primary_key=True, ondelete="CASCADE")
+    month: date = Field(primary_key=True)
+    payer_id: UUID = Field(
+        foreign_key="users.id", primary_key=True, index=True, ondelete="CASCADE")
+    total: int = Field(default=0, sa_type=sa.BigInteger, nullable=False)
+    count: int = Field(default=0, nullable=False)
+
+
+class GroupStatsEntry(SQLModel):
+    bucket: date
+    payer_id: UUID
+    total: int
+    count: int
+
+
+class GroupStats(SQLModel):
+    group_id: UUID
+    bucket: HistoryBucket
+    start: Optional[date] = None
+    end: Optional[date] = None
+    total: int
+    count: int
+    entries: list[GroupStatsEntry]
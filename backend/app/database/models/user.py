@@ -45,6 +45,11 @@ class UserResponse(SQLModel):
     updated_at: datetime
 
 
+class UserCompactResponse(SQLModel):
+    id: UUID
+    username: str
+
+
 class UserInfoUpdate(SQLModel):
     username: str = Field(min_length=1, max_length=50)
 
@@ -0,0 +1,184 @@
+"""Bulk-generate a synthetic dataset for development and benchmarks.
+
+Group sizes follow a heavy-tailed distribution, busier groups get more
+transactions and splits mix EVEN, AMOUNT and PERCENTAGE types over a
+multi-year history. Rows are written with executemany inserts in batches.
+
+    python -m app.database.seed --users 10000 --groups 1000 --transactions 1000000
+"""
+import argparse
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from uuid import UUID, uuid4
+
+import sqlalchemy as sa
+from sqlmodel import Session
+
+from app.database.models import (
+    Group, Transaction, TransactionParticipant, TransactionType, User, UsersGroups
+)
+from app.services.auth import AuthService
+from app.services.pairwise_balance import PairwiseBalanceService
+from app.services.transaction_stats import TransactionStatsService
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 5000
+MAX_GROUP_SIZE = 500
+MAX_SPLIT_SIZE = 12
+SPLIT_TYPES = [TransactionType.EVEN,
+               TransactionType.AMOUNT, TransactionType.PERCENTAGE]
+SPLIT_TYPE_WEIGHTS = [0.6, 0.25, 0.15]
+
+
+class SeededDataset:
+    def __init__(
+        self,
+        user_ids: list[UUID],
+        group_ids: list[UUID],
+        group_members: dict[UUID, list[UUID]],
+        transaction_count: int,
+        participant_count: int
+    ):
+        self.user_ids = user_ids
+        self.group_ids = group_ids
+        self.group_members = group_members
+        self.transaction_count = transaction_count
+        self.participant_count = participant_count
+
+
+def split_amount(rng: random.Random, total: int, parts: int, transaction_type: TransactionType) -> list[int]:
+    """Split `total` into `parts` shares the way a client would"""
+    if transaction_type == TransactionType.EVEN:
+        weights = [1] * parts
+    elif transaction_type == TransactionType.PERCENTAGE:
+        cuts = sorted(rng.sample(range(1, 100), parts - 1)
+                      ) if parts > 1 else []
+        weights = [end - start for start,
+                   end in zip([0, *cuts], [*cuts, 100])]
+    else:
+        weights = [rng.randint(1, 10) for _ in range(parts)]
+
+    weight_sum = sum(weights)
+    shares = [total * weight // weight_sum for weight in weights]
+    shares[0] += total - sum(shares)
+    return shares
+
+
+def _insert(session: Session, model, rows: list[dict]) -> None:
+    for start in range(0, len(rows), BATCH_SIZE):
+        session.execute(sa.insert(model), rows[start:start + BATCH_SIZE])
+
+
+def generate_dataset(
+    session: Session,
+    users: int = 10_000,
+    groups: int = 1_000,
+    transactions: int = 100_000,
+    years: int = 3,
+    seed: int = 0
+) -> SeededDataset:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    history_seconds = years * 365 * 24 * 3600
+
+    # Hashing once keeps seeding fast; every user shares the password
+    password = AuthService.get_password_hash("seeded-password")
+    user_ids = [uuid4() for _ in range(users)]
+    _insert(session, User, [{
+        "id": user_id,
+        "username": f"user{index}",
+        "email": f"user{index}-{user_id.hex[:8]}@example.com",
+        "email_verified": True,
+        "password": password,
+    } for index, user_id in enumerate(user_ids)])
+
+    group_ids = [uuid4() for _ in range(groups)]
+    group_members = {
+        group_id: rng.sample(user_ids, min(users, MAX_GROUP_SIZE, max(
+            2, int(2 * rng.paretovariate(1.2)))))
+        for group_id in group_ids
+    }
+    _insert(session, Group, [{"id": group_id, "name": f"Group {index}"}
+                             for index, group_id in enumerate(group_ids)])
+    _insert(session, UsersGroups, [
+        {"group_id": group_id, "user_id": user_id}
+        for group_id, members in group_members.items() for user_id in members
+    ])
+    session.commit()
+
+    # Bigger groups see proportionally more expenses
+    transaction_groups = rng.choices(
+        group_ids, weights=[len(group_members[group_id]) for group_id in group_ids], k=transactions)
+
+    participant_count = 0
+    for start in range(0, transactions, BATCH_SIZE):
+        transaction_rows, participant_rows = [], []
+
+        for group_id in transaction_groups[start:start + BATCH_SIZE]:
+            members = group_members[group_id]
+            payer_id = rng.choice(members)
+            debtor_ids = rng.sample(
+                members, rng.randint(min(2, len(members)), min(MAX_SPLIT_SIZE, len(members))))
+            amount = max(1, int(rng.lognormvariate(7.5, 1.0)))
+            transaction_type = rng.choices(
+                SPLIT_TYPES, weights=SPLIT_TYPE_WEIGHTS)[0]
+            transaction_id = uuid4()
+
+            transaction_rows.append({
+                "id": transaction_id,
+                "amount": amount,
+                "title": f"Expense {start + len(transaction_rows)}",
+                "purchased_on": now - timedelta(seconds=rng.uniform(0, history_seconds)),
+                "transaction_type": transaction_type,
+                "group_id": group_id,
+                "payer_id": payer_id,
+            })
+            participant_rows.extend({
+                "id": uuid4(),
+                "transaction_id": transaction_id,
+                "debtor_id": debtor_id,
+                "amount_owed": share,
+            } for debtor_id, share in zip(
+                debtor_ids, split_amount(rng, amount, len(debtor_ids), transaction_type)))
+
+        _insert(session, Transaction, transaction_rows)
+        _insert(session, TransactionParticipant, participant_rows)
+        session.commit()
+        participant_count += len(participant_rows)
+        logger.info("Seeded %d of %d transactions",
+                    start + len(transaction_rows), transactions)
+
+    # Bulk inserts bypass the flush listeners, so derive the ledger and
+    # the monthly totals afterwards
+    for group_id in group_ids:
+        PairwiseBalanceService.rebuild_group(session.connection(), group_id)
+        TransactionStatsService.rebuild_group(session.connection(), group_id)
+    session.commit()
+
+    return SeededDataset(user_ids, group_ids, group_members, transactions, participant_count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--groups", type=int, default=1_000)
+    parser.add_argument("--transactions", type=int, default=100_000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    from app.database.database import engine
+
+    with Session(engine) as session:
+        dataset = generate_dataset(
+            session, args.users, args.groups, args.transactions, args.years, args.seed)
+    logger.info("Seeded %d users, %d groups, %d transactions and %d participants",
+                len(dataset.user_ids), len(dataset.group_ids),
+                dataset.transaction_count, dataset.participant_count)
+
+
+if __name__ == "__main__":
+    main()
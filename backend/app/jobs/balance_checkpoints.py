@@ -0,0 +1,70 @@
+"""Roll per-group balance checkpoints forward.
+
+Checkpoints cover transactions older than `--min-age-days`, so edits to
+recent transactions rarely invalidate them.
+
+    python -m app.jobs.balance_checkpoints
+    python -m app.jobs.balance_checkpoints --interval 3600
+"""
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlmodel import Session, select
+
+from app.database.database import engine
+from app.database.models.group import Group
+from app.services.balance_checkpoint import BalanceCheckpointService
+
+logger = logging.getLogger(__name__)
+
+GROUP_BATCH_SIZE = 500
+
+
+def roll_checkpoints_forward(session: Session, checkpoint_at: datetime) -> int:
+    """Move every group's checkpoint up to `checkpoint_at`, committing per batch"""
+    rolled = 0
+    last_id = None
+
+    while True:
+        statement = select(Group.id).order_by(
+            Group.id).limit(GROUP_BATCH_SIZE)
+        if last_id is not None:
+            statement = statement.where(Group.id > last_id)
+
+        group_ids = session.exec(statement).all()
+        if not group_ids:
+            return rolled
+
+        for group_id in group_ids:
+            if BalanceCheckpointService.roll_forward(session.connection(), group_id, checkpoint_at):
+                rolled += 1
+        session.commit()
+        last_id = group_ids[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--min-age-days", type=int, default=30,
+                        help="only checkpoint transactions older than this")
+    parser.add_argument("--interval", type=int, default=0,
+                        help="seconds between runs, 0 to run once")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    while True:
+        checkpoint_at = datetime.now(timezone.utc) - \
+            timedelta(days=args.min_age_days)
+        with Session(engine) as session:
+            rolled = roll_checkpoints_forward(session, checkpoint_at)
+        logger.info("Rolled %d balance checkpoints forward to %s",
+                    rolled, checkpoint_at.isoformat())
+
+        if args.interval <= 0:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Check stored balances against a recomputation from raw transactions.
+
+Every group's pairwise ledger and balance checkpoint are compared with the
+debts summed straight from `transactions`/`transaction_participants`, using
+the same rules as `BalanceService`. Groups are read in keyset chunks and
+handed to worker processes; pass `--repair` to rebuild what drifted.
+
+    python -m app.jobs.reconcile_balances
+    python -m app.jobs.reconcile_balances --workers 8 --repair
+"""
+import argparse
+import logging
+import os
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterator, Optional
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection, Engine
+
+from app.database.models.group import Group
+from app.services.balance_checkpoint import BalanceCheckpointService
+from app.services.pairwise_balance import PairwiseBalanceService
+
+logger = logging.getLogger(__name__)
+
+GROUP_BATCH_SIZE = 500
+
+# Engine of a worker process, created by _init_worker
+_worker_engine: Optional[Engine] = None
+
+
+class GroupDrift:
+    def __init__(
+        self,
+        group_id: UUID,
+        ledger: dict[tuple[UUID, UUID], tuple[int, int]],
+        checkpoint: bool
+    ):
+        # (user_a, user_b) -> (stored, expected) for every ledger row that is off
+        self.group_id = group_id
+        self.ledger = ledger
+        self.checkpoint = checkpoint
+
+
+def diff_balances(stored: Counter, expected: Counter) -> dict[tuple[UUID, UUID], tuple[int, int]]:
+    return {
+        pair: (stored.get(pair, 0), expected.get(pair, 0))
+        for pair in stored.keys() | expected.keys()
+        if stored.get(pair, 0) != expected.get(pair, 0)
+    }
+
+
+def reconcile_group(connection: Connection, group_id: UUID, repair: bool = False) -> Optional[GroupDrift]:
+    """Compare a group's ledger and checkpoint with its raw transactions"""
+    expected = BalanceCheckpointService.sum_debts_between(
+        connection, group_id)
+
+    ledger = diff_balances(
+        PairwiseBalanceService.get_group(connection, group_id), expected)
+    checkpoint = BalanceCheckpointService.get_checkpoint_at(connection, group_id) is not None and bool(
+        diff_balances(BalanceCheckpointService.compute_group_balances(connection, group_id), expected))
+
+    if not ledger and not checkpoint:
+        return None
+
+    if repair:
+        # Without its checkpoint the ledger is rebuilt from raw transactions
+        if checkpoint:
+            BalanceCheckpointService.delete(connection, [group_id])
+        PairwiseBalanceService.rebuild_group(connection, group_id)
+
+    return GroupDrift(group_id, ledger, checkpoint)
+
+
+def reconcile_groups(engine: Engine, group_ids: list[UUID], repair: bool = False) -> list[GroupDrift]:
+    drifts = []
+    with engine.connect() as connection:
+        # Ledger and transactions have to be read from the same snapshot
+        if connection.dialect.name == "postgresql":
+            connection.execution_options(isolation_level="REPEATABLE READ")
+
+        for group_id in group_ids:
+            with connection.begin():
+                drift = reconcile_group(connection, group_id, repair)
+            if drift is not None:
+                drifts.append(drift)
+    return drifts
+
+
+def iter_group_id_batches(engine: Engine) -> Iterator[list[UUID]]:
+    last_id = None
+    while True:
+        statement = sa.select(Group.id).order_by(
+            Group.id).limit(GROUP_BATCH_SIZE)
+        if last_id is not None:
+            statement = statement.where(Group.id > last_id)
+
+        with engine.connect() as connection:
+            group_ids = connection.execute(statement).scalars().all()
+        if not group_ids:
+            return
+
+        yield group_ids
+        last_id = group_ids[-1]
+
+
+def _init_worker(database_url: str):
+    global _worker_engine
+    _worker_engine = sa.create_engine(database_url)
+
+
+def _reconcile_batch(group_ids: list[UUID], repair: bool) -> list[GroupDrift]:
+    return reconcile_groups(_worker_engine, group_ids, repair)
+
+
+def reconcile_balances(engine: Engine, repair: bool = False, workers: int = 1) -> Iterator[GroupDrift]:
+    """Yield the drift of every group whose stored balances disagree"""
+    if workers <= 1:
+        for group_ids in iter_group_id_batches(engine):
+            yield from reconcile_groups(engine, group_ids, repair)
+        return
+
+    database_url = engine.url.render_as_string(hide_password=False)
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(database_url,)) as pool:
+        # Keep a bounded number of batches in flight so reading groups never
+        # runs far ahead of the workers
+        pending = set()
+        for group_ids in iter_group_id_batches(engine):
+            pending.add(pool.submit(_reconcile_batch, group_ids, repair))
+            if len(pending) < 2 * workers:
+                continue
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+        for future in pending:
+            yield from future.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes, 1 to run inline")
+    parser.add_argument("--repair", action="store_true",
+                        help="rebuild ledgers and drop checkpoints that drifted")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    from app.database.database import engine
+
+    drifted = 0
+    for drift in reconcile_balances(engine, args.repair, args.workers):
+        drifted += 1
+        logger.warning("Group %s: %d ledger rows off%s", drift.group_id, len(drift.ledger),
+                       ", checkpoint stale" if drift.checkpoint else "")
+        for (user_a, user_b), (stored, expected) in drift.ledger.items():
+            logger.info("  %s owes %s: stored %d, expected %d",
+                        user_b, user_a, stored, expected)
+
+    logger.info("%d groups drifted%s", drifted,
+                " and were repaired" if args.repair and drifted else "")
+    if drifted and not args.repair:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
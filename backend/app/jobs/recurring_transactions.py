@@ -0,0 +1,58 @@
+"""Insert the occurrences of recurring transactions that became due.
+
+Each tick handles up to `--batch-size` due rules with one set of bulk
+statements and commits. Reads materialize what is due in their groups on
+their own, so the job only keeps quiet groups current.
+
+    python -m app.jobs.recurring_transactions
+    python -m app.jobs.recurring_transactions --interval 300
+"""
+import argparse
+import logging
+import time
+from datetime import datetime, timezone
+
+from sqlmodel import Session
+
+from app.database.database import engine
+from app.services.recurring_transactions import RECURRING_BATCH_SIZE, RecurringTransactionService
+
+logger = logging.getLogger(__name__)
+
+
+def materialize_due(session: Session, now: datetime, batch_size: int = RECURRING_BATCH_SIZE) -> int:
+    """Materialize every occurrence due by `now`, committing per batch"""
+    materialized = 0
+
+    while True:
+        inserted = RecurringTransactionService.materialize(
+            session, now, batch_size=batch_size)
+        session.commit()
+        if not inserted:
+            return materialized
+        materialized += inserted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=RECURRING_BATCH_SIZE,
+                        help="rules materialized per tick")
+    parser.add_argument("--interval", type=int, default=0,
+                        help="seconds between runs, 0 to run once")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    while True:
+        now = datetime.now(timezone.utc)
+        with Session(engine) as session:
+            materialized = materialize_due(session, now, args.batch_size)
+        logger.info("Materialized %d recurring transactions due by %s",
+                    materialized, now.isoformat())
+
+        if args.interval <= 0:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,9 @@ from fastapi import FastAPI
 from contextlib import asynccontextmanager
 
 from app import config
-from app.routers import account, auth, balances, groups, invites, transactions
+from app.routers import account, attachments, auth, balances, groups, invites, recurring, sync, transactions
 from app.database.database import create_db_and_tables
+from app.services.attachment_thumbnails import AttachmentThumbnails
 
 
 @asynccontextmanager
@@ -12,12 +13,16 @@ async def lifespan(app: FastAPI):
     if settings.PROD != True:
         create_db_and_tables()
     yield
+    AttachmentThumbnails.shutdown()
 
 app = FastAPI(lifespan=lifespan)
 
 app.include_router(account.router)
+app.include_router(attachments.router)
 app.include_router(auth.router)
 app.include_router(balances.router)
 app.include_router(groups.router)
 app.include_router(invites.router)
+app.include_router(recurring.router)
+app.include_router(sync.router)
 app.include_router(transactions.router)
@@ -0,0 +1,132 @@
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+
+from app import config
+from app.database.database import SessionDep
+from app.database.models import Transaction, TransactionAttachmentRead, User
+from app.database.models.users_groups import UsersGroups
+from app.services.attachment_storage import AttachmentStorage, get_attachment_storage
+from app.services.attachments import THUMBNAIL_CONTENT_TYPE, AttachmentService
+from app.services.auth import AuthService, oauth2_scheme
+
+
+router = APIRouter(
+    prefix="/transactions/{transaction_id}/attachments",
+    tags=["transactions", "attachments"],
+    dependencies=[Depends(oauth2_scheme)],
+    responses={404: {"description": "Not found"}},
+)
+
+
+def get_transaction(session: SessionDep, user: User, transaction_id: UUID, action: str | None = None) -> Transaction:
+    """The transaction if the user may see it, or change it if an action is given"""
+    transaction = session.get(Transaction, transaction_id)
+    if not transaction:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found")
+
+    if action is not None and transaction.payer_id != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Only the payer can {action} attachments of the transaction"
+        )
+    if transaction.payer_id != user.id and not session.get(UsersGroups, (transaction.group_id, user.id)):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User does not have permission to view this transaction"
+        )
+    return transaction
+
+
+@router.post("/", response_model=TransactionAttachmentRead, status_code=status.HTTP_201_CREATED,
+             responses={413: {"description": "The file exceeds ATTACHMENT_MAX_BYTES"}},
+             openapi_extra={"requestBody": {"required": True, "content": {
+                 "application/octet-stream": {"schema": {"type": "string", "format": "binary"}}}}})
+async def upload_attachment(
+    transaction_id: UUID,
+    request: Request,
+    session: SessionDep,
+    token: Annotated[str, Depends(oauth2_scheme)],
+    settings: Annotated[config.Settings, Depends(config.get_settings)],
+    storage: Annotated[AttachmentStorage, Depends(get_attachment_storage)],
+    filename: str = Query(min_length=1, max_length=255)
+):
+    """Upload the request body as is, with the file's type as Content-Type.
+
+    The body is streamed to storage as it arrives instead of being parsed
+    as a form, so the file is never held in memory or spooled twice.
+    """
+    current_user = await AuthService.get_current_user(session, token, settings)
+    transaction = get_transaction(session, current_user, transaction_id, "add")
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.ATTACHMENT_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"Attachments can't be larger than {settings.ATTACHMENT_MAX_BYTES} bytes")
+    content_type = request.headers.get("content-type", "").split(";")[0].strip() or "application/octet-stream"
+
+    attachment = await AttachmentService.upload(
+        session, storage, transaction, filename, content_type[:255], request.stream(),
+        settings.ATTACHMENT_MAX_BYTES)
+
+    # Dumped before the commit expires the attachment
+    response_data = TransactionAttachmentRead.model_validate(attachment).model_dump()
+    session.commit()
+    return response_data
+
+
+@router.get("/{attachment_id}", status_code=status.HTTP_200_OK,
+            responses={206: {"description": "The requested range of the file"}})
+async def download_attachment(
+    transaction_id: UUID,
+    attachment_id: UUID,
+    session: SessionDep,
+    token: Annotated[str, Depends(oauth2_scheme)],
+    settings: Annotated[config.Settings, Depends(config.get_settings)],
+    storage: Annotated[AttachmentStorage, Depends(get_attachment_storage)]
+):
+    current_user = await AuthService.get_current_user(session, token, settings)
+    get_transaction(session, current_user, transaction_id)
+    attachment = AttachmentService.get(session, transaction_id, attachment_id)
+
+    return AttachmentService.respond(storage, attachment.storage_key, attachment.content_type, attachment.filename)
+
+
+@router.get("/{attachment_id}/thumbnail", status_code=status.HTTP_200_OK)
+async def download_thumbnail(
+    transaction_id: UUID,
+    attachment_id: UUID,
+    session: SessionDep,
+    token: Annotated[str, Depends(oauth2_scheme)],
+    settings: Annotated[config.Settings, Depends(config.get_settings)],
+    storage: Annotated[AttachmentStorage, Depends(get_attachment_storage)]
+):
+    current_user = await AuthService.get_current_user(session, token, settings)
+    get_transaction(session, current_user, transaction_id)
+    attachment = AttachmentService.get(session, transaction_id, attachment_id)
+    if not attachment.thumbnail_key:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Attachment has no thumbnail")
+
+    return AttachmentService.respond(storage, attachment.thumbnail_key, THUMBNAIL_CONTENT_TYPE)
+
+
+@router.delete("/{attachment_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_attachment(
+    transaction_id: UUID,
+    attachment_id: UUID,
+    session: SessionDep,
+    token: Annotated[str, Depends(oauth2_scheme)],
+    settings: Annotated[config.Settings, Depends(config.get_settings)]
+):
+    current_user = await AuthService.get_current_user(session, token, settings)
+    get_transaction(session, current_user, transaction_id, "delete")
+    attachment = AttachmentService.get(session, transaction_id, attachment_id)
+
+    # The files go once the deletion is committed
+    session.delete(attachment)
+    session.commit()
+    return
@@ -1,10 +1,15 @@
+from typing import Optional
+from uuid import UUID
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 
 from app.config import Settings, get_settings
 from app.database.database import SessionDep
-from app.database.models.balance import Balance
+from app.database.models.balance import Balance, BalanceHistoryPoint, HistoryBucket
+from app.middleware.is_user_group import is_user_in_group
 from app.services.auth import AuthService, oauth2_scheme
 from app.services.balance import BalanceService
+from app.services.recurring_transactions import RecurringTransactionService
 
 router = APIRouter(prefix="/balances", tags=["balances"])
 
@@ -16,4 +21,30 @@ async def get_user_balances(
     settings: Settings = Depends(get_settings)
 ):
     current_user = await AuthService.get_current_user(session, token, settings)
+    RecurringTransactionService.materialize_visible(session, current_user.id)
     return BalanceService.calculate_balance(session, current_user.id)
+
+
+@router.get("/history", response_model=list[BalanceHistoryPoint])
+async def get_balance_history(
+    session: SessionDep,
+    group_id: Optional[UUID] = None,
+    bucket: HistoryBucket = HistoryBucket.DAY,
+    token: str = Depends(oauth2_scheme),
+    settings: Settings = Depends(get_settings)
+):
+    current_user = await AuthService.get_current_user(session, token, settings)
+    if group_id:
+        await is_user_in_group(group_id, session, token, settings)
+
+    RecurringTransactionService.materialize_visible(session, current_user.id, group_id)
+    history = BalanceService.get_balance_history(
+        session, current_user.id, bucket, group_id)
+
+    def serialize():
+        yield "["
+        for index, point in enumerate(history):
+            yield ("," if index else "") + point.model_dump_json()
+        yield "]"
+
+    return StreamingResponse(serialize(), media_type="application/json")
@@ -1,15 +1,31 @@
+from datetime import date
 from typing import Annotated, List
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
 from sqlmodel import select
 from app import config
 from app.database.database import SessionDep
 from app.database.models.group import CreateGroup, Group, GroupExpandedResponse, UpdateGroup
+from app.database.models.balance import GroupBalances, HistoryBucket
+from app.database.models.settlement import SettlementPlan
 from app.database.models.user import User
-from app.database.models.transaction import Transaction, TransactionRead
+from app.database.models.transaction import (
+    Transaction, TransactionCompactList, TransactionExportFormat, TransactionFilter, TransactionRead
+)
+from app.database.models.transaction_import import TransactionImportResult
+from app.database.models.transaction_stats import GroupStats
 from app.services.auth import AuthService, oauth2_scheme
 from app.middleware.is_user_group import is_user_in_group
 from app.services.balance import BalanceService
+from app.services.recurring_transactions import RecurringTransactionService
+from app.services.settlement import SettlementService
+from app.services.transaction_export import MEDIA_TYPES, TransactionExportService
+from app.services.transaction_filtering import TransactionFiltering
+from app.services.transaction_import import TransactionImportService
+from app.services.transaction_loading import TransactionLoading
+from app.services.transaction_pagination import NEXT_CURSOR_RESPONSES, TransactionPagination
+from app.services.transaction_stats import TransactionStatsService
 
 router = APIRouter(
     prefix="/groups",
@@ -33,11 +49,12 @@ async def read_group(group_id: UUID, session: SessionDep, token: Annotated[str,
     user = await AuthService.get_current_user(session, token, settings)
     group = await is_user_in_group(group_id, session, token, settings)
 
+    RecurringTransactionService.materialize_visible(session, group_id=group_id)
     balance = BalanceService.calculate_balance(session, user.id, group_id)
 
     transactions_query = select(Transaction).where(
         Transaction.group_id == group_id
-    ).order_by(Transaction.created_at.desc()).limit(10)
+    ).options(*TransactionLoading.read_options()).order_by(Transaction.created_at.desc()).limit(10)
 
     transactions = session.exec(transactions_query).all()
 
@@ -48,20 +65,114 @@ async def read_group(group_id: UUID, session: SessionDep, token: Annotated[str,
     })
 
 
-@router.get("/{group_id}/transactions", tags=["groups", "transactions"], response_model=List[TransactionRead], status_code=status.HTTP_200_OK)
+@router.get("/{group_id}/transactions", tags=["groups", "transactions"], response_model=List[TransactionRead] | TransactionCompactList, status_code=status.HTTP_200_OK, responses=NEXT_CURSOR_RESPONSES)
 def read_group_transactions(
     *,
     session: SessionDep,
     group: Annotated[Group, Depends(is_user_in_group)],
+    response: Response,
     skip: int = 0,
-    limit: int = Query(default=100, ge=1, le=200)
+    limit: int = Query(default=100, ge=1, le=200),
+    cursor: str | None = None,
+    compact: bool = Query(
+        default=False, description="Refer to users and groups by id and list them once per page"),
+    filters: Annotated[TransactionFilter, Depends()]
 ):
-    statement = select(Transaction).where(
-        Transaction.group_id == group.id).order_by(Transaction.purchased_on.desc()).order_by(Transaction.created_at.desc()).offset(skip).limit(limit)
-    transactions = session.exec(statement).all()
+    RecurringTransactionService.materialize_visible(session, group_id=group.id)
+    statement = TransactionFiltering.apply(session, select(Transaction).where(
+        Transaction.group_id == group.id), filters)
+    statement = TransactionPagination.paginate(session, statement.options(
+        *TransactionLoading.list_options(compact)), cursor, skip, limit)
+    transactions = TransactionPagination.page(
+        session.exec(statement).all(), limit, response)
+    if compact:
+        return TransactionLoading.compact(session, transactions)
     return transactions
 
 
+@router.get("/{group_id}/export", tags=["groups", "transactions"], status_code=status.HTTP_200_OK,
+            response_class=StreamingResponse,
+            responses={200: {"content": {media_type: {} for media_type in MEDIA_TYPES.values()}}})
+def export_group_transactions(
+    session: SessionDep,
+    group: Annotated[Group, Depends(is_user_in_group)],
+    format: TransactionExportFormat = TransactionExportFormat.CSV
+) -> StreamingResponse:
+    RecurringTransactionService.materialize_visible(session, group_id=group.id)
+    return StreamingResponse(
+        TransactionExportService.export(session, group.id, format),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="transactions-{group.id}.{format.value}"'}
+    )
+
+
+@router.post("/{group_id}/import", tags=["groups", "transactions"], response_model=TransactionImportResult,
+             status_code=status.HTTP_200_OK)
+def import_group_transactions(
+    session: SessionDep,
+    group: Annotated[Group, Depends(is_user_in_group)],
+    file: UploadFile
+) -> TransactionImportResult:
+    result = TransactionImportService.import_csv(session, group.id, file.file)
+    session.commit()
+
+    return result
+
+
+@router.get("/{group_id}/balances", tags=["groups", "balances"], response_model=GroupBalances, status_code=status.HTTP_200_OK)
+async def read_group_balances(
+    session: SessionDep,
+    group: Annotated[Group, Depends(is_user_in_group)]
+) -> GroupBalances:
+    RecurringTransactionService.materialize_visible(session, group_id=group.id)
+    return BalanceService.calculate_group_balances(session, group)
+
+
+@router.get("/{group_id}/stats", tags=["groups"], response_model=GroupStats, status_code=status.HTTP_200_OK)
+async def read_group_stats(
+    session: SessionDep,
+    group: Annotated[Group, Depends(is_user_in_group)],
+    start: date | None = Query(
+        default=None, alias="from", description="First day of the range"),
+    end: date | None = Query(
+        default=None, alias="to", description="Last day of the range"),
+    bucket: HistoryBucket = HistoryBucket.MONTH
+) -> GroupStats:
+    if start is not None and end is not None and start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="from must not be after to")
+
+    RecurringTransactionService.materialize_visible(session, group_id=group.id)
+    return TransactionStatsService.get_group_stats(session, group.id, bucket, start, end)
+
+
+@router.get("/{group_id}/settle-plan", tags=["groups"], response_model=SettlementPlan, status_code=status.HTTP_200_OK)
+async def read_settle_plan(
+    session: SessionDep,
+    group: Annotated[Group, Depends(is_user_in_group)]
+) -> SettlementPlan:
+    RecurringTransactionService.materialize_visible(session, group_id=group.id)
+    return SettlementService.create_plan(session, group.id)
+
+
+@router.post("/{group_id}/settle", tags=["groups"], response_model=SettlementPlan, status_code=status.HTTP_201_CREATED)
+async def settle_group(
+    session: SessionDep,
+    group: Annotated[Group, Depends(is_user_in_group)]
+) -> SettlementPlan:
+    RecurringTransactionService.materialize_visible(session, group_id=group.id)
+    plan = SettlementService.create_plan(session, group.id)
+    if not plan.transfers:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Group is already settled")
+
+    SettlementService.record_plan(session, plan)
+    session.commit()
+
+    return plan
+
+
 @router.post("/", tags=["groups"], response_model=Group, status_code=status.HTTP_201_CREATED)
 async def create_group(group: CreateGroup, session: SessionDep, token: Annotated[str, Depends(oauth2_scheme)], settings: Annotated[config.Settings, Depends(config.get_settings)]) -> Group:
     user = await AuthService.get_current_user(session, token, settings)
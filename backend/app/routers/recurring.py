@@ -0,0 +1,119 @@
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlmodel import select
+
+from app import config
+from app.database.database import SessionDep
+from app.database.models import RecurringRule, RecurringRuleCreate, RecurringRuleRead, Transaction, User
+from app.database.models.users_groups import UsersGroups
+from app.services.auth import AuthService, oauth2_scheme
+from app.services.recurring_transactions import RecurringTransactionService
+
+
+router = APIRouter(
+    prefix="/transactions/{transaction_id}/recurrence",
+    tags=["transactions", "recurring"],
+    dependencies=[Depends(oauth2_scheme)],
+    responses={404: {"description": "Not found"}},
+)
+
+
+def get_template(session: SessionDep, user: User, transaction_id: UUID, action: str | None = None) -> Transaction:
+    """The transaction if the user may see it, or change its rule if an action is given"""
+    transaction = session.get(Transaction, transaction_id)
+    if not transaction:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found")
+
+    if action is not None and transaction.payer_id != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Only the payer can {action} the recurrence of the transaction"
+        )
+    if transaction.payer_id != user.id and not session.get(UsersGroups, (transaction.group_id, user.id)):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User does not have permission to view this transaction"
+        )
+    return transaction
+
+
+def get_rule(session: SessionDep, transaction_id: UUID) -> RecurringRule | None:
+    return session.exec(select(RecurringRule).where(
+        RecurringRule.template_id == transaction_id)).first()
+
+
+@router.post("/", response_model=RecurringRuleRead, status_code=status.HTTP_201_CREATED,
+             responses={409: {"description": "The transaction already repeats"}})
+async def create_recurrence(
+    transaction_id: UUID,
+    rule_in: RecurringRuleCreate,
+    session: SessionDep,
+    token: Annotated[str, Depends(oauth2_scheme)],
+    settings: Annotated[config.Settings, Depends(config.get_settings)]
+):
+    """Repeat the transaction, which becomes the template of every occurrence.
+
+    Occurrences copy the template as it is when they become due. Templates
+    purchased in the past catch up on their missed occurrences right away.
+    """
+    current_user = await AuthService.get_current_user(session, token, settings)
+    template = get_template(session, current_user, transaction_id, "set")
+
+    if template.recurring_rule_id is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Occurrences of a recurring transaction can't repeat themselves"
+        )
+    if get_rule(session, transaction_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Transaction already repeats"
+        )
+
+    rule = RecurringTransactionService.create(session, template, rule_in)
+    RecurringTransactionService.materialize(
+        session, scope=(RecurringRule.id == rule.id,))
+    session.commit()
+    session.refresh(rule)
+    return rule
+
+
+@router.get("/", response_model=RecurringRuleRead, status_code=status.HTTP_200_OK)
+async def read_recurrence(
+    transaction_id: UUID,
+    session: SessionDep,
+    token: Annotated[str, Depends(oauth2_scheme)],
+    settings: Annotated[config.Settings, Depends(config.get_settings)]
+):
+    current_user = await AuthService.get_current_user(session, token, settings)
+    get_template(session, current_user, transaction_id)
+
+    rule = get_rule(session, transaction_id)
+    if not rule:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Transaction doesn't repeat")
+    return rule
+
+
+@router.delete("/", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_recurrence(
+    transaction_id: UUID,
+    session: SessionDep,
+    token: Annotated[str, Depends(oauth2_scheme)],
+    settings: Annotated[config.Settings, Depends(config.get_settings)]
+):
+    """Stop repeating the transaction, occurrences so far are kept"""
+    current_user = await AuthService.get_current_user(session, token, settings)
+    get_template(session, current_user, transaction_id, "delete")
+
+    rule = get_rule(session, transaction_id)
+    if not rule:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Transaction doesn't repeat")
+
+    session.delete(rule)
+    session.commit()
+    return
@@ -0,0 +1,28 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query, status
+
+from app import config
+from app.database.database import SessionDep
+from app.database.models.sync_change import SyncChanges
+from app.services.auth import AuthService, oauth2_scheme
+from app.services.sync_changes import SYNC_MAX_CHANGES, SyncChangeService
+
+router = APIRouter(
+    prefix="/sync",
+    tags=["sync"],
+    dependencies=[Depends(oauth2_scheme)]
+)
+
+
+@router.get("/changes", response_model=SyncChanges, status_code=status.HTTP_200_OK)
+async def read_changes(
+    session: SessionDep,
+    token: Annotated[str, Depends(oauth2_scheme)],
+    settings: Annotated[config.Settings, Depends(config.get_settings)],
+    since: str | None = Query(
+        default=None, description="Cursor of the previous sync, omitted for the first one"),
+    limit: int = Query(default=500, ge=1, le=SYNC_MAX_CHANGES)
+):
+    user = await AuthService.get_current_user(session, token, settings)
+    return SyncChangeService.get_changes(session, user, since, limit)
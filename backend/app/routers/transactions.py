@@ -2,17 +2,29 @@ from operator import or_
 from typing import Annotated, List
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response, status
 from sqlmodel import select
+from sqlmodel.sql.expression import SelectOfScalar
 
 from app import config
 from app.database.database import SessionDep
 from app.database.models import (
-    Transaction, TransactionCreate, TransactionRead, TransactionUpdate, User, Group
+    Transaction, TransactionCreate, TransactionRead, TransactionUpdate, User, Group,
+    TransactionBatchItem, TransactionBatchResult, TransactionCompactList, TransactionFilter
 )
 from app.database.models.transaction_participant import TransactionParticipant
+from app.database.models.users_groups import UsersGroups
 from app.middleware.is_user_group import is_user_in_group
 from app.services.auth import AuthService, oauth2_scheme
+from app.services.transaction_batch import BATCH_MAX_ITEMS, TransactionBatchService
+from app.services.transaction_create import TransactionCreateService
+from app.services.transaction_filtering import TransactionFiltering
+from app.services.transaction_loading import TransactionLoading
+from app.services.transaction_pagination import NEXT_CURSOR_RESPONSES, TransactionPagination
+from app.services.recurring_transactions import RecurringTransactionService
+from app.services.transaction_search import TransactionSearch
+from app.services.transaction_split import TransactionSplitService
+from app.services.transaction_update import TransactionUpdateService
 
 
 router = APIRouter(
@@ -23,12 +35,15 @@ router = APIRouter(
 )
 
 
-@router.post("/", response_model=TransactionRead, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=TransactionRead, status_code=status.HTTP_201_CREATED,
+             responses={200: {"description": "Retry of a create that was already stored", "model": TransactionRead},
+                        409: {"description": "The id is taken by a different transaction"}})
 async def create_transaction(
     transaction_in: TransactionCreate,
     session: SessionDep,
     token: Annotated[str, Depends(oauth2_scheme)],
-    settings: Annotated[config.Settings, Depends(config.get_settings)]
+    settings: Annotated[config.Settings, Depends(config.get_settings)],
+    response: Response
 ):
     current_user = await AuthService.get_current_user(session, token, settings)
     
@@ -39,67 +54,128 @@ async def create_transaction(
             detail="Group not found"
         )
     
-    if current_user not in db_group.users:
+    if not session.get(UsersGroups, (db_group.id, current_user.id)):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User does not have permission to create a transaction in this group"
         )
 
-    # Create a proper SQLAlchemy Transaction instance
-    db_transaction = Transaction(
-        id=transaction_in.id,
-        amount=transaction_in.amount,
-        title=transaction_in.title,
-        purchased_on=transaction_in.purchased_on,
-        transaction_type=transaction_in.transaction_type,
-        group_id=transaction_in.group_id,
-        payer_id=transaction_in.payer_id
-    )
-    session.add(db_transaction)
-    session.commit()
+    try:
+        TransactionSplitService.apply(transaction_in)
+    except ValueError as error:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=str(error)
+        )
 
-    # After committing the transaction, create and associate participants
-    for participant in transaction_in.participants:
-        db_participant = TransactionParticipant(
-            transaction_id=db_transaction.id,
-            debtor_id=participant.debtor_id,
-            amount_owed=participant.amount_owed
+    user_ids = TransactionBatchService.get_user_ids(transaction_in)
+    known_user_ids = session.exec(
+        select(User.id).where(User.id.in_(user_ids))).all()
+    if len(known_user_ids) != len(user_ids):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
         )
-        session.add(db_participant)
 
+    # Clients retry creates after dropped responses with the same id
+    if not TransactionCreateService.insert(session, transaction_in):
+        if not TransactionCreateService.is_replay(session, transaction_in):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Transaction already exists"
+            )
+        response.status_code = status.HTTP_200_OK
+
+    db_transaction = session.get(Transaction, transaction_in.id,
+                                 options=TransactionLoading.read_options(), populate_existing=True)
+
+    # Dumped before the commit expires the loaded objects
+    response_data = TransactionRead.model_validate(db_transaction).model_dump()
     session.commit()
-    session.refresh(db_transaction)
 
-    return db_transaction
+    return response_data
 
 
-@router.get("/", response_model=List[TransactionRead], status_code=status.HTTP_200_OK)
+@router.post("/batch", response_model=List[TransactionBatchResult], status_code=status.HTTP_200_OK)
+async def apply_transaction_batch(
+    items: Annotated[List[TransactionBatchItem], Body(max_length=BATCH_MAX_ITEMS)],
+    session: SessionDep,
+    token: Annotated[str, Depends(oauth2_scheme)],
+    settings: Annotated[config.Settings, Depends(config.get_settings)]
+):
+    current_user = await AuthService.get_current_user(session, token, settings)
+
+    results = TransactionBatchService.apply(session, current_user, items)
+    session.commit()
+
+    return results
+
+
+def visible_transactions(user_id: UUID) -> SelectOfScalar[Transaction]:
+    """Transactions the user paid or takes part in"""
+    return select(Transaction).where(
+        or_(
+            Transaction.payer_id == user_id,
+            Transaction.participants.any(
+                TransactionParticipant.debtor_id == user_id)
+        )
+    )
+
+
+@router.get("/", response_model=List[TransactionRead] | TransactionCompactList, status_code=status.HTTP_200_OK, responses=NEXT_CURSOR_RESPONSES)
 async def read_transactions_user_is_participant_in(
     *,
     session: SessionDep,
     token_user: Annotated[str, Depends(oauth2_scheme)],
     settings: Annotated[config.Settings, Depends(config.get_settings)],
+    response: Response,
     skip: int = 0,
     limit: int = Query(default=100, ge=1, le=200),
-    group_id: UUID | None = None
+    cursor: str | None = None,
+    group_id: UUID | None = None,
+    compact: bool = Query(
+        default=False, description="Refer to users and groups by id and list them once per page"),
+    filters: Annotated[TransactionFilter, Depends()]
 ):
     user = await AuthService.get_current_user(session, token_user, settings)
+    RecurringTransactionService.materialize_visible(session, user.id, group_id)
 
-    statement = select(Transaction).where(
-        or_(
-            Transaction.payer_id == user.id,
-            Transaction.participants.any(
-                TransactionParticipant.debtor_id == user.id)
-        )
-    ).offset(skip).limit(limit).order_by(Transaction.purchased_on.desc()).order_by(Transaction.created_at.desc())
+    statement = TransactionFiltering.apply(
+        session, visible_transactions(user.id), filters)
     if group_id:
         statement = statement.where(
             Transaction.group_id == group_id
         )
-    transactions = session.exec(statement).all()
+    statement = TransactionPagination.paginate(
+        session, statement.options(*TransactionLoading.list_options(compact)), cursor, skip, limit)
+    transactions = TransactionPagination.page(
+        session.exec(statement).all(), limit, response)
+    if compact:
+        return TransactionLoading.compact(session, transactions)
     return transactions
 
 
+@router.get("/search", response_model=List[TransactionRead], status_code=status.HTTP_200_OK)
+async def search_transactions(
+    *,
+    session: SessionDep,
+    token: Annotated[str, Depends(oauth2_scheme)],
+    settings: Annotated[config.Settings, Depends(config.get_settings)],
+    q: str = Query(min_length=1, max_length=200),
+    group_id: UUID | None = None,
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, ge=1, le=200)
+):
+    user = await AuthService.get_current_user(session, token, settings)
+    RecurringTransactionService.materialize_visible(session, user.id, group_id)
+
+    statement = visible_transactions(user.id).options(
+        *TransactionLoading.read_options())
+    if group_id:
+        statement = statement.where(Transaction.group_id == group_id)
+    return TransactionSearch.search(session, statement, q, skip, limit)
+
+
 @router.get("/{transaction_id}", response_model=TransactionRead, status_code=status.HTTP_200_OK)
 async def read_transaction(
     transaction_id: UUID,
@@ -109,12 +185,13 @@ async def read_transaction(
 ):
     current_user = await AuthService.get_current_user(session, token, settings)
     
-    transaction = session.get(Transaction, transaction_id)
+    transaction = session.get(
+        Transaction, transaction_id, options=TransactionLoading.read_options(), populate_existing=True)
     if not transaction:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found")
 
-    group = session.get(Group, transaction.group_id)
+    group = transaction.group
     if transaction.payer_id != current_user.id and (not group or current_user not in group.users):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -145,13 +222,30 @@ async def update_transaction(
             detail="Only the payer can update the transaction"
         )
 
-    update_data = transaction_in.model_dump(exclude_unset=True)
-    db_transaction.sqlmodel_update(update_data)
+    try:
+        participants = TransactionUpdateService.get_participants(
+            transaction_in, db_transaction.amount, db_transaction.transaction_type)
+    except ValueError as error:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=str(error)
+        )
+
+    if participants:
+        debtor_ids = {participant.debtor_id for participant in participants}
+        known_user_ids = session.exec(
+            select(User.id).where(User.id.in_(debtor_ids))).all()
+        if len(known_user_ids) != len(debtor_ids):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
 
-    session.add(db_transaction)
+    TransactionUpdateService.apply(
+        session, db_transaction, transaction_in, participants)
     session.commit()
-    session.refresh(db_transaction)
-    return db_transaction
+    return session.get(Transaction, transaction_id, options=TransactionLoading.read_options(),
+                       populate_existing=True)
 
 
 @router.delete("/{transaction_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -163,7 +257,8 @@ async def delete_transaction(
 ):
     current_user = await AuthService.get_current_user(session, token, settings)
     
-    transaction = session.get(Transaction, transaction_id)
+    transaction = session.get(
+        Transaction, transaction_id, options=TransactionLoading.delete_options(), populate_existing=True)
     if not transaction:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found")
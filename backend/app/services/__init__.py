@@ -0,0 +1,4 @@
+# Handlers that keep derived data in sync with transaction writes
+from app.services import pairwise_balance, balance_checkpoint, sync_changes, transaction_stats  # noqa: F401
+# Removes attachment files once the deletion of their rows is committed
+from app.services import attachments  # noqa: F401
@@ -0,0 +1,95 @@
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Optional
+from uuid import uuid4
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import get_settings
+
+
+class AttachmentStorage(ABC):
+    """Where attachment contents are kept, addressed by key.
+
+    Backends only move bytes, the metadata stays in the database. Keys are
+    relative paths like `<transaction id>/<attachment id>`.
+    """
+
+    @abstractmethod
+    async def save(self, key: str, chunks: AsyncIterator[bytes]) -> int:
+        """Store the chunks under the key as they arrive, returning the size.
+
+        Nothing is stored under the key if the chunks raise.
+        """
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove the key, ignoring keys that don't exist"""
+
+    def path(self, key: str) -> Optional[Path]:
+        """Local file of the key, None for backends that can't serve files directly"""
+        return None
+
+
+class LocalAttachmentStorage(AttachmentStorage):
+    """Stores attachments as files below a directory.
+
+    Uploads are written to a temporary file next to the target and renamed
+    once complete, so readers never see a partial file.
+    """
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root).resolve()
+
+    def path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root):
+            raise ValueError(f"Invalid storage key {key}")
+        return path
+
+    async def save(self, key: str, chunks: AsyncIterator[bytes]) -> int:
+        path = self.path(key)
+        await run_in_threadpool(path.parent.mkdir, parents=True, exist_ok=True)
+        partial = path.with_name(f".{path.name}.{uuid4().hex}.partial")
+
+        size = 0
+        file = await run_in_threadpool(open, partial, "wb")
+        try:
+            async for chunk in chunks:
+                await run_in_threadpool(file.write, chunk)
+                size += len(chunk)
+            await run_in_threadpool(file.close)
+            await run_in_threadpool(os.replace, partial, path)
+        except BaseException:
+            file.close()
+            partial.unlink(missing_ok=True)
+            raise
+        return size
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self.path(key), "rb")
+
+    def delete(self, key: str) -> None:
+        self.path(key).unlink(missing_ok=True)
+
+
+_storage: Optional[AttachmentStorage] = None
+
+
+def get_attachment_storage() -> AttachmentStorage:
+    """The configured backend, local files below ATTACHMENT_DIR unless replaced"""
+    global _storage
+    if _storage is None:
+        _storage = LocalAttachmentStorage(get_settings().ATTACHMENT_DIR)
+    return _storage
+
+
+def set_attachment_storage(storage: Optional[AttachmentStorage]) -> None:
+    """Plug in another backend, None goes back to the configured one"""
+    global _storage
+    _storage = storage
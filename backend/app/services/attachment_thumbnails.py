@@ -0,0 +1,67 @@
+import asyncio
+import io
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from app.config import get_settings
+
+try:
+    from PIL import Image
+except ImportError:  # Thumbnails are skipped without Pillow
+    Image = None
+
+THUMBNAIL_SIZE = (320, 320)
+THUMBNAIL_CONTENT_TYPES = {"image/jpeg", "image/png", "image/gif", "image/webp"}
+# Decompression bombs are rejected before they are decoded
+THUMBNAIL_MAX_PIXELS = 50_000_000
+
+
+def render_thumbnail(path: str, size: tuple[int, int] = THUMBNAIL_SIZE) -> Optional[bytes]:
+    """JPEG thumbnail of the image at the path, None if it can't be decoded.
+
+    Runs in a worker process, so it only takes and returns picklable values.
+    """
+    Image.MAX_IMAGE_PIXELS = THUMBNAIL_MAX_PIXELS
+    try:
+        with Image.open(path) as image:
+            image.draft("RGB", size)
+            image.thumbnail(size)
+            buffer = io.BytesIO()
+            image.convert("RGB").save(buffer, format="JPEG", quality=80)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+    return buffer.getvalue()
+
+
+class AttachmentThumbnails:
+    """Renders image thumbnails in a process pool.
+
+    Decoding images is CPU bound and holds the GIL, so it runs in
+    ATTACHMENT_THUMBNAIL_WORKERS separate processes and never stalls the
+    event loop or the other requests' threads.
+    """
+    _pool: Optional[ProcessPoolExecutor] = None
+
+    @staticmethod
+    def is_available(content_type: str) -> bool:
+        return Image is not None and content_type in THUMBNAIL_CONTENT_TYPES \
+            and get_settings().ATTACHMENT_THUMBNAIL_WORKERS > 0
+
+    @staticmethod
+    def get_pool() -> ProcessPoolExecutor:
+        if AttachmentThumbnails._pool is None:
+            AttachmentThumbnails._pool = ProcessPoolExecutor(
+                max_workers=get_settings().ATTACHMENT_THUMBNAIL_WORKERS)
+        return AttachmentThumbnails._pool
+
+    @staticmethod
+    async def render(path: Path) -> Optional[bytes]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(AttachmentThumbnails.get_pool(), render_thumbnail, str(path))
+
+    @staticmethod
+    def shutdown() -> None:
+        if AttachmentThumbnails._pool is not None:
+            AttachmentThumbnails._pool.shutdown(cancel_futures=True)
+            AttachmentThumbnails._pool = None
@@ -0,0 +1,132 @@
+from typing import AsyncIterator, Optional
+from uuid import UUID, uuid4
+
+from fastapi import HTTPException, status
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app.database.database import SessionDep
+from app.database.models.transaction import Transaction
+from app.database.models.transaction_attachment import TransactionAttachment
+from app.services.attachment_storage import AttachmentStorage, get_attachment_storage
+from app.services.attachment_thumbnails import AttachmentThumbnails
+
+THUMBNAIL_CONTENT_TYPE = "image/jpeg"
+_DELETED_KEYS_KEY = "attachment_deleted_keys"
+
+
+class AttachmentService:
+    @staticmethod
+    async def limit(chunks: AsyncIterator[bytes], max_bytes: int) -> AsyncIterator[bytes]:
+        """Pass the chunks on, failing with 413 once they exceed max_bytes"""
+        size = 0
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(
+                    status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                    detail=f"Attachments can't be larger than {max_bytes} bytes")
+            if chunk:
+                yield chunk
+
+    @staticmethod
+    async def upload(
+        session: SessionDep,
+        storage: AttachmentStorage,
+        transaction: Transaction,
+        filename: str,
+        content_type: str,
+        chunks: AsyncIterator[bytes],
+        max_bytes: int
+    ) -> TransactionAttachment:
+        """Store the upload chunk by chunk and add its row without committing.
+
+        Images also get a thumbnail when Pillow is installed. The stored
+        files are removed again if the row can't be added.
+        """
+        attachment_id = uuid4()
+        key = f"{transaction.id}/{attachment_id}"
+        size = await storage.save(key, AttachmentService.limit(chunks, max_bytes))
+        attachment = TransactionAttachment(
+            id=attachment_id,
+            transaction_id=transaction.id,
+            filename=filename,
+            content_type=content_type,
+            size=size,
+            storage_key=key
+        )
+
+        try:
+            path = storage.path(key)
+            if path is not None and AttachmentThumbnails.is_available(content_type):
+                thumbnail = await AttachmentThumbnails.render(path)
+                if thumbnail is not None:
+                    async def thumbnail_chunks():
+                        yield thumbnail
+                    await storage.save(f"{key}.thumbnail", thumbnail_chunks())
+                    attachment.thumbnail_key = f"{key}.thumbnail"
+
+            session.add(attachment)
+            session.flush()
+        except BaseException:
+            for stored_key in attachment.storage_keys:
+                storage.delete(stored_key)
+            raise
+        return attachment
+
+    @staticmethod
+    def get(session: SessionDep, transaction_id: UUID, attachment_id: UUID) -> TransactionAttachment:
+        attachment = session.get(TransactionAttachment, attachment_id)
+        if not attachment or attachment.transaction_id != transaction_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Attachment not found")
+        return attachment
+
+    @staticmethod
+    def respond(
+        storage: AttachmentStorage,
+        key: str,
+        content_type: str,
+        filename: Optional[str] = None
+    ) -> FileResponse | StreamingResponse:
+        """Serve a stored file.
+
+        Local files go out as a FileResponse, which answers Range requests
+        and hands the file to the server to send by path where it supports
+        that (the ASGI pathsend extension). Other backends are streamed.
+        """
+        path = storage.path(key)
+        if path is not None:
+            return FileResponse(path, media_type=content_type, filename=filename,
+                                content_disposition_type="inline")
+
+        def read():
+            with storage.open(key) as file:
+                while chunk := file.read(64 * 1024):
+                    yield chunk
+
+        return StreamingResponse(read(), media_type=content_type)
+
+
+# Files are only removed once the deletion of their rows is committed
+@event.listens_for(Session, "after_flush")
+def _collect_deleted_files(session: Session, flush_context):
+    keys = [key for obj in session.deleted if isinstance(obj, TransactionAttachment)
+            for key in obj.storage_keys]
+    if keys:
+        session.info.setdefault(_DELETED_KEYS_KEY, []).extend(keys)
+
+
+@event.listens_for(Session, "after_commit")
+def _delete_files(session: Session):
+    keys = session.info.pop(_DELETED_KEYS_KEY, None)
+    if keys:
+        storage = get_attachment_storage()
+        for key in keys:
+            storage.delete(key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _keep_files(session: Session):
+    session.info.pop(_DELETED_KEYS_KEY, None)
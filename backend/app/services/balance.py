@@ -1,12 +1,28 @@
-from typing import Optional
+from collections import Counter
+from typing import Iterator, NamedTuple, Optional
 from uuid import UUID
+import sqlalchemy as sa
 from sqlmodel import select, func, case
 
 from app.database.database import SessionDep
-from app.database.models.balance import Balance, UserBalance
+from app.database.models.balance import (
+    Balance, BalanceHistoryPoint, GroupBalances, GroupBalanceTotals, HistoryBucket, PairBalance, UserBalance
+)
+from app.database.models.group import Group
+from app.database.models.pairwise_balance import PairwiseBalance
 from app.database.models.transaction import Transaction
 from app.database.models.transaction_participant import TransactionParticipant
 from app.database.models.user import User, UserResponse
+from app.services.ledger_cache import ledger_cache
+
+HISTORY_FETCH_SIZE = 1000
+
+
+class CounterpartyBalance(NamedTuple):
+    group_id: UUID
+    User: User
+    owed_by_counterparty: int
+    owed_to_counterparty: int
 
 
 class BalanceService:
@@ -16,99 +32,241 @@ class BalanceService:
         current_user_id: UUID,
         group_id: Optional[UUID] = None
     ) -> Balance:
-        """Calculate balance for user, optionally filtered by group"""
+        """Calculate balance for user, optionally filtered by group.
 
-        total_balances = BalanceService.get_total_balances_for_user(
-            session, current_user_id, group_id)
-        user_balances = BalanceService.get_user_balances_for_user(
+        Without a group the totals of every group are returned as well.
+        """
+
+        counterparty_balances = BalanceService.get_counterparty_balances_for_user(
             session, current_user_id, group_id)
 
+        # [user, owed by them, owed to them] summed over groups
+        counterparties: dict[UUID, list] = {}
+        # [owed by others, owed to others] per group
+        group_totals: dict[UUID, list[int]] = {}
+        for result in counterparty_balances:
+            counterparty = counterparties.setdefault(
+                result.User.id, [result.User, 0, 0])
+            counterparty[1] += result.owed_by_counterparty
+            counterparty[2] += result.owed_to_counterparty
+
+            totals = group_totals.setdefault(result.group_id, [0, 0])
+            totals[0] += result.owed_by_counterparty
+            totals[1] += result.owed_to_counterparty
+
+        total_owed_by_others = sum(
+            owed_by for _, owed_by, _ in counterparties.values())
+        total_owed_to_others = sum(
+            owed_to for _, _, owed_to in counterparties.values())
+
+        user_balances = [UserBalance.model_validate({
+            'user': UserResponse.model_validate(user),
+            'balance': owed_by - owed_to,
+        }) for user, owed_by, owed_to in counterparties.values()
+            if owed_by != owed_to]
+
+        groups = None
+        if group_id is None:
+            groups = [GroupBalanceTotals.model_construct(
+                group_id=totals_group_id,
+                total_balance=owed_by - owed_to,
+                total_owed_by_others=owed_by,
+                total_owed_to_others=owed_to
+            ) for totals_group_id, (owed_by, owed_to) in group_totals.items()]
+
         return Balance.model_construct(
             user_id=current_user_id,
             group_id=group_id,
-            total_balance=total_balances['total_balance'],
-            total_owed_by_others=total_balances['total_owed_by_others'],
-            total_owed_to_others=total_balances['total_owed_to_others'],
-            user_balances=user_balances
+            total_balance=total_owed_by_others - total_owed_to_others,
+            total_owed_by_others=total_owed_by_others,
+            total_owed_to_others=total_owed_to_others,
+            user_balances=user_balances,
+            groups=groups
         )
 
     @staticmethod
-    def get_total_balances_for_user(
+    def get_counterparty_balances_for_user(
         session: SessionDep,
         current_user_id: UUID,
         group_id: Optional[UUID] = None
-    ) -> dict[str, int]:
-        """Get total balance for user, optionally filtered by group"""
+    ) -> list:
+        """Get what each counterparty owes the user and the user owes them, per group.
+
+        A single grouped query; the totals of `calculate_balance` are derived
+        from these rows instead of a second aggregate over the same ledger.
+        Within a single group the in-memory ledger is used when enabled.
+        """
+        if group_id:
+            counterparties = ledger_cache.read(
+                session.connection(), group_id,
+                lambda ledger: ledger.counterparties(current_user_id))
+            if counterparties is not None:
+                return BalanceService.get_counterparty_users(session, group_id, counterparties)
+
+        is_creditor = PairwiseBalance.user_a == current_user_id
+
         balance_query = select(
+            PairwiseBalance.group_id,
+            User,
             func.sum(
-                case(
-                    (Transaction.payer_id == current_user_id,
-                     TransactionParticipant.amount_owed),
-                    else_=0
-                )
-            ).label('total_owed_by_others'),
+                case((is_creditor, PairwiseBalance.net_amount), else_=0)
+            ).label('owed_by_counterparty'),
             func.sum(
-                case(
-                    (TransactionParticipant.debtor_id == current_user_id,
-                     TransactionParticipant.amount_owed),
-                    else_=0
-                )
-            ).label('total_owed_to_others'),
+                case((is_creditor, 0), else_=PairwiseBalance.net_amount)
+            ).label('owed_to_counterparty')
         ).select_from(
-            Transaction
+            PairwiseBalance
         ).join(
-            TransactionParticipant,
-            Transaction.id == TransactionParticipant.transaction_id
+            User,
+            onclause=User.id == case(
+                (is_creditor, PairwiseBalance.user_b),
+                else_=PairwiseBalance.user_a
+            )
         ).where(
-            (Transaction.payer_id == current_user_id) |
-            (TransactionParticipant.debtor_id == current_user_id),
-            TransactionParticipant.debtor_id != Transaction.payer_id
+            (PairwiseBalance.user_a == current_user_id) |
+            (PairwiseBalance.user_b == current_user_id),
+            PairwiseBalance.user_a != PairwiseBalance.user_b
         )
 
         if group_id:
             balance_query = balance_query.where(
-                Transaction.group_id == group_id)
+                PairwiseBalance.group_id == group_id)
 
-        result = session.exec(balance_query).first()
+        balance_query = balance_query.group_by(
+            PairwiseBalance.group_id, User.id)
 
-        total_owed_by_others = result.total_owed_by_others or 0 if result else 0
-        total_owed_to_others = result.total_owed_to_others or 0 if result else 0
+        return session.exec(balance_query).all()
 
-        return {
-            'total_balance': total_owed_by_others - total_owed_to_others,
-            'total_owed_by_others': total_owed_by_others,
-            'total_owed_to_others': total_owed_to_others
-        }
+    @staticmethod
+    def get_counterparty_users(
+        session: SessionDep,
+        group_id: UUID,
+        counterparties: list[tuple[UUID, int, int]]
+    ) -> list[CounterpartyBalance]:
+        users = {user.id: user for user in session.exec(select(User).where(
+            User.id.in_([user_id for user_id, _, _ in counterparties]))).all()}
+        return [
+            CounterpartyBalance(group_id, users[user_id], owed_by, owed_to)
+            for user_id, owed_by, owed_to in counterparties
+            if user_id in users
+        ]
 
     @staticmethod
-    def get_user_balances_for_user(
+    def calculate_group_balances(session: SessionDep, group: Group) -> GroupBalances:
+        """Net balance of every member and the netted who-owes-whom matrix"""
+        cached = ledger_cache.read(
+            session.connection(), group.id,
+            lambda ledger: (ledger.member_balances(), ledger.debts()))
+        if cached is not None:
+            balances, debts = cached
+            return BalanceService.build_group_balances(session, group, Counter(balances), [
+                PairBalance(creditor_id=creditor_id,
+                            debtor_id=debtor_id, amount=amount)
+                for creditor_id, debtor_id, amount in debts
+            ])
+
+        ledger_query = select(
+            PairwiseBalance.user_a,
+            PairwiseBalance.user_b,
+            PairwiseBalance.net_amount
+        ).where(
+            PairwiseBalance.group_id == group.id,
+            PairwiseBalance.user_a != PairwiseBalance.user_b,
+            PairwiseBalance.net_amount != 0
+        )
+
+        balances: Counter = Counter()
+        # Keyed by the ordered user pair, positive when the second owes the first
+        pair_amounts: Counter = Counter()
+        for user_a, user_b, amount in session.exec(ledger_query).all():
+            balances[user_a] += amount
+            balances[user_b] -= amount
+            if user_a < user_b:
+                pair_amounts[(user_a, user_b)] += amount
+            else:
+                pair_amounts[(user_b, user_a)] -= amount
+
+        debts = [
+            PairBalance(creditor_id=first, debtor_id=second, amount=amount)
+            if amount > 0 else
+            PairBalance(creditor_id=second, debtor_id=first, amount=-amount)
+            for (first, second), amount in pair_amounts.items()
+            if amount != 0
+        ]
+        return BalanceService.build_group_balances(session, group, balances, debts)
+
+    @staticmethod
+    def build_group_balances(
+        session: SessionDep,
+        group: Group,
+        balances: Counter,
+        debts: list[PairBalance]
+    ) -> GroupBalances:
+        # Former members can still have open balances in the group
+        users = {user.id: user for user in group.users}
+        former_member_ids = [
+            user_id for user_id, balance in balances.items()
+            if balance != 0 and user_id not in users
+        ]
+        if former_member_ids:
+            users.update({
+                user.id: user for user in session.exec(
+                    select(User).where(User.id.in_(former_member_ids))).all()
+            })
+
+        return GroupBalances(
+            group_id=group.id,
+            members=[UserBalance.model_validate({
+                'user': UserResponse.model_validate(user),
+                'balance': balances[user_id],
+            }) for user_id, user in users.items()],
+            debts=debts
+        )
+
+    @staticmethod
+    def get_bucket_expression(session: SessionDep, column, bucket: HistoryBucket):
+        """Truncate a timestamp column to the start of its day, week or month"""
+        if session.get_bind().dialect.name == "sqlite":
+            if bucket == HistoryBucket.DAY:
+                expression = func.date(column)
+            elif bucket == HistoryBucket.WEEK:
+                # Weeks start on Monday like date_trunc('week', ...)
+                expression = func.date(column, "weekday 0", "-6 days")
+            else:
+                expression = func.date(column, "start of month")
+            return sa.type_coerce(expression, sa.Date)
+
+        return sa.cast(func.date_trunc(bucket.value, column), sa.Date)
+
+    @staticmethod
+    def get_balance_history(
         session: SessionDep,
         current_user_id: UUID,
+        bucket: HistoryBucket,
         group_id: Optional[UUID] = None
-    ) -> list[UserBalance]:
-        """Get balances for user, optionally filtered by group"""
+    ) -> Iterator[BalanceHistoryPoint]:
+        """Stream the user's balance per time bucket, oldest first.
 
-        balance_query = select(
-            User,
+        Bucketing and the running total (a window SUM) both happen in the
+        database; rows are fetched in batches as the caller consumes them.
+        """
+        bucket_column = BalanceService.get_bucket_expression(
+            session, Transaction.purchased_on, bucket).label('bucket')
+
+        changes_query = select(
+            bucket_column,
             func.sum(
                 case(
                     (Transaction.payer_id == current_user_id,
                      TransactionParticipant.amount_owed),
                     else_=-TransactionParticipant.amount_owed
                 )
-            ).label('balance')
+            ).label('change')
         ).select_from(
             Transaction
         ).join(
             TransactionParticipant,
             Transaction.id == TransactionParticipant.transaction_id
-        ).join(
-            User,
-            onclause=User.id == case(
-                (Transaction.payer_id == current_user_id,
-                 TransactionParticipant.debtor_id),
-                else_=Transaction.payer_id
-            )
         ).where(
             (Transaction.payer_id == current_user_id) |
             (TransactionParticipant.debtor_id == current_user_id),
@@ -116,14 +274,23 @@ class BalanceService:
         )
 
         if group_id:
-            balance_query = balance_query.where(
+            changes_query = changes_query.where(
                 Transaction.group_id == group_id)
 
-        balance_query = balance_query.group_by(User.id)
+        changes = changes_query.group_by(bucket_column).subquery()
 
-        results = session.exec(balance_query).all()
+        history_query = select(
+            changes.c.bucket,
+            changes.c.change,
+            func.sum(changes.c.change).over(
+                order_by=changes.c.bucket).label('balance')
+        ).order_by(changes.c.bucket)
 
-        return [UserBalance.model_validate({
-            'user': UserResponse.model_validate(result.User),
-            'balance': result.balance,
-        }) for result in results if result.balance != 0]
+        results = session.exec(
+            history_query.execution_options(yield_per=HISTORY_FETCH_SIZE))
+        for result in results:
+            yield BalanceHistoryPoint.model_construct(
+                bucket=result.bucket,
+                change=result.change,
+                balance=result.balance
+            )
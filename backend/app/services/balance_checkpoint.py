@@ -0,0 +1,208 @@
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, Optional
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+
+from app.database.models.balance_checkpoint import BalanceCheckpoint, BalanceCheckpointEntry
+from app.database.models.pairwise_balance import PairwiseBalanceVersion
+from app.database.models.transaction import Transaction
+from app.database.models.transaction_participant import TransactionParticipant
+from app.services.transaction_changes import TransactionChanges, on_transaction_change
+
+
+class BalanceCheckpointService:
+    @staticmethod
+    def get_checkpoint_at(connection: Connection, group_id: UUID) -> Optional[datetime]:
+        return connection.execute(
+            sa.select(BalanceCheckpoint.checkpoint_at).where(
+                BalanceCheckpoint.group_id == group_id)
+        ).scalar_one_or_none()
+
+    @staticmethod
+    def sum_debts_between(
+        connection: Connection,
+        group_id: UUID,
+        after: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> Counter:
+        """Sum what each debtor owes each payer for transactions purchased in (after, until]"""
+        statement = sa.select(
+            Transaction.payer_id,
+            TransactionParticipant.debtor_id,
+            sa.func.sum(TransactionParticipant.amount_owed)
+        ).join(
+            TransactionParticipant,
+            Transaction.id == TransactionParticipant.transaction_id
+        ).where(
+            Transaction.group_id == group_id,
+            TransactionParticipant.debtor_id != Transaction.payer_id
+        ).group_by(
+            Transaction.payer_id,
+            TransactionParticipant.debtor_id
+        )
+
+        if after is not None:
+            statement = statement.where(Transaction.purchased_on > after)
+        if until is not None:
+            statement = statement.where(Transaction.purchased_on <= until)
+
+        return Counter({
+            (payer_id, debtor_id): amount
+            for payer_id, debtor_id, amount in connection.execute(statement)
+        })
+
+    @staticmethod
+    def get_entries(connection: Connection, group_id: UUID) -> Counter:
+        return Counter({
+            (user_a, user_b): amount
+            for user_a, user_b, amount in connection.execute(
+                sa.select(
+                    BalanceCheckpointEntry.user_a,
+                    BalanceCheckpointEntry.user_b,
+                    BalanceCheckpointEntry.net_amount
+                ).where(BalanceCheckpointEntry.group_id == group_id)
+            )
+        })
+
+    @staticmethod
+    def compute_group_balances(connection: Connection, group_id: UUID) -> Counter:
+        """Checkpoint entries plus the debts of transactions purchased after it.
+
+        Keyed by (user_a, user_b), the amount user_b owes user_a.
+        """
+        checkpoint_at = BalanceCheckpointService.get_checkpoint_at(
+            connection, group_id)
+        balances = Counter()
+        if checkpoint_at is not None:
+            balances = BalanceCheckpointService.get_entries(
+                connection, group_id)
+
+        balances.update(BalanceCheckpointService.sum_debts_between(
+            connection, group_id, after=checkpoint_at))
+        return balances
+
+    @staticmethod
+    def lock_groups(connection: Connection, group_ids: Iterable[UUID]) -> None:
+        """Lock the groups' rows in `pairwise_balance_versions` until commit.
+
+        Rolling a checkpoint forward and invalidating it both take this lock
+        before reading the checkpoint, so a backdated write can't land between
+        summing the transactions and storing the new checkpoint. Missing rows
+        are created first since there would be nothing to lock otherwise.
+        """
+        group_ids = sorted(set(group_ids))
+        if not group_ids:
+            return
+
+        table = PairwiseBalanceVersion.__table__
+        rows = [{"group_id": group_id, "version": 0} for group_id in group_ids]
+        dialect = connection.dialect.name
+
+        if dialect in ("postgresql", "sqlite"):
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            connection.execute(insert(table).on_conflict_do_nothing(
+                index_elements=[table.c.group_id]), rows)
+
+        locked = set(connection.execute(
+            sa.select(table.c.group_id).where(
+                table.c.group_id.in_(group_ids)
+            ).order_by(table.c.group_id).with_for_update()
+        ).scalars().all())
+
+        missing = [row for row in rows if row["group_id"] not in locked]
+        if missing:
+            connection.execute(table.insert(), missing)
+
+    @staticmethod
+    def roll_forward(connection: Connection, group_id: UUID, checkpoint_at: datetime) -> bool:
+        """Move the group's checkpoint up to `checkpoint_at`.
+
+        Only the transactions between the old and the new checkpoint are
+        aggregated. Returns False if the checkpoint is already that recent.
+        """
+        BalanceCheckpointService.lock_groups(connection, [group_id])
+
+        # Compared in SQL since SQLite hands back naive datetimes
+        current = connection.execute(
+            sa.select(
+                BalanceCheckpoint.checkpoint_at,
+                (BalanceCheckpoint.checkpoint_at >= checkpoint_at).label("is_current")
+            ).where(BalanceCheckpoint.group_id == group_id)
+        ).first()
+        if current is not None and current.is_current:
+            return False
+        current_at = current.checkpoint_at if current is not None else None
+
+        balances = Counter()
+        if current_at is not None:
+            balances = BalanceCheckpointService.get_entries(
+                connection, group_id)
+        balances.update(BalanceCheckpointService.sum_debts_between(
+            connection, group_id, after=current_at, until=checkpoint_at))
+
+        BalanceCheckpointService.delete(connection, [group_id])
+        connection.execute(sa.insert(BalanceCheckpoint), {
+            "group_id": group_id, "checkpoint_at": checkpoint_at})
+
+        entries = [
+            {"group_id": group_id, "user_a": user_a,
+                "user_b": user_b, "net_amount": amount}
+            for (user_a, user_b), amount in balances.items()
+            if amount != 0
+        ]
+        if entries:
+            connection.execute(sa.insert(BalanceCheckpointEntry), entries)
+
+        return True
+
+    @staticmethod
+    def delete(connection: Connection, group_ids: list[UUID]) -> None:
+        if not group_ids:
+            return
+
+        connection.execute(sa.delete(BalanceCheckpointEntry).where(
+            BalanceCheckpointEntry.group_id.in_(group_ids)))
+        connection.execute(sa.delete(BalanceCheckpoint).where(
+            BalanceCheckpoint.group_id.in_(group_ids)))
+
+    @staticmethod
+    def invalidate(connection: Connection, earliest_changes: dict[UUID, datetime]) -> None:
+        """Drop checkpoints that cover a transaction purchased at or before them"""
+        if not earliest_changes:
+            return
+
+        BalanceCheckpointService.lock_groups(connection, earliest_changes)
+        stale_group_ids = connection.execute(
+            sa.select(BalanceCheckpoint.group_id).where(sa.or_(*(
+                (BalanceCheckpoint.group_id == group_id) &
+                (BalanceCheckpoint.checkpoint_at >= purchased_on)
+                for group_id, purchased_on in earliest_changes.items()
+            )))
+        ).scalars().all()
+
+        BalanceCheckpointService.delete(connection, stale_group_ids)
+
+
+@on_transaction_change
+def _invalidate_checkpoints(connection: Connection, changes: TransactionChanges):
+    earliest_changes: dict[UUID, datetime] = {}
+    for row in (*changes.before, *changes.after):
+        if row.group_id in changes.deleted_group_ids:
+            continue
+        earliest = earliest_changes.get(row.group_id)
+        if earliest is None or row.purchased_on < earliest:
+            earliest_changes[row.group_id] = row.purchased_on
+
+    BalanceCheckpointService.invalidate(connection, earliest_changes)
+    BalanceCheckpointService.delete(connection, list(changes.deleted_group_ids))
+
+    if changes.deleted_user_ids:
+        BalanceCheckpointService.delete(connection, connection.execute(
+            sa.select(BalanceCheckpointEntry.group_id).distinct().where(
+                BalanceCheckpointEntry.user_a.in_(changes.deleted_user_ids) |
+                BalanceCheckpointEntry.user_b.in_(changes.deleted_user_ids))
+        ).scalars().all())
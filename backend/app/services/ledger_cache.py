@@ -0,0 +1,234 @@
+from array import array
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Iterable, Optional, TypeVar
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+
+from app.config import get_settings
+from app.database.models.pairwise_balance import PairwiseBalance, PairwiseBalanceVersion
+
+T = TypeVar("T")
+
+# Rough cost of a member's id, index entry and list slot
+MEMBER_OVERHEAD_BYTES = 160
+# Rough cost of an entry in the set of open pairs
+PAIR_OVERHEAD_BYTES = 64
+
+
+class GroupLedger:
+    """A group's pairwise ledger held in flat arrays indexed by member position.
+
+    `pairs[a * size + b]` is what member b owes member a, `balances[a]` what
+    member a is owed in total minus what they owe. The positions of non-zero
+    pairs are tracked so reads never scan the whole matrix.
+    """
+
+    def __init__(self, version: Optional[int], rows: list[tuple[UUID, UUID, int]]):
+        self.version = version
+        self.member_ids = sorted(GroupLedger.get_member_ids(rows))
+        self.index = {user_id: position for position,
+                      user_id in enumerate(self.member_ids)}
+        self.size = len(self.member_ids)
+        self.pairs = array("q", bytes(8 * self.size * self.size))
+        self.balances = array("q", bytes(8 * self.size))
+        self.open_pairs: set[int] = set()
+        # Bytes counted against the cache budget when stored
+        self.charged = 0
+        self.add(rows)
+
+    @staticmethod
+    def get_member_ids(rows: list[tuple[UUID, UUID, int]]) -> set[UUID]:
+        return {user_a for user_a, _, _ in rows} | {user_b for _, user_b, _ in rows}
+
+    @staticmethod
+    def estimate_nbytes(size: int, pair_count: int) -> int:
+        return (8 * size * size + 8 * size +
+                MEMBER_OVERHEAD_BYTES * size + PAIR_OVERHEAD_BYTES * pair_count)
+
+    @property
+    def nbytes(self) -> int:
+        return GroupLedger.estimate_nbytes(self.size, len(self.open_pairs))
+
+    def add(self, deltas: Iterable[tuple[UUID, UUID, int]]) -> None:
+        for user_a, user_b, amount in deltas:
+            a, b = self.index[user_a], self.index[user_b]
+            position = a * self.size + b
+            self.pairs[position] += amount
+            self.balances[a] += amount
+            self.balances[b] -= amount
+            if self.pairs[position]:
+                self.open_pairs.add(position)
+            else:
+                self.open_pairs.discard(position)
+
+    def counterparties(self, user_id: UUID) -> list[tuple[UUID, int, int]]:
+        """(counterparty, owed by them, owed to them) for every open pair of the user"""
+        position = self.index.get(user_id)
+        if position is None:
+            return []
+
+        row = position * self.size
+        result = []
+        for other, other_id in enumerate(self.member_ids):
+            owed_by = self.pairs[row + other]
+            owed_to = self.pairs[other * self.size + position]
+            if (owed_by or owed_to) and other != position:
+                result.append((other_id, owed_by, owed_to))
+        return result
+
+    def member_balances(self) -> dict[UUID, int]:
+        return {user_id: self.balances[position]
+                for position, user_id in enumerate(self.member_ids)
+                if self.balances[position]}
+
+    def debts(self) -> list[tuple[UUID, UUID, int]]:
+        """Netted (creditor, debtor, amount) for every pair with an open balance"""
+        netted = {}
+        for position in self.open_pairs:
+            a, b = divmod(position, self.size)
+            first, second = min(a, b), max(a, b)
+            if (first, second) not in netted:
+                netted[(first, second)] = self.pairs[first * self.size + second] - \
+                    self.pairs[second * self.size + first]
+
+        result = []
+        for (first, second), amount in sorted(netted.items()):
+            if amount > 0:
+                result.append(
+                    (self.member_ids[first], self.member_ids[second], amount))
+            elif amount < 0:
+                result.append(
+                    (self.member_ids[second], self.member_ids[first], -amount))
+        return result
+
+
+class LedgerCache:
+    """LRU of in-memory group ledgers within a memory budget.
+
+    Every read compares the cached version with the group's row in
+    `pairwise_balance_versions`, so ledgers changed by other processes are
+    reloaded instead of served stale. Writes in this process patch cached
+    ledgers in place when they build upon the cached version.
+    """
+
+    def __init__(self, max_bytes: int = 0):
+        self._lock = Lock()
+        self._ledgers: OrderedDict[UUID, GroupLedger] = OrderedDict()
+        self._nbytes = 0
+        self.max_bytes = max_bytes
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def configure(self, max_bytes: int) -> None:
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._ledgers.clear()
+            self._nbytes = 0
+
+    def __contains__(self, group_id: UUID) -> bool:
+        return group_id in self._ledgers
+
+    def read(self, connection: Connection, group_id: UUID, reader: Callable[[GroupLedger], T]) -> Optional[T]:
+        """Run `reader` on the group's current ledger.
+
+        Returns None if the cache is disabled or the ledger would not fit.
+        """
+        if not self.enabled:
+            return None
+
+        version = connection.execute(
+            sa.select(PairwiseBalanceVersion.version).where(
+                PairwiseBalanceVersion.group_id == group_id)
+        ).scalar_one_or_none()
+
+        with self._lock:
+            ledger = self._ledgers.get(group_id)
+            if ledger is not None and ledger.version == version:
+                self._ledgers.move_to_end(group_id)
+                return reader(ledger)
+
+        # Loaded after reading the version, so the rows are at least that recent
+        rows = connection.execute(
+            sa.select(
+                PairwiseBalance.user_a,
+                PairwiseBalance.user_b,
+                PairwiseBalance.net_amount
+            ).where(
+                PairwiseBalance.group_id == group_id,
+                PairwiseBalance.user_a != PairwiseBalance.user_b,
+                PairwiseBalance.net_amount != 0
+            )
+        ).all()
+
+        # Groups too large for the budget are left to the SQL path
+        if GroupLedger.estimate_nbytes(len(GroupLedger.get_member_ids(rows)), len(rows)) > self.max_bytes:
+            return None
+
+        ledger = GroupLedger(version, rows)
+        with self._lock:
+            self._store(group_id, ledger)
+            return reader(ledger)
+
+    def apply(
+        self,
+        versions: dict[UUID, tuple[Optional[int], int]],
+        deltas: dict[tuple[UUID, UUID, UUID], int],
+        evict: Iterable[UUID] = ()
+    ) -> None:
+        """Patch cached ledgers with the deltas of a write.
+
+        `versions` maps each changed group to its (previous, new) version.
+        Ledgers not at the previous version, or missing a member the deltas
+        touch, are dropped and reloaded on their next read.
+        """
+        if not self.enabled:
+            return
+
+        group_deltas: dict[UUID, list[tuple[UUID, UUID, int]]] = {}
+        for (group_id, user_a, user_b), amount in deltas.items():
+            group_deltas.setdefault(group_id, []).append(
+                (user_a, user_b, amount))
+
+        with self._lock:
+            for group_id in evict:
+                self._remove(group_id)
+
+            for group_id, (previous, version) in versions.items():
+                ledger = self._ledgers.get(group_id)
+                if ledger is None:
+                    continue
+
+                changes = group_deltas.get(group_id, [])
+                if previous is None or ledger.version != previous or any(
+                        user_a not in ledger.index or user_b not in ledger.index
+                        for user_a, user_b, _ in changes):
+                    self._remove(group_id)
+                    continue
+
+                ledger.add(changes)
+                ledger.version = version
+
+    def _store(self, group_id: UUID, ledger: GroupLedger) -> None:
+        self._remove(group_id)
+        ledger.charged = ledger.nbytes
+        if ledger.charged > self.max_bytes:
+            return
+
+        self._ledgers[group_id] = ledger
+        self._nbytes += ledger.charged
+        while self._nbytes > self.max_bytes:
+            _, evicted = self._ledgers.popitem(last=False)
+            self._nbytes -= evicted.charged
+
+    def _remove(self, group_id: UUID) -> None:
+        ledger = self._ledgers.pop(group_id, None)
+        if ledger is not None:
+            self._nbytes -= ledger.charged
+
+
+ledger_cache = LedgerCache(get_settings().BALANCE_CACHE_BYTES)
@@ -0,0 +1,188 @@
+import secrets
+from collections import Counter
+from typing import Iterable, Optional
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Row
+
+from app.database.models.pairwise_balance import PairwiseBalance, PairwiseBalanceVersion
+from app.services.balance_checkpoint import BalanceCheckpointService
+from app.services.ledger_cache import ledger_cache
+from app.services.transaction_changes import TransactionChanges, on_transaction_change
+
+# Key of a ledger row: (group_id, user_a, user_b) where user_b owes user_a
+PairKey = tuple[UUID, UUID, UUID]
+
+
+class PairwiseBalanceService:
+    @staticmethod
+    def sum_debts(rows: Iterable[Row]) -> Counter:
+        """Sum what each debtor owes each payer across transaction snapshot rows"""
+        amounts: Counter = Counter()
+        for row in rows:
+            if row.debtor_id is None or row.debtor_id == row.payer_id:
+                continue
+            amounts[(row.group_id, row.payer_id, row.debtor_id)] += row.amount_owed
+        return amounts
+
+    @staticmethod
+    def apply(connection: Connection, deltas: dict[PairKey, int]) -> None:
+        """Add the given amounts to the ledger, creating rows as needed"""
+        rows = [
+            {"group_id": group_id, "user_a": user_a,
+                "user_b": user_b, "net_amount": amount}
+            for (group_id, user_a, user_b), amount in deltas.items()
+            if amount != 0
+        ]
+        if not rows:
+            return
+
+        table = PairwiseBalance.__table__
+        dialect = connection.dialect.name
+
+        if dialect in ("postgresql", "sqlite"):
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            statement = insert(table)
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.group_id,
+                                table.c.user_a, table.c.user_b],
+                set_={"net_amount": table.c.net_amount +
+                      statement.excluded.net_amount}
+            )
+            connection.execute(statement, rows)
+            return
+
+        for row in rows:
+            result = connection.execute(
+                table.update().where(
+                    table.c.group_id == row["group_id"],
+                    table.c.user_a == row["user_a"],
+                    table.c.user_b == row["user_b"]
+                ).values(net_amount=table.c.net_amount + row["net_amount"])
+            )
+            if result.rowcount == 0:
+                connection.execute(table.insert(), row)
+
+    @staticmethod
+    def bump_versions(connection: Connection, group_ids: Iterable[UUID]) -> dict[UUID, tuple[Optional[int], int]]:
+        """Give each group a fresh ledger version, returning (previous, new) pairs"""
+        group_ids = sorted(set(group_ids))
+        if not group_ids:
+            return {}
+
+        table = PairwiseBalanceVersion.__table__
+        # Locked so the previous version is the one this write builds upon
+        previous = dict(connection.execute(
+            sa.select(table.c.group_id, table.c.version).where(
+                table.c.group_id.in_(group_ids)
+            ).order_by(table.c.group_id).with_for_update()
+        ).all())
+        versions = {group_id: secrets.randbits(63) for group_id in group_ids}
+        rows = [{"group_id": group_id, "version": version}
+                for group_id, version in versions.items()]
+
+        dialect = connection.dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            statement = insert(table)
+            connection.execute(statement.on_conflict_do_update(
+                index_elements=[table.c.group_id],
+                set_={"version": statement.excluded.version}
+            ), rows)
+        else:
+            for row in rows:
+                if row["group_id"] in previous:
+                    connection.execute(table.update().where(
+                        table.c.group_id == row["group_id"]).values(version=row["version"]))
+                else:
+                    connection.execute(table.insert(), row)
+
+        return {group_id: (previous.get(group_id), version) for group_id, version in versions.items()}
+
+    @staticmethod
+    def get_group_ids_for_users(connection: Connection, user_ids: Iterable[UUID]) -> set[UUID]:
+        table = PairwiseBalance.__table__
+        user_ids = list(user_ids)
+        if not user_ids:
+            return set()
+
+        return set(connection.execute(
+            sa.select(table.c.group_id).distinct().where(
+                table.c.user_a.in_(user_ids) | table.c.user_b.in_(user_ids))
+        ).scalars().all())
+
+    @staticmethod
+    def delete_for(
+        connection: Connection,
+        group_ids: Iterable[UUID] = (),
+        user_ids: Iterable[UUID] = ()
+    ) -> None:
+        """Drop ledger rows of deleted groups and users"""
+        table = PairwiseBalance.__table__
+        group_ids, user_ids = list(group_ids), list(user_ids)
+
+        if group_ids:
+            connection.execute(table.delete().where(
+                table.c.group_id.in_(group_ids)))
+        if user_ids:
+            connection.execute(table.delete().where(
+                table.c.user_a.in_(user_ids) | table.c.user_b.in_(user_ids)))
+
+    @staticmethod
+    def get_group(connection: Connection, group_id: UUID) -> Counter:
+        """A group's ledger rows keyed by (user_a, user_b)"""
+        table = PairwiseBalance.__table__
+        return Counter({
+            (user_a, user_b): amount
+            for user_a, user_b, amount in connection.execute(
+                table.select().with_only_columns(
+                    table.c.user_a, table.c.user_b, table.c.net_amount
+                ).where(table.c.group_id == group_id)
+            )
+        })
+
+    @staticmethod
+    def rebuild_group(connection: Connection, group_id: UUID) -> None:
+        """Recompute a group's ledger rows from its checkpoint and later transactions"""
+        PairwiseBalanceService.delete_for(connection, group_ids=[group_id])
+        PairwiseBalanceService.apply(connection, {
+            (group_id, user_a, user_b): amount
+            for (user_a, user_b), amount in BalanceCheckpointService.compute_group_balances(
+                connection, group_id).items()
+        })
+        PairwiseBalanceService.bump_versions(connection, [group_id])
+
+    @staticmethod
+    def deltas(changes: TransactionChanges) -> dict[PairKey, int]:
+        """Ledger changes caused by a write, skipping deleted groups and users"""
+        deltas = PairwiseBalanceService.sum_debts(changes.after)
+        deltas.subtract(PairwiseBalanceService.sum_debts(changes.before))
+        return {
+            (group_id, user_a, user_b): amount
+            for (group_id, user_a, user_b), amount in deltas.items()
+            if amount != 0
+            and group_id not in changes.deleted_group_ids
+            and user_a not in changes.deleted_user_ids
+            and user_b not in changes.deleted_user_ids
+        }
+
+
+@on_transaction_change
+def _update_ledger(connection: Connection, changes: TransactionChanges):
+    deltas = PairwiseBalanceService.deltas(changes)
+    # Rows of deleted users vanish without a delta, so cached copies of
+    # their groups can't be patched
+    reset_group_ids = PairwiseBalanceService.get_group_ids_for_users(
+        connection, changes.deleted_user_ids)
+
+    PairwiseBalanceService.apply(connection, deltas)
+    PairwiseBalanceService.delete_for(
+        connection, changes.deleted_group_ids, changes.deleted_user_ids)
+
+    versions = PairwiseBalanceService.bump_versions(connection, (
+        {group_id for group_id, _, _ in deltas} | reset_group_ids
+    ) - changes.deleted_group_ids)
+    ledger_cache.apply(versions, deltas,
+                       evict=reset_group_ids | changes.deleted_group_ids)
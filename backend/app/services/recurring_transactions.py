@@ -0,0 +1,192 @@
+from calendar import monthrange
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+from typing import Optional
+from uuid import UUID, uuid4
+
+import sqlalchemy as sa
+from sqlmodel import select
+
+from app.database.database import SessionDep
+from app.database.models.recurring_rule import RecurrenceFrequency, RecurringRule, RecurringRuleCreate
+from app.database.models.transaction import Transaction
+from app.database.models.transaction_participant import TransactionParticipant
+from app.database.models.users_groups import UsersGroups
+from app.services.transaction_changes import track_transactions
+
+RECURRING_BATCH_SIZE = 100_000
+
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """SQLite hands timestamps back without a zone, they are stored in UTC"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class RecurringTransactionService:
+    """Expands recurring rules into transactions once their occurrences are due.
+
+    Nothing is inserted ahead of time. The scheduler job and the routers
+    reading balances or listings (through `materialize_visible`) both run
+    `materialize`, which handles every due rule of a batch with a fixed
+    number of statements: one select of the rules with their templates and
+    participants, one insert per table and one update of the rules.
+    """
+
+    @staticmethod
+    def add_months(value: datetime, months: int) -> datetime:
+        month = value.month - 1 + months
+        year = value.year + month // 12
+        month = month % 12 + 1
+        return value.replace(year=year, month=month, day=min(value.day, monthrange(year, month)[1]))
+
+    @staticmethod
+    def get_occurrence(rule, index: int) -> Optional[datetime]:
+        """Purchase time of the rule's index-th occurrence, None past its end"""
+        if rule.count is not None and index >= rule.count:
+            return None
+
+        step = rule.interval * index
+        starts_on = as_utc(rule.starts_on)
+        if rule.frequency == RecurrenceFrequency.DAILY:
+            occurs_on = starts_on + timedelta(days=step)
+        elif rule.frequency == RecurrenceFrequency.WEEKLY:
+            occurs_on = starts_on + timedelta(weeks=step)
+        elif rule.frequency == RecurrenceFrequency.MONTHLY:
+            occurs_on = RecurringTransactionService.add_months(starts_on, step)
+        else:
+            occurs_on = RecurringTransactionService.add_months(starts_on, 12 * step)
+
+        if rule.until is not None and occurs_on > as_utc(rule.until):
+            return None
+        return occurs_on
+
+    @staticmethod
+    def create(session: SessionDep, template: Transaction, data: RecurringRuleCreate) -> RecurringRule:
+        """Attach a rule to the template without committing"""
+        rule = RecurringRule.model_validate(data, update={
+            "template_id": template.id,
+            "group_id": template.group_id,
+            "starts_on": as_utc(template.purchased_on),
+        })
+        rule.until = as_utc(rule.until)
+        rule.next_occurrence = RecurringTransactionService.get_occurrence(rule, 1)
+        session.add(rule)
+        session.flush()
+        return rule
+
+    @staticmethod
+    def materialize(
+        session: SessionDep,
+        now: Optional[datetime] = None,
+        scope: tuple = (),
+        batch_size: int = RECURRING_BATCH_SIZE
+    ) -> int:
+        """Insert the occurrences due by `now` of up to `batch_size` rules without committing.
+
+        `scope` narrows down the rules with extra conditions. Rules that
+        fell behind catch up on every missed occurrence at once. Returns
+        the number of transactions inserted.
+        """
+        now = as_utc(now or datetime.now(timezone.utc))
+        due = (RecurringRule.next_occurrence <= now, *scope)
+        due_ids = select(RecurringRule.id).where(*due).order_by(
+            RecurringRule.next_occurrence, RecurringRule.id).limit(batch_size)
+
+        statement = sa.select(
+            RecurringRule.id,
+            RecurringRule.frequency,
+            RecurringRule.interval,
+            RecurringRule.count,
+            RecurringRule.until,
+            RecurringRule.starts_on,
+            RecurringRule.occurrences,
+            RecurringRule.next_occurrence,
+            Transaction.amount,
+            Transaction.title,
+            Transaction.transaction_type,
+            Transaction.group_id,
+            Transaction.payer_id,
+            TransactionParticipant.debtor_id,
+            TransactionParticipant.amount_owed
+        ).join(
+            Transaction, Transaction.id == RecurringRule.template_id
+        ).outerjoin(
+            TransactionParticipant, TransactionParticipant.transaction_id == Transaction.id
+        ).where(
+            RecurringRule.id.in_(due_ids.scalar_subquery()), *due
+        ).order_by(RecurringRule.id)
+        if session.get_bind().dialect.name == "postgresql":
+            # Rules taken by a concurrent tick or read are left to it
+            statement = statement.with_for_update(
+                of=RecurringRule.__table__, skip_locked=True)
+
+        transaction_rows, participant_rows, rule_rows = [], [], []
+        for _, rows in groupby(session.execute(statement), key=lambda row: row.id):
+            rows = list(rows)
+            rule = rows[0]
+            index, occurs_on = rule.occurrences, as_utc(rule.next_occurrence)
+            while occurs_on is not None and occurs_on <= now:
+                transaction_id = uuid4()
+                transaction_rows.append({
+                    "id": transaction_id,
+                    "amount": rule.amount,
+                    "title": rule.title,
+                    "transaction_type": rule.transaction_type,
+                    "group_id": rule.group_id,
+                    "payer_id": rule.payer_id,
+                    "purchased_on": occurs_on,
+                    "recurring_rule_id": rule.id,
+                    "occurrence": index,
+                })
+                participant_rows.extend({
+                    "id": uuid4(),
+                    "transaction_id": transaction_id,
+                    "debtor_id": row.debtor_id,
+                    "amount_owed": row.amount_owed,
+                } for row in rows if row.debtor_id is not None)
+                index += 1
+                occurs_on = RecurringTransactionService.get_occurrence(rule, index)
+            rule_rows.append({
+                "rule_id": rule.id, "new_occurrences": index, "new_next_occurrence": occurs_on})
+
+        if not transaction_rows:
+            return 0
+
+        # The occurrences are new, so there is nothing to snapshot beforehand
+        with track_transactions(session, [row["id"] for row in transaction_rows], created=True):
+            session.execute(sa.insert(Transaction.__table__), transaction_rows)
+            if participant_rows:
+                session.execute(
+                    sa.insert(TransactionParticipant.__table__), participant_rows)
+
+        table = RecurringRule.__table__
+        session.execute(sa.update(table).where(
+            table.c.id == sa.bindparam("rule_id")
+        ).values(
+            occurrences=sa.bindparam("new_occurrences"),
+            next_occurrence=sa.bindparam("new_next_occurrence")
+        ), rule_rows)
+        return len(transaction_rows)
+
+    @staticmethod
+    def materialize_visible(
+        session: SessionDep,
+        user_id: Optional[UUID] = None,
+        group_id: Optional[UUID] = None
+    ) -> None:
+        """On-demand step of reads, commits the occurrences due in the group or the user's groups.
+
+        A single indexed lookup when nothing is due.
+        """
+        if group_id is not None:
+            scope = (RecurringRule.group_id == group_id,)
+        else:
+            scope = (RecurringRule.group_id.in_(
+                select(UsersGroups.group_id).where(UsersGroups.user_id == user_id)),)
+
+        if RecurringTransactionService.materialize(session, scope=scope):
+            session.commit()
@@ -0,0 +1,106 @@
+import heapq
+from uuid import UUID
+from sqlmodel import select, func, union_all
+
+from app.database.database import SessionDep
+from app.database.models.pairwise_balance import PairwiseBalance
+from app.database.models.settlement import SettlementPlan, SettlementTransfer
+from app.database.models.transaction import Transaction, TransactionType
+from app.database.models.transaction_participant import TransactionParticipant
+
+SETTLEMENT_TITLE = "Settlement"
+
+
+class SettlementService:
+    @staticmethod
+    def get_member_balances(session: SessionDep, group_id: UUID) -> dict[UUID, int]:
+        """Net balance of every member with open debts in the group"""
+        credits = select(
+            PairwiseBalance.user_a.label('user_id'),
+            PairwiseBalance.net_amount.label('amount')
+        ).where(PairwiseBalance.group_id == group_id)
+        debts = select(
+            PairwiseBalance.user_b.label('user_id'),
+            (-PairwiseBalance.net_amount).label('amount')
+        ).where(PairwiseBalance.group_id == group_id)
+        entries = union_all(credits, debts).subquery()
+
+        balance_query = select(
+            entries.c.user_id,
+            func.sum(entries.c.amount).label('balance')
+        ).group_by(entries.c.user_id)
+
+        return {
+            user_id: balance
+            for user_id, balance in session.exec(balance_query).all()
+            if balance
+        }
+
+    @staticmethod
+    def plan_transfers(balances: dict[UUID, int]) -> list[SettlementTransfer]:
+        """Greedily match the largest creditor with the largest debtor.
+
+        Every step settles at least one member, so the plan has at most n - 1
+        transfers and runs in O(n log n).
+        """
+        # Heap entries carry list indexes so ties never compare UUIDs
+        user_ids = list(balances)
+        creditors = [(-balances[user_id], index)
+                     for index, user_id in enumerate(user_ids) if balances[user_id] > 0]
+        debtors = [(balances[user_id], index)
+                   for index, user_id in enumerate(user_ids) if balances[user_id] < 0]
+        heapq.heapify(creditors)
+        heapq.heapify(debtors)
+
+        transfers = []
+        while creditors and debtors:
+            credit, creditor = heapq.heappop(creditors)
+            debt, debtor = heapq.heappop(debtors)
+            amount = min(-credit, -debt)
+            transfers.append((debtor, creditor, amount))
+
+            if -credit > amount:
+                heapq.heappush(creditors, (credit + amount, creditor))
+            if -debt > amount:
+                heapq.heappush(debtors, (debt + amount, debtor))
+
+        return [
+            SettlementTransfer.model_construct(
+                from_user_id=user_ids[debtor],
+                to_user_id=user_ids[creditor],
+                amount=amount
+            )
+            for debtor, creditor, amount in transfers
+        ]
+
+    @staticmethod
+    def create_plan(session: SessionDep, group_id: UUID) -> SettlementPlan:
+        balances = SettlementService.get_member_balances(session, group_id)
+        return SettlementPlan(
+            group_id=group_id,
+            transfers=SettlementService.plan_transfers(balances)
+        )
+
+    @staticmethod
+    def record_plan(session: SessionDep, plan: SettlementPlan) -> list[Transaction]:
+        """Add one settlement transaction per transfer without committing.
+
+        The paying member is recorded as payer and the receiving member as the
+        only participant, which cancels out the debt between them.
+        """
+        transactions = [
+            Transaction(
+                amount=transfer.amount,
+                title=SETTLEMENT_TITLE,
+                transaction_type=TransactionType.AMOUNT,
+                group_id=plan.group_id,
+                payer_id=transfer.from_user_id,
+                participants=[TransactionParticipant(
+                    debtor_id=transfer.to_user_id,
+                    amount_owed=transfer.amount
+                )]
+            )
+            for transfer in plan.transfers
+        ]
+        session.add_all(transactions)
+        return transactions
@@ -0,0 +1,249 @@
+from typing import Optional
+from uuid import UUID
+
+import sqlalchemy as sa
+from fastapi import HTTPException, status
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Connection
+from sqlmodel import Session, select
+
+from app.database.database import SessionDep
+from app.database.models.group import Group, GroupCompactResponse
+from app.database.models.sync_change import (
+    SyncChange, SyncChanges, SyncEntity, SyncMembership, SyncTombstone
+)
+from app.database.models.transaction import Transaction, TransactionCompactRead
+from app.database.models.user import User, UserCompactResponse
+from app.database.models.users_groups import UsersGroups
+from app.services.transaction_changes import TransactionChanges, on_transaction_change
+from app.services.transaction_loading import TransactionLoading
+
+SYNC_MAX_CHANGES = 1000
+_PENDING_KEY = "sync_changes_pending"
+
+# (group_id, entity, entity_id) -> deleted
+ChangeKey = tuple[UUID, SyncEntity, UUID]
+
+
+class SyncChangeService:
+    @staticmethod
+    def record(connection: Connection, changes: dict[ChangeKey, bool]) -> None:
+        if not changes:
+            return
+
+        # Postgres transaction ids are 64 bit and never wrap around. Other
+        # databases serialize writers, so the sequence alone is in commit order
+        xid = sa.literal(0, sa.BigInteger)
+        if connection.dialect.name == "postgresql":
+            xid = sa.cast(sa.cast(sa.func.pg_current_xact_id(),
+                          sa.Text), sa.BigInteger)
+
+        connection.execute(sa.insert(SyncChange).values(xid=xid), [
+            {"group_id": group_id, "entity": entity,
+                "entity_id": entity_id, "deleted": deleted}
+            for (group_id, entity, entity_id), deleted in changes.items()
+        ])
+
+    @staticmethod
+    def encode_cursor(xid: int, seq: int) -> str:
+        return f"{xid}.{seq}"
+
+    @staticmethod
+    def decode_cursor(cursor: Optional[str]) -> tuple[int, int]:
+        if cursor is None:
+            return -1, -1
+        try:
+            xid, seq = cursor.split(".")
+            return int(xid), int(seq)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    @staticmethod
+    def get_head(session: SessionDep) -> Optional[tuple[int, int]]:
+        """Key of the newest entry whose writer has surely finished.
+
+        On Postgres entries of transactions at or after the snapshot's xmin
+        may still be joined by earlier sequence numbers, so they wait for a
+        later sync.
+        """
+        statement = sa.select(SyncChange.xid, SyncChange.seq).order_by(
+            SyncChange.xid.desc(), SyncChange.seq.desc()).limit(1)
+        if session.get_bind().dialect.name == "postgresql":
+            xmin = sa.cast(sa.cast(sa.func.pg_snapshot_xmin(
+                sa.func.pg_current_snapshot()), sa.Text), sa.BigInteger)
+            statement = statement.where(SyncChange.xid < xmin)
+
+        head = session.exec(statement).first()
+        return tuple(head) if head is not None else None
+
+    @staticmethod
+    def get_changes(session: SessionDep, user: User, cursor: Optional[str], limit: int) -> SyncChanges:
+        """Changes of the user's groups and memberships after `cursor`"""
+        after = SyncChangeService.decode_cursor(cursor)
+        head = SyncChangeService.get_head(session)
+        if head is None or head <= after:
+            return SyncChanges(cursor=SyncChangeService.encode_cursor(*after), has_more=False)
+
+        key = sa.tuple_(SyncChange.xid, SyncChange.seq)
+        entries = session.exec(select(SyncChange).where(
+            key > sa.tuple_(*after),
+            key <= sa.tuple_(*head),
+            sa.or_(
+                SyncChange.group_id.in_(select(UsersGroups.group_id).where(
+                    UsersGroups.user_id == user.id)),
+                (SyncChange.entity == SyncEntity.MEMBERSHIP) &
+                (SyncChange.entity_id == user.id)
+            )
+        ).order_by(SyncChange.xid, SyncChange.seq).limit(limit + 1)).all()
+
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+        next_cursor = (entries[-1].xid,
+                       entries[-1].seq) if has_more else head
+
+        # Only the last entry per entity matters, its current state is sent
+        latest: dict[ChangeKey, bool] = {}
+        for entry in entries:
+            latest[(entry.group_id, entry.entity, entry.entity_id)] = entry.deleted
+
+        changes = SyncChangeService.load(session, latest)
+        changes.cursor = SyncChangeService.encode_cursor(*next_cursor)
+        changes.has_more = has_more
+        return changes
+
+    @staticmethod
+    def load(session: SessionDep, latest: dict[ChangeKey, bool]) -> SyncChanges:
+        def changed(entity: SyncEntity) -> list[tuple[UUID, UUID]]:
+            return [(group_id, entity_id) for (group_id, kind, entity_id), deleted in latest.items()
+                    if kind == entity and not deleted]
+
+        tombstones = [
+            SyncTombstone(entity=entity, id=entity_id, group_id=group_id)
+            for (group_id, entity, entity_id), deleted in latest.items() if deleted
+        ]
+
+        # Entities missing here were deleted later and get their tombstone
+        # in a later page
+        transactions = []
+        transaction_ids = [entity_id for _,
+                           entity_id in changed(SyncEntity.TRANSACTION)]
+        if transaction_ids:
+            transactions = session.exec(select(Transaction).where(
+                Transaction.id.in_(transaction_ids)
+            ).options(*TransactionLoading.compact_options())).all()
+
+        groups = []
+        group_ids = [entity_id for _, entity_id in changed(SyncEntity.GROUP)]
+        if group_ids:
+            groups = [GroupCompactResponse(id=group_id, name=name) for group_id, name in session.exec(
+                select(Group.id, Group.name).where(Group.id.in_(group_ids)))]
+
+        memberships = []
+        membership_keys = changed(SyncEntity.MEMBERSHIP)
+        if membership_keys:
+            memberships = [SyncMembership(group_id=group_id, user_id=user_id)
+                           for group_id, user_id in session.exec(
+                               select(UsersGroups.group_id, UsersGroups.user_id).where(
+                                   sa.tuple_(UsersGroups.group_id, UsersGroups.user_id).in_(membership_keys)))]
+
+        user_ids = {membership.user_id for membership in memberships} | {
+            transaction.payer_id for transaction in transactions} | {
+            participant.debtor_id for transaction in transactions
+            for participant in transaction.participants}
+        users = {}
+        if user_ids:
+            users = {user_id: UserCompactResponse(id=user_id, username=username)
+                     for user_id, username in session.exec(
+                         select(User.id, User.username).where(User.id.in_(user_ids)))}
+
+        return SyncChanges(
+            cursor="",
+            has_more=False,
+            groups=groups,
+            memberships=memberships,
+            transactions=[TransactionCompactRead.model_validate(
+                transaction) for transaction in transactions],
+            users=users,
+            tombstones=tombstones
+        )
+
+
+@on_transaction_change
+def _record_transaction_changes(connection: Connection, changes: TransactionChanges):
+    before = {row.transaction_id: row.group_id for row in changes.before}
+    after = {row.transaction_id: row.group_id for row in changes.after}
+
+    entries: dict[ChangeKey, bool] = {}
+    for transaction_id in changes.transaction_ids:
+        previous, current = before.get(transaction_id), after.get(transaction_id)
+        # Transactions of deleted groups go with the group's tombstone
+        if previous is not None and previous != current and previous not in changes.deleted_group_ids:
+            entries[(previous, SyncEntity.TRANSACTION, transaction_id)] = True
+        if current is not None:
+            entries[(current, SyncEntity.TRANSACTION, transaction_id)] = False
+
+    SyncChangeService.record(connection, entries)
+
+
+def _collection_changes(obj, attribute: str) -> tuple[list, list]:
+    history = getattr(inspect(obj).attrs, attribute).history
+    return list(history.added or ()), list(history.deleted or ())
+
+
+@event.listens_for(Session, "before_flush")
+def _capture_group_changes(session: Session, flush_context, instances):
+    session.info.pop(_PENDING_KEY, None)
+    entries: dict[ChangeKey, bool] = {}
+
+    def membership(group_id: UUID, user_id: UUID, deleted: bool):
+        entries[(group_id, SyncEntity.MEMBERSHIP, user_id)] = deleted
+
+    for obj in (*session.new, *session.dirty):
+        if isinstance(obj, Group):
+            if obj in session.new or inspect(obj).attrs.name.history.has_changes():
+                entries[(obj.id, SyncEntity.GROUP, obj.id)] = False
+            added, removed = _collection_changes(obj, "users")
+            for user in added:
+                membership(obj.id, user.id, False)
+            for user in removed:
+                membership(obj.id, user.id, True)
+        elif isinstance(obj, User):
+            added, removed = _collection_changes(obj, "groups")
+            for group in added:
+                membership(group.id, obj.id, False)
+            for group in removed:
+                membership(group.id, obj.id, True)
+        elif isinstance(obj, UsersGroups) and obj in session.new:
+            membership(obj.group_id, obj.user_id, False)
+
+    deleted_group_ids = [
+        obj.id for obj in session.deleted if isinstance(obj, Group)]
+    deleted_user_ids = [
+        obj.id for obj in session.deleted if isinstance(obj, User)]
+    for obj in session.deleted:
+        if isinstance(obj, UsersGroups):
+            membership(obj.group_id, obj.user_id, True)
+    for group_id in deleted_group_ids:
+        entries[(group_id, SyncEntity.GROUP, group_id)] = True
+
+    # Members of deleted groups and groups of deleted users learn about it
+    # through their membership, which they can still see
+    if deleted_group_ids or deleted_user_ids:
+        with session.no_autoflush:
+            for group_id, user_id in session.connection().execute(
+                sa.select(UsersGroups.group_id, UsersGroups.user_id).where(
+                    UsersGroups.group_id.in_(deleted_group_ids) |
+                    UsersGroups.user_id.in_(deleted_user_ids))
+            ):
+                membership(group_id, user_id, True)
+
+    if entries:
+        session.info[_PENDING_KEY] = entries
+
+
+@event.listens_for(Session, "after_flush")
+def _record_group_changes(session: Session, flush_context):
+    entries = session.info.pop(_PENDING_KEY, None)
+    if entries:
+        SyncChangeService.record(session.connection(), entries)
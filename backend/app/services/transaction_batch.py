@@ -0,0 +1,164 @@
+from typing import Optional
+from uuid import UUID, uuid4
+
+import sqlalchemy as sa
+from sqlmodel import select
+
+from app.database.database import SessionDep
+from app.database.models.group import Group
+from app.database.models.transaction import Transaction, TransactionCreate
+from app.database.models.transaction_batch import BatchOperation, TransactionBatchItem, TransactionBatchResult
+from app.database.models.transaction_participant import TransactionParticipant
+from app.database.models.user import User
+from app.database.models.users_groups import UsersGroups
+from app.services.transaction_changes import track_transactions
+from app.services.transaction_create import TransactionCreateService
+from app.services.transaction_loading import TransactionLoading
+from app.services.transaction_split import TransactionSplitService
+from app.services.transaction_update import TransactionUpdateService
+
+BATCH_MAX_ITEMS = 1000
+
+
+class TransactionBatchService:
+    @staticmethod
+    def apply(session: SessionDep, user: User, items: list[TransactionBatchItem]) -> list[TransactionBatchResult]:
+        """Apply queued creates, updates and deletes without committing.
+
+        Items are applied in order and fail one by one with the status the
+        single-item endpoints would have returned. Updates and deletes of
+        transactions created earlier in the batch are folded into the rows
+        before they are bulk inserted.
+        """
+        referenced_ids = {
+            item.create.id if item.operation == BatchOperation.CREATE else item.transaction_id
+            for item in items
+        }
+        existing = {
+            transaction.id: transaction for transaction in session.exec(
+                select(Transaction).where(Transaction.id.in_(referenced_ids)).options(
+                    *TransactionLoading.delete_options())).all()
+        }
+
+        group_ids = {
+            item.create.group_id for item in items if item.operation == BatchOperation.CREATE}
+        known_group_ids = set(session.exec(
+            select(Group.id).where(Group.id.in_(group_ids))).all())
+        member_group_ids = set(session.exec(select(UsersGroups.group_id).where(
+            UsersGroups.user_id == user.id,
+            UsersGroups.group_id.in_(group_ids)
+        )).all())
+
+        user_ids = {
+            user_id for item in items if item.operation == BatchOperation.CREATE
+            for user_id in TransactionBatchService.get_user_ids(item.create)
+        } | {
+            participant.debtor_id for item in items
+            if item.operation == BatchOperation.UPDATE and item.update.participants
+            for participant in item.update.participants
+        }
+        known_user_ids = set(session.exec(
+            select(User.id).where(User.id.in_(user_ids))).all())
+
+        # Transaction id -> (transaction row, participant rows) to insert
+        created: dict[UUID, tuple[dict, list[dict]]] = {}
+        results = []
+
+        for index, item in enumerate(items):
+            def result(status_code: int, transaction_id: UUID, detail: Optional[str] = None):
+                results.append(TransactionBatchResult(
+                    index=index,
+                    operation=item.operation,
+                    status_code=status_code,
+                    transaction_id=transaction_id,
+                    detail=detail
+                ))
+
+            if item.operation == BatchOperation.CREATE:
+                data = item.create
+                try:
+                    TransactionSplitService.apply(data)
+                except ValueError as error:
+                    result(422, data.id, str(error))
+                    continue
+
+                if data.id in existing or data.id in created:
+                    result(409, data.id, "Transaction already exists")
+                elif data.group_id not in known_group_ids:
+                    result(404, data.id, "Group not found")
+                elif data.group_id not in member_group_ids:
+                    result(403, data.id,
+                           "User does not have permission to create a transaction in this group")
+                elif not TransactionBatchService.get_user_ids(data) <= known_user_ids:
+                    result(404, data.id, "User not found")
+                else:
+                    created[data.id] = TransactionCreateService.to_rows(data)
+                    result(201, data.id)
+                continue
+
+            transaction_id = item.transaction_id
+            pending = created.get(transaction_id)
+            transaction = existing.get(transaction_id)
+            if pending is None and transaction is None:
+                result(404, transaction_id, "Transaction not found")
+                continue
+
+            payer_id = pending[0]["payer_id"] if pending else transaction.payer_id
+            if payer_id != user.id:
+                result(403, transaction_id,
+                       f"Only the payer can {item.operation.value} the transaction")
+                continue
+
+            if item.operation == BatchOperation.UPDATE:
+                try:
+                    amount, transaction_type = (pending[0]["amount"], pending[0]["transaction_type"]) \
+                        if pending else (transaction.amount, transaction.transaction_type)
+                    participants = TransactionUpdateService.get_participants(
+                        item.update, amount, transaction_type)
+                except ValueError as error:
+                    result(422, transaction_id, str(error))
+                    continue
+                if participants and not {
+                        participant.debtor_id for participant in participants} <= known_user_ids:
+                    result(404, transaction_id, "User not found")
+                    continue
+
+                if pending:
+                    pending[0].update(item.update.model_dump(
+                        exclude_unset=True, exclude={"participants"}))
+                    if pending[0].get("purchased_on") is None:
+                        pending[0].pop("purchased_on", None)
+                    if participants is not None:
+                        created[transaction_id] = (pending[0], [{
+                            "id": uuid4(),
+                            "transaction_id": transaction_id,
+                            "debtor_id": participant.debtor_id,
+                            "amount_owed": participant.amount_owed,
+                        } for participant in participants])
+                else:
+                    TransactionUpdateService.apply(
+                        session, transaction, item.update, participants)
+                result(200, transaction_id)
+            else:
+                if pending:
+                    del created[transaction_id]
+                else:
+                    session.delete(transaction)
+                    del existing[transaction_id]
+                result(204, transaction_id)
+
+        if created:
+            with track_transactions(session, created):
+                session.execute(sa.insert(Transaction), [
+                    row for row, _ in created.values()])
+                participant_rows = [
+                    row for _, rows in created.values() for row in rows]
+                if participant_rows:
+                    session.execute(
+                        sa.insert(TransactionParticipant), participant_rows)
+
+        return results
+
+    @staticmethod
+    def get_user_ids(data: TransactionCreate) -> set[UUID]:
+        return {data.payer_id} | {participant.debtor_id for participant in data.participants}
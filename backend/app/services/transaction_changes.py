@@ -0,0 +1,161 @@
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Connection, Row
+from sqlalchemy.orm.base import NO_VALUE
+from sqlmodel import Session
+
+from app.database.models.group import Group
+from app.database.models.transaction import Transaction
+from app.database.models.transaction_participant import TransactionParticipant
+from app.database.models.user import User
+
+SNAPSHOT_CHUNK_SIZE = 500
+_PENDING_KEY = "transaction_changes_pending"
+_TRACKED_KEY = "transaction_changes_tracked"
+
+
+class TransactionChanges:
+    """State of the transactions touched by a write, before and after it.
+
+    `before` and `after` hold one row per participant (or a single row with
+    empty participant columns for transactions without participants).
+    """
+
+    def __init__(
+        self,
+        transaction_ids: set[UUID],
+        before: list[Row],
+        after: list[Row],
+        deleted_group_ids: set[UUID],
+        deleted_user_ids: set[UUID]
+    ):
+        self.transaction_ids = transaction_ids
+        self.before = before
+        self.after = after
+        self.deleted_group_ids = deleted_group_ids
+        self.deleted_user_ids = deleted_user_ids
+
+
+TransactionChangeHandler = Callable[[Connection, TransactionChanges], None]
+_handlers: list[TransactionChangeHandler] = []
+
+
+def on_transaction_change(handler: TransactionChangeHandler) -> TransactionChangeHandler:
+    """Register a handler run inside the database transaction of every write"""
+    _handlers.append(handler)
+    return handler
+
+
+def snapshot(connection: Connection, transaction_ids: Iterable[UUID]) -> list[Row]:
+    """Load the current state of the given transactions and their participants"""
+    transaction_ids = list(transaction_ids)
+    rows = []
+
+    for start in range(0, len(transaction_ids), SNAPSHOT_CHUNK_SIZE):
+        chunk = transaction_ids[start:start + SNAPSHOT_CHUNK_SIZE]
+        statement = sa.select(
+            Transaction.id.label("transaction_id"),
+            Transaction.group_id,
+            Transaction.payer_id,
+            Transaction.amount,
+            Transaction.purchased_on,
+            TransactionParticipant.id.label("participant_id"),
+            TransactionParticipant.debtor_id,
+            TransactionParticipant.amount_owed
+        ).outerjoin(
+            TransactionParticipant,
+            Transaction.id == TransactionParticipant.transaction_id
+        ).where(Transaction.id.in_(chunk))
+        rows.extend(connection.execute(statement).all())
+
+    return rows
+
+
+def dispatch(connection: Connection, changes: TransactionChanges) -> None:
+    for handler in _handlers:
+        handler(connection, changes)
+
+
+@contextmanager
+def track_transactions(session: Session, transaction_ids: Iterable[UUID], created: bool = False) -> Iterator[None]:
+    """Run the change handlers for writes that bypass the ORM unit of work.
+
+    Bulk statements executed inside the block are not seen by the flush
+    listeners, so the given transactions are snapshotted around the block
+    instead and excluded from the flush listeners meanwhile. With `created`
+    the transactions are known not to exist yet and the snapshot before
+    the block is skipped.
+    """
+    transaction_ids = set(transaction_ids)
+    session.flush()
+    connection = session.connection()
+
+    tracked = session.info.setdefault(_TRACKED_KEY, set())
+    tracked.update(transaction_ids)
+    try:
+        before = [] if created else snapshot(connection, transaction_ids)
+        yield
+        session.flush()
+        after = snapshot(connection, transaction_ids)
+    finally:
+        tracked.difference_update(transaction_ids)
+
+    dispatch(connection, TransactionChanges(
+        transaction_ids, before, after, set(), set()))
+
+
+def _touched_transaction_ids(session: Session) -> set[UUID]:
+    transaction_ids: set[UUID] = set()
+
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Transaction):
+            transaction_ids.add(obj.id)
+        elif isinstance(obj, TransactionParticipant):
+            state = inspect(obj)
+            # Covers both the current and a previous transaction_id
+            transaction_ids.update(state.attrs.transaction_id.history.sum())
+            transaction = state.attrs.transaction.loaded_value
+            if transaction is not NO_VALUE and transaction is not None:
+                transaction_ids.add(transaction.id)
+
+    transaction_ids.discard(None)
+    transaction_ids.difference_update(session.info.get(_TRACKED_KEY, ()))
+    return transaction_ids
+
+
+@event.listens_for(Session, "before_flush")
+def _capture_before_flush(session: Session, flush_context, instances):
+    session.info.pop(_PENDING_KEY, None)
+
+    transaction_ids = _touched_transaction_ids(session)
+    deleted_group_ids = {
+        obj.id for obj in session.deleted if isinstance(obj, Group)}
+    deleted_user_ids = {
+        obj.id for obj in session.deleted if isinstance(obj, User)}
+
+    if not transaction_ids and not deleted_group_ids and not deleted_user_ids:
+        return
+
+    with session.no_autoflush:
+        before = snapshot(session.connection(), transaction_ids)
+
+    session.info[_PENDING_KEY] = (
+        transaction_ids, before, deleted_group_ids, deleted_user_ids)
+
+
+@event.listens_for(Session, "after_flush")
+def _dispatch_after_flush(session: Session, flush_context):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending is None:
+        return
+
+    transaction_ids, before, deleted_group_ids, deleted_user_ids = pending
+    connection = session.connection()
+    after = snapshot(connection, transaction_ids)
+
+    dispatch(connection, TransactionChanges(
+        transaction_ids, before, after, deleted_group_ids, deleted_user_ids))
@@ -0,0 +1,88 @@
+import hashlib
+import json
+from uuid import uuid4
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from app.database.database import SessionDep
+from app.database.models.transaction import Transaction, TransactionCreate
+from app.database.models.transaction_participant import TransactionParticipant
+from app.services.transaction_changes import track_transactions
+
+
+class TransactionCreateService:
+    @staticmethod
+    def hash_payload(data: TransactionCreate) -> str:
+        """Digest of everything a create says about the transaction but its id.
+
+        Participant order doesn't change the transaction, so it doesn't
+        change the digest either. Neither do split weights and percentages
+        once TransactionSplitService turned them into amounts.
+        """
+        payload = data.model_dump(mode="json", exclude={
+            "id": True, "created_at": True, "updated_at": True,
+            "participants": {"__all__": {"weight", "percentage"}}})
+        payload["participants"] = sorted(
+            payload["participants"], key=lambda participant: (participant["debtor_id"], participant["amount_owed"]))
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    @staticmethod
+    def to_rows(data: TransactionCreate) -> tuple[dict, list[dict]]:
+        row = {
+            "id": data.id,
+            "amount": data.amount,
+            "title": data.title,
+            "transaction_type": data.transaction_type,
+            "group_id": data.group_id,
+            "payer_id": data.payer_id,
+            "payload_hash": TransactionCreateService.hash_payload(data),
+        }
+        # Left out so the server default applies
+        if data.purchased_on is not None:
+            row["purchased_on"] = data.purchased_on
+
+        return row, [{
+            "id": uuid4(),
+            "transaction_id": data.id,
+            "debtor_id": participant.debtor_id,
+            "amount_owed": participant.amount_owed,
+        } for participant in data.participants]
+
+    @staticmethod
+    def insert(session: SessionDep, data: TransactionCreate) -> bool:
+        """Insert the transaction unless its id is taken, True if it was inserted.
+
+        The id is claimed with INSERT ... ON CONFLICT DO NOTHING where
+        available, so a retried create needs no read before the write.
+        """
+        row, participant_rows = TransactionCreateService.to_rows(data)
+        table = Transaction.__table__
+        dialect = session.get_bind().dialect.name
+
+        with track_transactions(session, [data.id]):
+            if dialect in ("postgresql", "sqlite"):
+                insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+                inserted = session.execute(insert(table).on_conflict_do_nothing(
+                    index_elements=[table.c.id]), row).rowcount == 1
+            else:
+                try:
+                    with session.begin_nested():
+                        session.execute(sa.insert(table), row)
+                    inserted = True
+                except IntegrityError:
+                    inserted = False
+
+            if inserted and participant_rows:
+                session.execute(sa.insert(TransactionParticipant), participant_rows)
+
+        return inserted
+
+    @staticmethod
+    def is_replay(session: SessionDep, data: TransactionCreate) -> bool:
+        """Whether the stored transaction with the create's id came from the same payload"""
+        stored = session.execute(sa.select(Transaction.payer_id, Transaction.payload_hash).where(
+            Transaction.id == data.id)).first()
+        return stored is not None and stored.payer_id == data.payer_id and \
+            stored.payload_hash == TransactionCreateService.hash_payload(data)
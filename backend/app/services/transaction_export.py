@@ -0,0 +1,123 @@
+import csv
+import io
+import json
+from itertools import groupby
+from typing import Iterable, Iterator
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import aliased
+
+from app.database.database import SessionDep
+from app.database.models.transaction import Transaction, TransactionExportFormat
+from app.database.models.transaction_participant import TransactionParticipant
+from app.database.models.user import User
+
+EXPORT_FETCH_SIZE = 1000
+
+CSV_COLUMNS = [
+    "transaction_id", "title", "amount", "transaction_type", "purchased_on", "created_at",
+    "payer_id", "payer_username", "debtor_id", "debtor_username", "amount_owed",
+]
+
+MEDIA_TYPES = {
+    TransactionExportFormat.CSV: "text/csv",
+    TransactionExportFormat.NDJSON: "application/x-ndjson",
+}
+
+
+class TransactionExportService:
+    """Streams a group's transactions as CSV or NDJSON.
+
+    Rows are fetched `EXPORT_FETCH_SIZE` at a time (a server-side cursor on
+    Postgres) and written out batch by batch, so memory stays flat however
+    large the group is and the first bytes go out right away.
+    """
+
+    @staticmethod
+    def get_rows(session: SessionDep, group_id: UUID) -> Iterator[Row]:
+        """One row per participant, consecutive per transaction, oldest purchase first"""
+        payer = aliased(User)
+        debtor = aliased(User)
+        statement = sa.select(
+            Transaction.id.label("transaction_id"),
+            Transaction.title,
+            Transaction.amount,
+            Transaction.transaction_type,
+            Transaction.purchased_on,
+            Transaction.created_at,
+            Transaction.payer_id,
+            payer.username.label("payer_username"),
+            TransactionParticipant.debtor_id,
+            debtor.username.label("debtor_username"),
+            TransactionParticipant.amount_owed
+        ).join(
+            payer, payer.id == Transaction.payer_id
+        ).outerjoin(
+            TransactionParticipant, TransactionParticipant.transaction_id == Transaction.id
+        ).outerjoin(
+            debtor, debtor.id == TransactionParticipant.debtor_id
+        ).where(
+            Transaction.group_id == group_id
+        ).order_by(
+            Transaction.purchased_on, Transaction.created_at, Transaction.id
+        ).execution_options(yield_per=EXPORT_FETCH_SIZE)
+
+        yield from session.execute(statement)
+
+    @staticmethod
+    def write_csv(rows: Iterable[Row]) -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_COLUMNS)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+        for index, row in enumerate(rows, 1):
+            writer.writerow([
+                row.transaction_id, row.title, row.amount, row.transaction_type.value,
+                row.purchased_on.isoformat(), row.created_at.isoformat(),
+                row.payer_id, row.payer_username,
+                row.debtor_id or "", row.debtor_username or "",
+                "" if row.amount_owed is None else row.amount_owed,
+            ])
+            if index % EXPORT_FETCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        yield buffer.getvalue()
+
+    @staticmethod
+    def write_ndjson(rows: Iterable[Row]) -> Iterator[str]:
+        lines = []
+        for transaction_id, participant_rows in groupby(rows, key=lambda row: row.transaction_id):
+            participant_rows = list(participant_rows)
+            first = participant_rows[0]
+            lines.append(json.dumps({
+                "id": str(transaction_id),
+                "title": first.title,
+                "amount": first.amount,
+                "transaction_type": first.transaction_type.value,
+                "purchased_on": first.purchased_on.isoformat(),
+                "created_at": first.created_at.isoformat(),
+                "payer": {"id": str(first.payer_id), "username": first.payer_username},
+                "participants": [{
+                    "debtor": {"id": str(row.debtor_id), "username": row.debtor_username},
+                    "amount_owed": row.amount_owed,
+                } for row in participant_rows if row.debtor_id is not None],
+            }) + "\n")
+            if len(lines) == EXPORT_FETCH_SIZE:
+                yield "".join(lines)
+                lines.clear()
+
+        yield "".join(lines)
+
+    @staticmethod
+    def export(session: SessionDep, group_id: UUID, export_format: TransactionExportFormat) -> Iterator[str]:
+        rows = TransactionExportService.get_rows(session, group_id)
+        if export_format == TransactionExportFormat.CSV:
+            return TransactionExportService.write_csv(rows)
+        return TransactionExportService.write_ndjson(rows)
@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import Optional
+
+import sqlalchemy as sa
+from sqlmodel.sql.expression import SelectOfScalar
+
+from app.database.database import SessionDep
+from app.database.models.transaction import Transaction, TransactionFilter
+from app.services.transaction_pagination import TransactionPagination
+
+
+class TransactionFiltering:
+    @staticmethod
+    def purchased_between(session: SessionDep, lower: Optional[datetime], upper: Optional[datetime]) -> list:
+        """Conditions selecting purchases in [lower, upper), either bound optional"""
+        def bound(value: datetime):
+            return TransactionPagination.normalize_timestamp(
+                session, sa.literal(value, sa.DateTime(timezone=True)))
+
+        purchased_on = TransactionPagination.normalize_timestamp(
+            session, Transaction.purchased_on)
+        conditions = []
+        if lower is not None:
+            conditions.append(purchased_on >= bound(lower))
+        if upper is not None:
+            conditions.append(purchased_on < bound(upper))
+        return conditions
+
+    @staticmethod
+    def apply(session: SessionDep, statement: SelectOfScalar[Transaction], filters: TransactionFilter) -> SelectOfScalar[Transaction]:
+        conditions = TransactionFiltering.purchased_between(
+            session, filters.purchased_from, filters.purchased_to)
+        if filters.payer_id is not None:
+            conditions.append(Transaction.payer_id == filters.payer_id)
+        if filters.min_amount is not None:
+            conditions.append(Transaction.amount >= filters.min_amount)
+        if filters.max_amount is not None:
+            conditions.append(Transaction.amount <= filters.max_amount)
+        return statement.where(*conditions)
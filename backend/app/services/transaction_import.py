@@ -0,0 +1,209 @@
+import csv
+import io
+from datetime import datetime, timezone
+from itertools import groupby
+from typing import BinaryIO, Iterator
+from uuid import UUID
+
+import sqlalchemy as sa
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy.engine import Connection
+from sqlmodel import select
+
+from app.database.database import SessionDep
+from app.database.models.transaction import Transaction, TransactionCreate
+from app.database.models.transaction_import import TransactionImportError, TransactionImportResult
+from app.database.models.transaction_participant import TransactionParticipant
+from app.database.models.user import User
+from app.database.models.users_groups import UsersGroups
+from app.services.transaction_batch import TransactionBatchService
+from app.services.transaction_changes import track_transactions
+from app.services.transaction_create import TransactionCreateService
+from app.services.transaction_split import TransactionSplitService
+
+IMPORT_BATCH_SIZE = 2000
+IMPORT_MAX_ERRORS = 1000
+
+
+class TransactionImportService:
+    """Imports transactions from CSV files in the layout of the CSV export.
+
+    Each row is a participant of a transaction. Consecutive rows that have
+    the same `transaction_id` make up one transaction. The id only groups
+    rows, and imported transactions get new ids. Users are referred to by
+    `*_id` or `*_username` columns and have to be members of the group.
+    """
+
+    @staticmethod
+    def read_transactions(file: BinaryIO) -> Iterator[tuple[int, list[dict]]]:
+        """(first line, rows) of every transaction in the file, read as a stream"""
+        def unreadable(line: int) -> HTTPException:
+            return HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"File is not a UTF-8 CSV file, see line {line}")
+
+        reader = csv.DictReader(io.TextIOWrapper(
+            file, encoding="utf-8-sig", newline=""))
+        try:
+            columns = set(reader.fieldnames or ())
+        except (UnicodeDecodeError, csv.Error):
+            raise unreadable(1)
+        missing = [column for column in ("title", "amount") if column not in columns]
+        if not columns & {"payer_id", "payer_username"}:
+            missing.append("payer_id")
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Missing columns: {', '.join(missing)}")
+
+        def numbered() -> Iterator[tuple[int, dict]]:
+            line = reader.line_num + 1
+            try:
+                for row in reader:
+                    yield line, row
+                    line = reader.line_num + 1
+            except (UnicodeDecodeError, csv.Error):
+                raise unreadable(line)
+
+        # Rows without a transaction id are transactions of their own
+        for _, rows in groupby(numbered(), key=lambda item: item[1].get("transaction_id") or item[0]):
+            rows = list(rows)
+            yield rows[0][0], [row for _, row in rows]
+
+    @staticmethod
+    def get_members(session: SessionDep, group_id: UUID) -> tuple[set[UUID], dict[str, list[UUID]]]:
+        """Ids of the group's members and their ids per username"""
+        member_ids = set()
+        usernames: dict[str, list[UUID]] = {}
+        for user_id, username in session.exec(select(User.id, User.username).join(
+                UsersGroups, UsersGroups.user_id == User.id).where(UsersGroups.group_id == group_id)):
+            member_ids.add(user_id)
+            usernames.setdefault(username, []).append(user_id)
+        return member_ids, usernames
+
+    @staticmethod
+    def parse(
+        group_id: UUID,
+        rows: list[dict],
+        member_ids: set[UUID],
+        usernames: dict[str, list[UUID]]
+    ) -> TransactionCreate:
+        """Validate the rows of a transaction, raising ValueError with the reason"""
+        def resolve(row: dict, role: str) -> str | None:
+            user_id, username = row.get(f"{role}_id"), row.get(f"{role}_username")
+            if user_id:
+                return user_id
+            if not username:
+                return None
+            matches = usernames.get(username, [])
+            if len(matches) != 1:
+                raise ValueError(f"{role} {username} is {'ambiguous' if matches else 'not a member of the group'}")
+            return str(matches[0])
+
+        first = rows[0]
+        values = {
+            "title": first.get("title"),
+            "amount": first.get("amount"),
+            "group_id": group_id,
+            "payer_id": resolve(first, "payer"),
+            "participants": [
+                # Left empty, amounts are split by weight or percentage
+                {"debtor_id": debtor_id, "amount_owed": row.get("amount_owed") or None,
+                 "weight": row.get("weight") or None, "percentage": row.get("percentage") or None}
+                for row in rows
+                if (debtor_id := resolve(row, "debtor")) is not None
+            ],
+        }
+        # Empty optional columns fall back to the defaults of a create
+        for column in ("transaction_type", "purchased_on"):
+            if first.get(column):
+                values[column] = first[column]
+
+        try:
+            data = TransactionCreate.model_validate(values)
+        except ValidationError as error:
+            raise ValueError("; ".join(
+                f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors()))
+
+        if not TransactionBatchService.get_user_ids(data) <= member_ids:
+            raise ValueError("User is not a member of the group")
+        TransactionSplitService.apply(data)
+        return data
+
+    @staticmethod
+    def copy(connection: Connection, table: sa.Table, rows: list[dict]) -> None:
+        """Load rows with COPY, Postgres only"""
+        columns = list(rows[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([
+                "\\N" if row[column] is None else
+                getattr(row[column], "value", row[column]) for column in columns
+            ])
+        buffer.seek(0)
+
+        with connection.connection.dbapi_connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+
+    @staticmethod
+    def write(session: SessionDep, transactions: list[TransactionCreate]) -> None:
+        """Insert a batch of transactions with one statement per table"""
+        now = datetime.now(timezone.utc)
+        transaction_rows, participant_rows = [], []
+        for data in transactions:
+            row, rows = TransactionCreateService.to_rows(data)
+            # Every row of a statement needs the same columns
+            row.setdefault("purchased_on", now)
+            transaction_rows.append(row)
+            participant_rows.extend(rows)
+
+        # The ids are fresh, so there is nothing to snapshot beforehand
+        with track_transactions(session, [row["id"] for row in transaction_rows], created=True):
+            connection = session.connection()
+            for table, rows in ((Transaction.__table__, transaction_rows),
+                                (TransactionParticipant.__table__, participant_rows)):
+                if not rows:
+                    continue
+                if connection.dialect.name == "postgresql":
+                    TransactionImportService.copy(connection, table, rows)
+                else:
+                    connection.execute(table.insert(), rows)
+
+    @staticmethod
+    def import_csv(session: SessionDep, group_id: UUID, file: BinaryIO) -> TransactionImportResult:
+        """Import every valid transaction of the file without committing.
+
+        Rows are validated as they are read and written every
+        IMPORT_BATCH_SIZE transactions, so memory doesn't grow with the file.
+        """
+        member_ids, usernames = TransactionImportService.get_members(
+            session, group_id)
+        imported, failed = 0, 0
+        errors: list[TransactionImportError] = []
+        batch: list[TransactionCreate] = []
+
+        for line, rows in TransactionImportService.read_transactions(file):
+            try:
+                data = TransactionImportService.parse(
+                    group_id, rows, member_ids, usernames)
+            except ValueError as error:
+                failed += 1
+                if len(errors) < IMPORT_MAX_ERRORS:
+                    errors.append(TransactionImportError(
+                        line=line, detail=str(error)))
+                continue
+
+            batch.append(data)
+            if len(batch) == IMPORT_BATCH_SIZE:
+                TransactionImportService.write(session, batch)
+                imported += len(batch)
+                batch.clear()
+
+        if batch:
+            TransactionImportService.write(session, batch)
+            imported += len(batch)
+
+        return TransactionImportResult(imported=imported, failed=failed, errors=errors)
@@ -0,0 +1,69 @@
+from sqlalchemy.orm import joinedload, selectinload
+from sqlmodel import select
+
+from app.database.database import SessionDep
+from app.database.models.group import Group, GroupCompactResponse
+from app.database.models.transaction import Transaction, TransactionCompactList, TransactionCompactRead
+from app.database.models.transaction_participant import TransactionParticipant
+from app.database.models.user import User, UserCompactResponse
+
+
+class TransactionLoading:
+    """Loader options for the relationships `TransactionRead` serializes.
+
+    Those relationships raise instead of lazy loading, so every read that
+    returns transactions has to apply these. A page then costs the same
+    two statements however many rows and participants it holds.
+    """
+
+    @staticmethod
+    def read_options() -> list:
+        return [
+            joinedload(Transaction.payer),
+            joinedload(Transaction.group),
+            selectinload(Transaction.participants).joinedload(
+                TransactionParticipant.debtor),
+            selectinload(Transaction.attachments),
+        ]
+
+    @staticmethod
+    def compact_options() -> list:
+        """Users and groups are side-loaded by `compact` instead"""
+        return [selectinload(Transaction.participants), selectinload(Transaction.attachments)]
+
+    @staticmethod
+    def list_options(compact: bool) -> list:
+        return TransactionLoading.compact_options() if compact else TransactionLoading.read_options()
+
+    @staticmethod
+    def delete_options() -> list:
+        """Participants, attachments and rules are deleted through the ORM cascade, so load them first"""
+        return [selectinload(Transaction.participants), selectinload(Transaction.attachments),
+                selectinload(Transaction.recurrence)]
+
+    @staticmethod
+    def compact(session: SessionDep, transactions: list[Transaction]) -> TransactionCompactList:
+        """Rows with ids only, plus each user and group of the page once"""
+        user_ids = {transaction.payer_id for transaction in transactions} | {
+            participant.debtor_id for transaction in transactions
+            for participant in transaction.participants
+        }
+        group_ids = {transaction.group_id for transaction in transactions}
+
+        users = {}
+        if user_ids:
+            users = {user_id: UserCompactResponse(id=user_id, username=username)
+                     for user_id, username in session.exec(
+                         select(User.id, User.username).where(User.id.in_(user_ids)))}
+        groups = {}
+        if group_ids:
+            groups = {group_id: GroupCompactResponse(id=group_id, name=name)
+                      for group_id, name in session.exec(
+                          select(Group.id, Group.name).where(Group.id.in_(group_ids)))}
+
+        return TransactionCompactList(
+            transactions=[TransactionCompactRead.model_validate(
+                transaction) for transaction in transactions],
+            users=users,
+            groups=groups
+        )
@@ -0,0 +1,112 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+import sqlalchemy as sa
+from fastapi import HTTPException, Response, status
+from sqlmodel.sql.expression import SelectOfScalar
+
+from app.database.database import SessionDep
+from app.database.models.transaction import Transaction
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# OpenAPI description of the header for the paginated listings
+NEXT_CURSOR_RESPONSES = {
+    200: {
+        "headers": {
+            NEXT_CURSOR_HEADER: {
+                "description": "Cursor of the next page, absent on the last page",
+                "schema": {"type": "string"},
+            }
+        }
+    }
+}
+
+
+class TransactionPagination:
+    """Keyset pagination over transactions, newest purchase first.
+
+    The cursor is the opaque (purchased_on, created_at, id) of the last
+    transaction of a page, so every page is an index range scan no matter
+    how deep it is, and inserts don't shift later pages.
+    """
+
+    @staticmethod
+    def encode_cursor(transaction: Transaction) -> str:
+        key = [transaction.purchased_on.isoformat(),
+               transaction.created_at.isoformat(), str(transaction.id)]
+        return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple[datetime, datetime, UUID]:
+        try:
+            purchased_on, created_at, transaction_id = json.loads(
+                base64.urlsafe_b64decode(cursor.encode()))
+            return (datetime.fromisoformat(purchased_on),
+                    datetime.fromisoformat(created_at), UUID(transaction_id))
+        except (binascii.Error, UnicodeError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    @staticmethod
+    def normalize_timestamp(session: SessionDep, value):
+        """A timestamp as an expression comparable with other timestamps.
+
+        SQLite keeps timestamps as text, and `now()` defaults lack the
+        fraction that bound parameters carry, so both sides are normalized
+        to the same format there.
+        """
+        if session.get_bind().dialect.name == "sqlite":
+            return sa.func.strftime("%Y-%m-%d %H:%M:%f", value)
+        return value
+
+    @staticmethod
+    def get_sort_key(session: SessionDep, purchased_on, created_at, transaction_id) -> list:
+        """The pagination key as comparable SQL expressions"""
+        return [TransactionPagination.normalize_timestamp(session, purchased_on),
+                TransactionPagination.normalize_timestamp(session, created_at), transaction_id]
+
+    @staticmethod
+    def paginate(
+        session: SessionDep,
+        statement: SelectOfScalar[Transaction],
+        cursor: Optional[str],
+        skip: int,
+        limit: int
+    ) -> SelectOfScalar[Transaction]:
+        """Order the statement and select one page, plus one row to detect a next page"""
+        if cursor is not None and skip:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="skip cannot be combined with cursor")
+
+        sort_key = TransactionPagination.get_sort_key(
+            session, Transaction.purchased_on, Transaction.created_at, Transaction.id)
+        statement = statement.order_by(
+            *(column.desc() for column in sort_key)).limit(limit + 1)
+
+        if cursor is None:
+            return statement.offset(skip)
+
+        purchased_on, created_at, transaction_id = TransactionPagination.decode_cursor(
+            cursor)
+        cursor_key = TransactionPagination.get_sort_key(
+            session,
+            sa.literal(purchased_on, sa.DateTime(timezone=True)),
+            sa.literal(created_at, sa.DateTime(timezone=True)),
+            sa.literal(transaction_id, sa.Uuid())
+        )
+        return statement.where(sa.tuple_(*sort_key) < sa.tuple_(*cursor_key))
+
+    @staticmethod
+    def page(transactions: list[Transaction], limit: int, response: Response) -> list[Transaction]:
+        """Trim the extra row and point the next-cursor header past the page"""
+        if len(transactions) > limit:
+            transactions = transactions[:limit]
+            response.headers[NEXT_CURSOR_HEADER] = TransactionPagination.encode_cursor(
+                transactions[-1])
+        return transactions
@@ -0,0 +1,67 @@
+import re
+from typing import Optional
+
+import sqlalchemy as sa
+from sqlmodel.sql.expression import SelectOfScalar
+
+from app.database.database import SessionDep
+from app.database.models.transaction import Transaction
+from app.database.models.transaction_search import FTS_TABLE, title_tsvector, SEARCH_CONFIG
+
+_fts = sa.table(FTS_TABLE, sa.column("rowid"),
+                sa.column("title"), sa.column("rank"))
+
+
+class TransactionSearch:
+    """Ranked title search backed by the indexes of `transaction_search`"""
+
+    @staticmethod
+    def get_fts_query(q: str) -> Optional[str]:
+        """Every word of `q` as a quoted FTS5 prefix, so input can't be parsed as syntax"""
+        words = re.findall(r"\w+", q)
+        return " ".join(f'"{word}"*' for word in words) or None
+
+    @staticmethod
+    def get_like_pattern(q: str) -> str:
+        escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return f"%{escaped}%"
+
+    @staticmethod
+    def search(
+        session: SessionDep,
+        statement: SelectOfScalar[Transaction],
+        q: str,
+        skip: int,
+        limit: int
+    ) -> list[Transaction]:
+        """Transactions of the statement whose title matches `q`, best match first"""
+        dialect = session.get_bind().dialect.name
+        newest_first = (Transaction.purchased_on.desc(), Transaction.id.desc())
+
+        if dialect == "postgresql":
+            query = sa.func.websearch_to_tsquery(SEARCH_CONFIG, q)
+            # Words match through the tsvector index, fragments of words
+            # through the trigram index
+            statement = statement.where(sa.or_(
+                title_tsvector.op("@@")(query),
+                Transaction.title.ilike(
+                    TransactionSearch.get_like_pattern(q), escape="\\")
+            )).order_by(
+                (sa.func.ts_rank(title_tsvector, query) +
+                 sa.func.similarity(Transaction.title, q)).desc(),
+                *newest_first
+            )
+        elif dialect == "sqlite":
+            fts_query = TransactionSearch.get_fts_query(q)
+            if fts_query is None:
+                return []
+            statement = statement.join(
+                _fts, _fts.c.rowid == sa.literal_column("transactions.rowid")
+            ).where(
+                sa.literal_column(FTS_TABLE).op("MATCH")(fts_query)
+            ).order_by(_fts.c.rank, *newest_first)
+        else:
+            statement = statement.where(Transaction.title.ilike(
+                TransactionSearch.get_like_pattern(q), escape="\\")).order_by(*newest_first)
+
+        return session.exec(statement.offset(skip).limit(limit)).all()
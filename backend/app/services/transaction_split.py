@@ -0,0 +1,82 @@
+from decimal import Decimal
+
+from app.database.models.transaction import TransactionCreate, TransactionType
+from app.database.models.transaction_participant import TransactionParticipantCreate
+
+PERCENTAGE_TOTAL = Decimal(100)
+
+
+class TransactionSplitService:
+    """Computes participant shares the client left out.
+
+    Shares are cent exact: every participant gets the floor of their
+    proportional share, and the cents left over go one each to the
+    participants with the largest remainders, earlier participants first
+    on ties. Computed shares always add up to the transaction amount.
+    """
+
+    @staticmethod
+    def largest_remainder(total: int, weights: list[int]) -> list[int]:
+        weight_sum = sum(weights)
+        if weight_sum <= 0:
+            raise ValueError("Weights must add up to more than zero")
+
+        # Rounding happens on the magnitude so refunds split like expenses
+        sign, magnitude = (-1, -total) if total < 0 else (1, total)
+        shares, remainders = [], []
+        for weight in weights:
+            share, remainder = divmod(magnitude * weight, weight_sum)
+            shares.append(share)
+            remainders.append(remainder)
+
+        leftover = magnitude - sum(shares)
+        for position in sorted(range(len(weights)), key=lambda position: -remainders[position])[:leftover]:
+            shares[position] += 1
+        return [sign * share for share in shares]
+
+    @staticmethod
+    def get_percentage_weights(percentages: list[Decimal]) -> list[int]:
+        """Percentages as integers of the same scale, checking they add up to 100"""
+        if sum(percentages) != PERCENTAGE_TOTAL:
+            raise ValueError("Percentages must add up to 100")
+        exponent = min(percentage.as_tuple().exponent for percentage in percentages)
+        scale = Decimal(10) ** -min(exponent, 0)
+        return [int(percentage * scale) for percentage in percentages]
+
+    @staticmethod
+    def apply(data: TransactionCreate) -> None:
+        """Fill in the amounts owed of a create, raising ValueError if it can't be split"""
+        TransactionSplitService.split(
+            data.amount, data.transaction_type, data.participants)
+
+    @staticmethod
+    def split(amount: int, transaction_type: TransactionType, participants: list[TransactionParticipantCreate]) -> None:
+        """Fill in the amounts owed of the participants, raising ValueError if they can't be split.
+
+        Amounts given for every participant are kept as they are. Otherwise
+        EVEN splits by weight (1 unless given) and PERCENTAGE by percentage.
+        """
+        given = [participant.amount_owed is not None for participant in participants]
+        if all(given):
+            return
+        if any(given):
+            raise ValueError(
+                "amount_owed must be given for all participants or none")
+
+        if transaction_type == TransactionType.EVEN:
+            weights = [participant.weight or 1 for participant in participants]
+        elif transaction_type == TransactionType.PERCENTAGE:
+            if any(participant.percentage is None for participant in participants):
+                raise ValueError(
+                    "PERCENTAGE transactions need a percentage or amount_owed for every participant")
+            weights = TransactionSplitService.get_percentage_weights(
+                [participant.percentage for participant in participants])
+        else:
+            raise ValueError(
+                "AMOUNT transactions need amount_owed for every participant")
+
+        shares = TransactionSplitService.largest_remainder(amount, weights)
+        if sum(shares) != amount:
+            raise ValueError("Shares must add up to the transaction amount")
+        for participant, share in zip(participants, shares):
+            participant.amount_owed = share
@@ -0,0 +1,250 @@
+from collections import Counter
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, Optional
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Row
+from sqlmodel import select
+
+from app.database.database import SessionDep
+from app.database.models.balance import HistoryBucket
+from app.database.models.transaction import Transaction
+from app.database.models.transaction_stats import GroupStats, GroupStatsEntry, TransactionMonthlyTotal
+from app.services.balance import BalanceService
+from app.services.transaction_changes import TransactionChanges, on_transaction_change
+from app.services.transaction_filtering import TransactionFiltering
+
+# Key of a rollup row: (group_id, month, payer_id)
+MonthKey = tuple[UUID, date, UUID]
+
+
+class TransactionStatsService:
+    @staticmethod
+    def get_month(purchased_on: datetime) -> date:
+        """First day of the purchase's month in UTC, naive timestamps being UTC already"""
+        if purchased_on.tzinfo is not None:
+            purchased_on = purchased_on.astimezone(timezone.utc)
+        return purchased_on.date().replace(day=1)
+
+    @staticmethod
+    def get_next_month(month: date) -> date:
+        return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+    @staticmethod
+    def sum_months(rows: Iterable[Row]) -> tuple[Counter, Counter]:
+        """Totals and counts per month and payer of transaction snapshot rows"""
+        totals: Counter = Counter()
+        counts: Counter = Counter()
+        seen = set()
+        for row in rows:
+            # Snapshots hold one row per participant
+            if row.transaction_id in seen:
+                continue
+            seen.add(row.transaction_id)
+            key = (row.group_id, TransactionStatsService.get_month(
+                row.purchased_on), row.payer_id)
+            totals[key] += row.amount
+            counts[key] += 1
+        return totals, counts
+
+    @staticmethod
+    def deltas(changes: TransactionChanges) -> dict[MonthKey, tuple[int, int]]:
+        """(total, count) changes caused by a write, skipping deleted groups and payers"""
+        totals, counts = TransactionStatsService.sum_months(changes.after)
+        before_totals, before_counts = TransactionStatsService.sum_months(
+            changes.before)
+        totals.subtract(before_totals)
+        counts.subtract(before_counts)
+        return {
+            key: (totals[key], counts[key])
+            for key in totals.keys() | counts.keys()
+            if (totals[key] or counts[key])
+            and key[0] not in changes.deleted_group_ids
+            and key[2] not in changes.deleted_user_ids
+        }
+
+    @staticmethod
+    def apply(connection: Connection, deltas: dict[MonthKey, tuple[int, int]]) -> None:
+        """Add the given totals and counts to the rollup, dropping emptied months"""
+        rows = [
+            {"group_id": group_id, "month": month, "payer_id": payer_id,
+                "total": total, "count": count}
+            for (group_id, month, payer_id), (total, count) in deltas.items()
+        ]
+        if not rows:
+            return
+
+        table = TransactionMonthlyTotal.__table__
+        dialect = connection.dialect.name
+
+        if dialect in ("postgresql", "sqlite"):
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            statement = insert(table)
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.group_id,
+                                table.c.month, table.c.payer_id],
+                set_={"total": table.c.total + statement.excluded.total,
+                      "count": table.c.count + statement.excluded.count}
+            )
+            connection.execute(statement, rows)
+        else:
+            for row in rows:
+                result = connection.execute(
+                    table.update().where(
+                        table.c.group_id == row["group_id"],
+                        table.c.month == row["month"],
+                        table.c.payer_id == row["payer_id"]
+                    ).values(total=table.c.total + row["total"],
+                             count=table.c.count + row["count"])
+                )
+                if result.rowcount == 0:
+                    connection.execute(table.insert(), row)
+
+        connection.execute(table.delete().where(
+            table.c.group_id.in_({row["group_id"] for row in rows}),
+            table.c.count == 0
+        ))
+
+    @staticmethod
+    def delete_for(
+        connection: Connection,
+        group_ids: Iterable[UUID] = (),
+        user_ids: Iterable[UUID] = ()
+    ) -> None:
+        """Drop rollup rows of deleted groups and payers"""
+        table = TransactionMonthlyTotal.__table__
+        group_ids, user_ids = list(group_ids), list(user_ids)
+
+        if group_ids:
+            connection.execute(table.delete().where(
+                table.c.group_id.in_(group_ids)))
+        if user_ids:
+            connection.execute(table.delete().where(
+                table.c.payer_id.in_(user_ids)))
+
+    @staticmethod
+    def rebuild_group(connection: Connection, group_id: UUID) -> None:
+        """Recompute a group's rollup rows from its transactions"""
+        TransactionStatsService.delete_for(connection, group_ids=[group_id])
+        totals, counts = TransactionStatsService.sum_months(connection.execute(
+            sa.select(
+                Transaction.id.label("transaction_id"),
+                Transaction.group_id,
+                Transaction.payer_id,
+                Transaction.amount,
+                Transaction.purchased_on
+            ).where(Transaction.group_id == group_id)
+        ))
+        TransactionStatsService.apply(
+            connection, {key: (totals[key], counts[key]) for key in counts})
+
+    @staticmethod
+    def get_group_stats(
+        session: SessionDep,
+        group_id: UUID,
+        bucket: HistoryBucket,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> GroupStats:
+        """Spending per bucket and payer for purchases from `start` to `end` inclusive.
+
+        Monthly statistics read whole months from the rollup and only scan
+        the transactions of the partial months at either end of the range.
+        Days and weeks are aggregated from the transactions.
+        """
+        lower = datetime.combine(
+            start, time(), timezone.utc) if start is not None else None
+        upper_day = end + timedelta(days=1) if end is not None else None
+        upper = datetime.combine(
+            upper_day, time(), timezone.utc) if upper_day is not None else None
+
+        totals: Counter = Counter()
+        counts: Counter = Counter()
+
+        def add(bucket_start: date, payer_id: UUID, total: int, count: int):
+            totals[(bucket_start, payer_id)] += total
+            counts[(bucket_start, payer_id)] += count
+
+        def scan(scan_lower: Optional[datetime], scan_upper: Optional[datetime]):
+            for purchased_on, payer_id, amount in session.exec(select(
+                Transaction.purchased_on, Transaction.payer_id, Transaction.amount
+            ).where(
+                Transaction.group_id == group_id,
+                *TransactionFiltering.purchased_between(
+                    session, scan_lower, scan_upper)
+            )):
+                add(TransactionStatsService.get_month(
+                    purchased_on), payer_id, amount, 1)
+
+        if bucket != HistoryBucket.MONTH:
+            bucket_column = BalanceService.get_bucket_expression(
+                session, Transaction.purchased_on, bucket).label("bucket")
+            for bucket_start, payer_id, total, count in session.exec(select(
+                bucket_column,
+                Transaction.payer_id,
+                sa.func.sum(Transaction.amount),
+                sa.func.count()
+            ).where(
+                Transaction.group_id == group_id,
+                *TransactionFiltering.purchased_between(session, lower, upper)
+            ).group_by(bucket_column, Transaction.payer_id)):
+                add(bucket_start, payer_id, total, count)
+        else:
+            # Whole months covered by the range
+            first_month = start
+            if start is not None and start.day != 1:
+                first_month = TransactionStatsService.get_next_month(
+                    start.replace(day=1))
+            end_month = upper_day.replace(
+                day=1) if upper_day is not None else None
+
+            if first_month is not None and end_month is not None and first_month >= end_month:
+                scan(lower, upper)
+            else:
+                statement = select(
+                    TransactionMonthlyTotal.month,
+                    TransactionMonthlyTotal.payer_id,
+                    TransactionMonthlyTotal.total,
+                    TransactionMonthlyTotal.count
+                ).where(TransactionMonthlyTotal.group_id == group_id)
+                if first_month is not None:
+                    statement = statement.where(
+                        TransactionMonthlyTotal.month >= first_month)
+                if end_month is not None:
+                    statement = statement.where(
+                        TransactionMonthlyTotal.month < end_month)
+                for month, payer_id, total, count in session.exec(statement):
+                    add(month, payer_id, total, count)
+
+                if first_month != start:
+                    scan(lower, datetime.combine(
+                        first_month, time(), timezone.utc))
+                if end_month != upper_day:
+                    scan(datetime.combine(
+                        end_month, time(), timezone.utc), upper)
+
+        entries = [
+            GroupStatsEntry(bucket=bucket_start, payer_id=payer_id,
+                            total=totals[(bucket_start, payer_id)], count=count)
+            for (bucket_start, payer_id), count in sorted(counts.items())
+            if count
+        ]
+        return GroupStats(
+            group_id=group_id,
+            bucket=bucket,
+            start=start,
+            end=end,
+            total=sum(entry.total for entry in entries),
+            count=sum(entry.count for entry in entries),
+            entries=entries
+        )
+
+
+@on_transaction_change
+def _update_monthly_totals(connection: Connection, changes: TransactionChanges):
+    TransactionStatsService.apply(
+        connection, TransactionStatsService.deltas(changes))
+    TransactionStatsService.delete_for(
+        connection, changes.deleted_group_ids, changes.deleted_user_ids)
@@ -0,0 +1,124 @@
+from uuid import UUID, uuid4
+
+import sqlalchemy as sa
+
+from app.database.database import SessionDep
+from app.database.models.transaction import Transaction, TransactionType, TransactionUpdate
+from app.database.models.transaction_participant import TransactionParticipant, TransactionParticipantCreate
+from app.services.transaction_changes import track_transactions
+from app.services.transaction_split import TransactionSplitService
+
+
+class TransactionUpdateService:
+    """Applies updates that replace a transaction's participants.
+
+    The new participants are matched to the stored rows by debtor, and only
+    the difference is written: one bulk statement each for the debtors that
+    were added, the amounts that changed and the debtors that were removed.
+    Rows of unchanged participants keep their ids and are not touched.
+    """
+
+    @staticmethod
+    def get_participants(
+        data: TransactionUpdate,
+        amount: int,
+        transaction_type: TransactionType
+    ) -> list[TransactionParticipantCreate] | None:
+        """The update's participants with their amounts filled in, None if it leaves them as they are.
+
+        Shares left out are split over the amount and type the transaction
+        has after the update, given its current ones. Raises ValueError if
+        they can't be split.
+        """
+        if "participants" not in data.model_fields_set:
+            return None
+        participants = data.participants or []
+
+        debtor_ids = [participant.debtor_id for participant in participants]
+        if len(set(debtor_ids)) != len(debtor_ids):
+            raise ValueError("Every debtor can only take part once")
+
+        TransactionSplitService.split(
+            amount if data.amount is None else data.amount,
+            data.transaction_type or transaction_type,
+            participants)
+        return participants
+
+    @staticmethod
+    def diff(
+        current: list[tuple[UUID, UUID, int]],
+        participants: list[TransactionParticipantCreate]
+    ) -> tuple[list[TransactionParticipantCreate], list[tuple[UUID, int]], list[UUID]]:
+        """(participants to insert, (row id, amount) to update, row ids to delete).
+
+        `current` holds (row id, debtor id, amount owed) of the stored rows.
+        """
+        stored: dict[UUID, tuple[UUID, int]] = {}
+        deleted = []
+        for participant_id, debtor_id, amount_owed in current:
+            # Left over duplicates of a debtor are dropped
+            if debtor_id in stored:
+                deleted.append(participant_id)
+            else:
+                stored[debtor_id] = (participant_id, amount_owed)
+
+        inserted, updated = [], []
+        for participant in participants:
+            row = stored.pop(participant.debtor_id, None)
+            if row is None:
+                inserted.append(participant)
+            elif row[1] != participant.amount_owed:
+                updated.append((row[0], participant.amount_owed))
+
+        deleted.extend(participant_id for participant_id, _ in stored.values())
+        return inserted, updated, deleted
+
+    @staticmethod
+    def apply(
+        session: SessionDep,
+        transaction: Transaction,
+        data: TransactionUpdate,
+        participants: list[TransactionParticipantCreate] | None
+    ) -> None:
+        """Apply the update without committing.
+
+        `participants` come from `get_participants`, so nothing is written
+        when the shares can't be split.
+        """
+        update_data = data.model_dump(exclude_unset=True, exclude={"participants"})
+        if participants is None:
+            transaction.sqlmodel_update(update_data)
+            session.add(transaction)
+            return
+
+        table = TransactionParticipant.__table__
+        # One snapshot covers both the fields and the participants
+        with track_transactions(session, [transaction.id]):
+            transaction.sqlmodel_update(update_data)
+            session.add(transaction)
+            current = session.execute(sa.select(table.c.id, table.c.debtor_id, table.c.amount_owed).where(
+                table.c.transaction_id == transaction.id)).all()
+            inserted, updated, deleted = TransactionUpdateService.diff(
+                current, participants)
+
+            if inserted:
+                session.execute(sa.insert(table), [{
+                    "id": uuid4(),
+                    "transaction_id": transaction.id,
+                    "debtor_id": participant.debtor_id,
+                    "amount_owed": participant.amount_owed,
+                } for participant in inserted])
+            if updated:
+                session.execute(sa.update(table).where(
+                    table.c.id == sa.bindparam("participant_id")
+                ).values(amount_owed=sa.bindparam("new_amount_owed")), [
+                    {"participant_id": participant_id, "new_amount_owed": amount_owed}
+                    for participant_id, amount_owed in updated
+                ])
+            if deleted:
+                session.execute(sa.delete(table).where(
+                    table.c.id.in_(deleted)))
+
+        # Keep a loaded collection in step with the rows written around the ORM
+        if "participants" not in sa.inspect(transaction).unloaded:
+            session.refresh(transaction, ["participants"])
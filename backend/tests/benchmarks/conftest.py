@@ -0,0 +1,110 @@
+import os
+from collections import Counter
+from datetime import timedelta
+from typing import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
+
+from app.main import app
+from app.config import get_settings
+from app.database.database import get_session
+from app.database.models import User
+from app.database.seed import SeededDataset, generate_dataset
+from app.services.auth import AuthService
+from tests.conftest import TestSettings
+
+# Pick scales with BENCHMARK_SCALES=small,medium,large
+SCALES = {
+    "small": {"users": 200, "groups": 20, "transactions": 5_000},
+    "medium": {"users": 2_000, "groups": 200, "transactions": 100_000},
+    "large": {"users": 10_000, "groups": 1_000, "transactions": 1_000_000},
+}
+
+
+def selected_scales() -> list[str]:
+    return [scale.strip() for scale in os.environ.get("BENCHMARK_SCALES", "small").split(",")]
+
+
+@pytest.fixture(name="seeded", scope="session", params=selected_scales())
+def seeded_fixture(request) -> Generator[tuple, None, None]:
+    """Seed a database once per scale.
+
+    BENCHMARK_DATABASE_URL points the suite at a scratch database (e.g. a
+    local Postgres); its tables are dropped afterwards.
+    """
+    database_url = os.environ.get("BENCHMARK_DATABASE_URL")
+    if database_url:
+        engine = create_engine(database_url)
+    else:
+        engine = create_engine(
+            "sqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        dataset = generate_dataset(session, seed=0, **SCALES[request.param])
+
+    yield engine, dataset
+
+    SQLModel.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.fixture(name="dataset")
+def dataset_fixture(seeded: tuple) -> SeededDataset:
+    return seeded[1]
+
+
+@pytest.fixture(name="bench_session")
+def bench_session_fixture(seeded: tuple) -> Generator[Session, None, None]:
+    with Session(seeded[0]) as session:
+        yield session
+
+
+@pytest.fixture(name="busiest_group_id")
+def busiest_group_id_fixture(dataset: SeededDataset):
+    return max(dataset.group_ids, key=lambda group_id: len(dataset.group_members[group_id]))
+
+
+@pytest.fixture(name="heavy_user")
+def heavy_user_fixture(bench_session: Session, dataset: SeededDataset, busiest_group_id) -> User:
+    """The member of the busiest group who belongs to the most groups"""
+    memberships = Counter(
+        user_id for members in dataset.group_members.values() for user_id in members)
+    user_id = max(
+        dataset.group_members[busiest_group_id], key=memberships.__getitem__)
+    return bench_session.get(User, user_id)
+
+
+@pytest.fixture(name="bench_client")
+def bench_client_fixture(bench_session: Session) -> Generator[TestClient, None, None]:
+    settings = TestSettings()
+    app.dependency_overrides[get_session] = lambda: bench_session
+    app.dependency_overrides[get_settings] = lambda: settings
+
+    yield TestClient(app)
+
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture(name="bench_headers")
+def bench_headers_fixture(heavy_user: User) -> dict:
+    settings = TestSettings()
+    token = AuthService.create_access_token(
+        data={
+            "user": {
+                "id": str(heavy_user.id),
+                "email": heavy_user.email,
+                "username": heavy_user.username
+            }
+        },
+        expires_delta=timedelta(
+            minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+        settings=settings
+    )
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,90 @@
+import random
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.database.models import User
+from app.services.balance import BalanceService
+from app.services.ledger_cache import ledger_cache
+from app.services.settlement import SettlementService
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.slow
+
+
+class TestBalanceBenchmarks:
+    """Balance computation against a seeded dataset"""
+
+    def test_calculate_balance(self, benchmark, bench_session: Session, heavy_user: User):
+        balance = benchmark(BalanceService.calculate_balance,
+                            bench_session, heavy_user.id)
+        assert balance.groups
+
+    def test_calculate_group_balance(self, benchmark, bench_session: Session, heavy_user: User,
+                                     busiest_group_id):
+        benchmark(BalanceService.calculate_balance,
+                  bench_session, heavy_user.id, busiest_group_id)
+
+
+class TestSettlementBenchmarks:
+    """Settlement planning on the seeded ledger and on a synthetic large group"""
+
+    def test_create_plan(self, benchmark, bench_session: Session, busiest_group_id):
+        plan = benchmark(SettlementService.create_plan,
+                         bench_session, busiest_group_id)
+        assert plan.group_id == busiest_group_id
+
+    def test_plan_transfers_thousands_of_members(self, benchmark):
+        rng = random.Random(7)
+        balances = {uuid4(): rng.randint(-100_000, 100_000)
+                    for _ in range(5000)}
+        first = next(iter(balances))
+        balances[first] -= sum(balances.values())
+
+        transfers = benchmark(SettlementService.plan_transfers, balances)
+        assert len(transfers) < len(balances)
+
+    def test_read_settle_plan(self, benchmark, bench_client: TestClient, bench_headers: dict,
+                              busiest_group_id):
+        response = benchmark(
+            bench_client.get, f"/groups/{busiest_group_id}/settle-plan", headers=bench_headers)
+        assert response.status_code == 200
+
+
+class TestReadBenchmarks:
+    """Group reads and transaction listings through the API"""
+
+    def test_read_group(self, benchmark, bench_client: TestClient, bench_headers: dict, busiest_group_id):
+        response = benchmark(
+            bench_client.get, f"/groups/{busiest_group_id}", headers=bench_headers)
+        assert response.status_code == 200
+
+    def test_read_group_balances(self, benchmark, bench_client: TestClient, bench_headers: dict,
+                                 busiest_group_id):
+        response = benchmark(
+            bench_client.get, f"/groups/{busiest_group_id}/balances", headers=bench_headers)
+        assert response.status_code == 200
+
+    def test_read_group_balances_cached(self, benchmark, bench_client: TestClient, bench_headers: dict,
+                                        busiest_group_id):
+        ledger_cache.configure(64 << 20)
+        try:
+            response = benchmark(
+                bench_client.get, f"/groups/{busiest_group_id}/balances", headers=bench_headers)
+        finally:
+            ledger_cache.configure(0)
+        assert response.status_code == 200
+
+    def test_list_group_transactions(self, benchmark, bench_client: TestClient, bench_headers: dict,
+                                     busiest_group_id):
+        response = benchmark(
+            bench_client.get, f"/groups/{busiest_group_id}/transactions", headers=bench_headers)
+        assert response.status_code == 200
+
+    def test_list_user_transactions(self, benchmark, bench_client: TestClient, bench_headers: dict):
+        response = benchmark(
+            bench_client.get, "/transactions/", headers=bench_headers)
+        assert response.status_code == 200
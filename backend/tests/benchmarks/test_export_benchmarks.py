@@ -0,0 +1,98 @@
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+import sqlalchemy as sa
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
+
+from app.database.models import Group, Transaction, TransactionExportFormat, TransactionParticipant, User
+from app.services.transaction_export import TransactionExportService
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.slow
+
+# Transactions per exported group when measuring memory
+EXPORT_SIZES = [2_000, 8_000, 32_000]
+
+
+def export_peak_bytes(session: Session, group_id, export_format: TransactionExportFormat) -> tuple[int, int]:
+    """Bytes written and the peak of Python allocations while streaming an export"""
+    tracemalloc.start()
+    try:
+        written = sum(len(chunk) for chunk in TransactionExportService.export(
+            session, group_id, export_format))
+        return written, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.fixture(name="export_groups", scope="module")
+def export_groups_fixture():
+    """One group per export size, each member paying and owing in turn"""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    now = datetime.now(timezone.utc)
+
+    with Session(engine) as session:
+        user_ids = [uuid4() for _ in range(4)]
+        session.execute(sa.insert(User), [{
+            "id": user_id, "username": f"user{index}", "email": f"user{index}@example.com",
+            "email_verified": True, "password": "x"
+        } for index, user_id in enumerate(user_ids)])
+
+        group_ids = {}
+        for size in EXPORT_SIZES:
+            group_id = group_ids[size] = uuid4()
+            session.execute(sa.insert(Group), [
+                {"id": group_id, "name": f"Export {size}"}])
+            for start in range(0, size, 5_000):
+                transaction_ids = [uuid4() for _ in range(min(5_000, size - start))]
+                session.execute(sa.insert(Transaction), [{
+                    "id": transaction_id, "amount": 1000, "title": f"Expense {start + index}",
+                    "purchased_on": now - timedelta(minutes=start + index),
+                    "group_id": group_id, "payer_id": user_ids[index % 4],
+                } for index, transaction_id in enumerate(transaction_ids)])
+                session.execute(sa.insert(TransactionParticipant), [{
+                    "id": uuid4(), "transaction_id": transaction_id,
+                    "debtor_id": user_ids[(index + offset) % 4], "amount_owed": 500,
+                } for index, transaction_id in enumerate(transaction_ids) for offset in (1, 2)])
+        session.commit()
+
+    with Session(engine) as session:
+        yield session, group_ids
+
+    engine.dispose()
+
+
+class TestExportBenchmarks:
+    """Streaming exports of growing groups"""
+
+    @pytest.mark.parametrize("export_format", list(TransactionExportFormat))
+    def test_export_memory_is_flat(self, benchmark, export_groups, export_format):
+        """Peak memory of an export must not grow with the number of transactions"""
+        session, group_ids = export_groups
+        peaks = {}
+        for size, group_id in group_ids.items():
+            written, peaks[size] = export_peak_bytes(
+                session, group_id, export_format)
+            assert written > 0
+        benchmark.extra_info["peak_bytes"] = peaks
+
+        smallest, largest = peaks[EXPORT_SIZES[0]], peaks[EXPORT_SIZES[-1]]
+        # 16 times the rows, allowing some noise but no linear growth
+        assert largest < smallest * 1.5
+
+        benchmark.pedantic(lambda: export_peak_bytes(
+            session, group_ids[EXPORT_SIZES[-1]], export_format), rounds=1, iterations=1)
+
+    def test_export_busiest_group(self, benchmark, bench_session: Session, busiest_group_id):
+        written = benchmark(lambda: sum(len(chunk) for chunk in TransactionExportService.export(
+            bench_session, busiest_group_id, TransactionExportFormat.CSV)))
+        assert written > 0
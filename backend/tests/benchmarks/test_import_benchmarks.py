@@ -0,0 +1,101 @@
+import tempfile
+import time
+import tracemalloc
+from uuid import uuid4
+
+import pytest
+import sqlalchemy as sa
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
+
+from app.database.models import Group, User, UsersGroups
+from app.services.transaction_import import TransactionImportService
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.slow
+
+# Transactions per imported file when measuring memory
+IMPORT_SIZES = [2_000, 8_000, 32_000]
+
+
+@pytest.fixture(name="import_target")
+def import_target_fixture():
+    """An empty database with one group of four members"""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        user_ids = [uuid4() for _ in range(4)]
+        session.execute(sa.insert(User), [{
+            "id": user_id, "username": f"user{index}", "email": f"user{index}@example.com",
+            "email_verified": True, "password": "x"
+        } for index, user_id in enumerate(user_ids)])
+        group_id = uuid4()
+        session.execute(sa.insert(Group), [{"id": group_id, "name": "Import"}])
+        session.execute(sa.insert(UsersGroups), [
+            {"group_id": group_id, "user_id": user_id} for user_id in user_ids])
+        session.commit()
+
+        yield session, group_id, user_ids
+
+    engine.dispose()
+
+
+def write_csv(user_ids: list, size: int):
+    """A CSV file of `size` transactions split between two members each"""
+    file = tempfile.TemporaryFile()
+    file.write(b"transaction_id,title,amount,purchased_on,payer_id,debtor_id,amount_owed\n")
+    for index in range(size):
+        for offset in (1, 2):
+            file.write((f"{index},Expense {index},1000,2024-01-{index % 28 + 1:02d}T12:00:00Z,"
+                        f"{user_ids[index % 4]},{user_ids[(index + offset) % 4]},500\n").encode())
+    file.seek(0)
+    return file
+
+
+class TestImportBenchmarks:
+    """CSV imports of growing files"""
+
+    def test_import_memory_is_flat(self, benchmark, import_target):
+        """Peak memory of an import must not grow with the number of transactions"""
+        session, group_id, user_ids = import_target
+
+        def run() -> dict[int, int]:
+            peaks = {}
+            for size in IMPORT_SIZES:
+                with write_csv(user_ids, size) as file:
+                    tracemalloc.start()
+                    try:
+                        result = TransactionImportService.import_csv(
+                            session, group_id, file)
+                        peaks[size] = tracemalloc.get_traced_memory()[1]
+                    finally:
+                        tracemalloc.stop()
+                session.commit()
+                assert result.imported == size
+            return peaks
+
+        peaks = benchmark.pedantic(run, rounds=1, iterations=1)
+        benchmark.extra_info["peak_bytes"] = peaks
+
+        # 16 times the rows, allowing some noise but no linear growth
+        assert peaks[IMPORT_SIZES[-1]] < peaks[IMPORT_SIZES[0]] * 1.5
+
+    def test_import_100k_transactions(self, benchmark, import_target):
+        session, group_id, user_ids = import_target
+
+        with write_csv(user_ids, 100_000) as file:
+            def run():
+                started = time.perf_counter()
+                result = TransactionImportService.import_csv(session, group_id, file)
+                session.commit()
+                benchmark.extra_info["seconds"] = time.perf_counter() - started
+                return result
+
+            result = benchmark.pedantic(run, rounds=1, iterations=1)
+        assert result.imported == 100_000
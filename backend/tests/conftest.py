@@ -2,8 +2,8 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session, SQLModel, create_engine
 from sqlmodel.pool import StaticPool
-from typing import Generator
-from datetime import timedelta
+from typing import Generator, Optional
+from datetime import datetime, timedelta
 
 from app.main import app
 from app.database.database import get_session
@@ -127,6 +127,22 @@ def test_user_2_fixture(session: Session, test_settings: TestSettings) -> User:
     return db_user
 
 
+@pytest.fixture(name="test_user_3")
+def test_user_3_fixture(session: Session) -> User:
+    """Create a third test user in the database"""
+    db_user = User(
+        email="test3@example.com",
+        username="testuser3",
+        password="testpassword123",
+        email_verified=True
+    )
+
+    session.add(db_user)
+    session.commit()
+    session.refresh(db_user)
+    return db_user
+
+
 @pytest.fixture(name="auth_token")
 def auth_token_fixture(test_user: User, test_settings: TestSettings) -> str:
     """Create an authentication token for the test user"""
@@ -152,6 +168,24 @@ def auth_headers_fixture(auth_token: str) -> dict:
     return {"Authorization": f"Bearer {auth_token}"}
 
 
+@pytest.fixture(name="auth_headers_2")
+def auth_headers_2_fixture(test_user_2: User, test_settings: TestSettings) -> dict:
+    """Create authorization headers with the second test user's token"""
+    access_token = AuthService.create_access_token(
+        data={
+            "user": {
+                "id": str(test_user_2.id),
+                "email": test_user_2.email,
+                "username": test_user_2.username
+            }
+        },
+        expires_delta=timedelta(
+            minutes=test_settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+        settings=test_settings
+    )
+    return {"Authorization": f"Bearer {access_token}"}
+
+
 @pytest.fixture(name="test_group")
 def test_group_fixture(session: Session, test_user: User) -> Group:
     """Create a test group with the test user as a member"""
@@ -166,3 +200,24 @@ def test_group_fixture(session: Session, test_user: User) -> Group:
     session.commit()
     session.refresh(db_group)
     return db_group
+
+
+def add_expense(session: Session, group: Group, payer: User, debtor: User, amount: int,
+                purchased_on: Optional[datetime] = None) -> Transaction:
+    """Commit an expense of `amount` that `debtor` owes `payer`"""
+    transaction = Transaction(
+        amount=amount,
+        title="Expense",
+        transaction_type=TransactionType.AMOUNT,
+        group_id=group.id,
+        payer_id=payer.id,
+        participants=[TransactionParticipant(
+            debtor_id=debtor.id, amount_owed=amount)]
+    )
+    # Left out so the server default applies
+    if purchased_on is not None:
+        transaction.purchased_on = purchased_on
+
+    session.add(transaction)
+    session.commit()
+    return transaction
@@ -0,0 +1,189 @@
+import io
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from app.database.models.group import Group
+from app.database.models.transaction import Transaction
+from app.database.models.transaction_attachment import TransactionAttachment
+from app.database.models.user import User
+from app.services import attachment_thumbnails
+from app.services.attachment_storage import LocalAttachmentStorage, set_attachment_storage
+from tests.conftest import add_expense
+
+RECEIPT = b"%PDF-1.4 receipt of the weekly groceries"
+
+
+@pytest.fixture(name="storage_dir")
+def storage_dir_fixture(tmp_path: Path):
+    """Store attachments in a temporary directory"""
+    set_attachment_storage(LocalAttachmentStorage(tmp_path))
+    yield tmp_path
+    set_attachment_storage(None)
+
+
+def upload(client: TestClient, auth_headers: dict, transaction: Transaction, content=RECEIPT,
+           filename: str = "receipt.pdf", content_type: str = "application/pdf"):
+    return client.post(f"/transactions/{transaction.id}/attachments/", params={"filename": filename},
+                       content=content, headers={**auth_headers, "Content-Type": content_type})
+
+
+def stored_files(storage_dir: Path) -> list[Path]:
+    return [path for path in storage_dir.rglob("*") if path.is_file()]
+
+
+class TestTransactionAttachments:
+    """Integration tests for uploading and serving transaction attachments"""
+
+    def test_upload_and_download(self, client: TestClient, auth_headers: dict, session: Session,
+                                 test_user: User, test_user_2: User, test_group: Group, storage_dir: Path):
+        """Test that an upload streamed in chunks is stored and served back"""
+        transaction = add_expense(session, test_group, test_user, test_user_2, 1000)
+        chunks = [RECEIPT[:10], RECEIPT[10:25], RECEIPT[25:]]
+
+        response = upload(client, auth_headers, transaction, content=iter(chunks))
+
+        assert response.status_code == 201
+        attachment = response.json()
+        assert attachment["filename"] == "receipt.pdf"
+        assert attachment["size"] == len(RECEIPT)
+        assert attachment["has_thumbnail"] is False
+        assert [path.read_bytes() for path in stored_files(storage_dir)] == [RECEIPT]
+
+        download = client.get(
+            f"/transactions/{transaction.id}/attachments/{attachment['id']}", headers=auth_headers)
+        assert download.status_code == 200
+        assert download.content == RECEIPT
+        assert download.headers["content-type"] == "application/pdf"
+        assert "receipt.pdf" in download.headers["content-disposition"]
+
+    def test_range_download(self, client: TestClient, auth_headers: dict, session: Session,
+                            test_user: User, test_user_2: User, test_group: Group, storage_dir: Path):
+        """Test that downloads answer Range requests with partial content"""
+        transaction = add_expense(session, test_group, test_user, test_user_2, 1000)
+        attachment = upload(client, auth_headers, transaction).json()
+
+        response = client.get(f"/transactions/{transaction.id}/attachments/{attachment['id']}",
+                              headers={**auth_headers, "Range": "bytes=5-12"})
+
+        assert response.status_code == 206
+        assert response.content == RECEIPT[5:13]
+        assert response.headers["content-range"] == f"bytes 5-12/{len(RECEIPT)}"
+
+    def test_oversized_upload_is_rejected(self, client: TestClient, auth_headers: dict, session: Session,
+                                          test_user: User, test_user_2: User, test_group: Group,
+                                          test_settings, storage_dir: Path):
+        """Test that uploads over the limit fail with 413 and leave nothing behind"""
+        test_settings.ATTACHMENT_MAX_BYTES = 16
+        transaction = add_expense(session, test_group, test_user, test_user_2, 1000)
+
+        declared = upload(client, auth_headers, transaction)
+        streamed = upload(client, auth_headers, transaction, content=iter([RECEIPT[:10], RECEIPT[10:]]))
+
+        assert declared.status_code == 413
+        assert streamed.status_code == 413
+        assert stored_files(storage_dir) == []
+        assert session.exec(select(TransactionAttachment)).all() == []
+
+    def test_permissions(self, client: TestClient, auth_headers: dict, auth_headers_2: dict, session: Session,
+                         test_user: User, test_user_2: User, test_group: Group, storage_dir: Path):
+        """Test that only the payer adds attachments and only members read them"""
+        transaction = add_expense(session, test_group, test_user, test_user_2, 1000)
+        attachment = upload(client, auth_headers, transaction).json()
+        url = f"/transactions/{transaction.id}/attachments/{attachment['id']}"
+
+        assert upload(client, auth_headers_2, transaction).status_code == 403
+        assert client.get(url, headers=auth_headers_2).status_code == 403
+
+        test_group.users.append(test_user_2)
+        session.commit()
+        assert client.get(url, headers=auth_headers_2).status_code == 200
+        assert client.delete(url, headers=auth_headers_2).status_code == 403
+
+    def test_files_are_removed_with_their_rows(self, client: TestClient, auth_headers: dict, session: Session,
+                                               test_user: User, test_user_2: User, test_group: Group,
+                                               storage_dir: Path):
+        """Test that deleting an attachment or its transaction removes the files"""
+        transaction = add_expense(session, test_group, test_user, test_user_2, 1000)
+        first = upload(client, auth_headers, transaction).json()
+        upload(client, auth_headers, transaction, filename="second.pdf")
+
+        response = client.delete(
+            f"/transactions/{transaction.id}/attachments/{first['id']}", headers=auth_headers)
+        assert response.status_code == 204
+        assert len(stored_files(storage_dir)) == 1
+
+        response = client.delete(f"/transactions/{transaction.id}", headers=auth_headers)
+        assert response.status_code == 204
+        assert stored_files(storage_dir) == []
+        assert session.exec(select(TransactionAttachment)).all() == []
+
+    def test_lists_side_load_attachments(self, client: TestClient, engine, auth_headers: dict, session: Session,
+                                         test_user: User, test_user_2: User, test_group: Group,
+                                         storage_dir: Path):
+        """Test that listings carry attachment metadata without a query per row"""
+        for _ in range(6):
+            transaction = add_expense(session, test_group, test_user, test_user_2, 1000)
+            upload(client, auth_headers, transaction)
+        url = f"/groups/{test_group.id}/transactions"
+        statements = []
+
+        def record_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        def list_transactions(limit: int) -> list:
+            session.expunge_all()
+            statements.clear()
+            event.listen(engine, "before_cursor_execute", record_statement)
+            try:
+                response = client.get(url, params={"limit": limit}, headers=auth_headers)
+            finally:
+                event.remove(engine, "before_cursor_execute", record_statement)
+            assert response.status_code == 200
+            return response.json()
+
+        small = list_transactions(2)
+        small_count = len(statements)
+        large = list_transactions(6)
+
+        assert len(statements) == small_count
+        assert len(small) == 2
+        assert all(len(transaction["attachments"]) == 1 for transaction in large)
+        assert large[0]["attachments"][0]["filename"] == "receipt.pdf"
+
+    def test_images_without_pillow_have_no_thumbnail(self, client: TestClient, auth_headers: dict,
+                                                     session: Session, test_user: User, test_user_2: User,
+                                                     test_group: Group, storage_dir: Path, monkeypatch):
+        """Test that images are stored as they are when thumbnails can't be rendered"""
+        monkeypatch.setattr(attachment_thumbnails, "Image", None)
+        transaction = add_expense(session, test_group, test_user, test_user_2, 1000)
+
+        attachment = upload(client, auth_headers, transaction, content=b"\x89PNG not really",
+                            filename="receipt.png", content_type="image/png").json()
+
+        assert attachment["has_thumbnail"] is False
+        response = client.get(
+            f"/transactions/{transaction.id}/attachments/{attachment['id']}/thumbnail", headers=auth_headers)
+        assert response.status_code == 404
+
+    def test_image_thumbnail(self, client: TestClient, auth_headers: dict, session: Session,
+                             test_user: User, test_user_2: User, test_group: Group, storage_dir: Path):
+        """Test that image uploads get a JPEG thumbnail rendered in the process pool"""
+        image = pytest.importorskip("PIL.Image")
+        buffer = io.BytesIO()
+        image.new("RGB", (1200, 800), "white").save(buffer, format="PNG")
+        transaction = add_expense(session, test_group, test_user, test_user_2, 1000)
+
+        attachment = upload(client, auth_headers, transaction, content=buffer.getvalue(),
+                            filename="receipt.png", content_type="image/png").json()
+
+        assert attachment["has_thumbnail"] is True
+        response = client.get(
+            f"/transactions/{transaction.id}/attachments/{attachment['id']}/thumbnail", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/jpeg"
+        with image.open(io.BytesIO(response.content)) as thumbnail:
+            assert max(thumbnail.size) == 320
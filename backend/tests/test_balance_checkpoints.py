@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.database.models.balance_checkpoint import BalanceCheckpoint, BalanceCheckpointEntry
+from app.database.models.group import Group
+from app.database.models.pairwise_balance import PairwiseBalance, PairwiseBalanceVersion
+from app.database.models.user import User
+from app.jobs.balance_checkpoints import roll_checkpoints_forward
+from app.services.balance_checkpoint import BalanceCheckpointService
+from app.services.pairwise_balance import PairwiseBalanceService
+from tests.conftest import add_expense
+
+
+def ledger(session: Session, group: Group) -> dict:
+    return {
+        (row.user_a, row.user_b): row.net_amount
+        for row in session.exec(select(PairwiseBalance).where(
+            PairwiseBalance.group_id == group.id)).all()
+        if row.net_amount != 0
+    }
+
+
+class TestBalanceCheckpoints:
+    """Tests for checkpoint roll-forward and invalidation"""
+
+    def test_checkpoint_plus_deltas_matches_ledger(self, session: Session, test_user: User,
+                                                   test_user_2: User, test_group: Group):
+        """Test that checkpoint entries plus later transactions equal the ledger"""
+        now = datetime.now(timezone.utc)
+        add_expense(session, test_group, test_user, test_user_2,
+                    1000, now - timedelta(days=60))
+        add_expense(session, test_group, test_user_2, test_user,
+                    300, now - timedelta(days=40))
+
+        rolled = roll_checkpoints_forward(session, now - timedelta(days=30))
+        assert rolled == 1
+
+        add_expense(session, test_group, test_user, test_user_2,
+                    200, now - timedelta(days=1))
+
+        entries = session.exec(select(BalanceCheckpointEntry)).all()
+        assert {(e.user_a, e.user_b): e.net_amount for e in entries} == {
+            (test_user.id, test_user_2.id): 1000,
+            (test_user_2.id, test_user.id): 300,
+        }
+
+        balances = BalanceCheckpointService.compute_group_balances(
+            session.connection(), test_group.id)
+        assert dict(balances) == ledger(session, test_group)
+
+    def test_roll_forward_is_incremental(self, session: Session, test_user: User,
+                                         test_user_2: User, test_group: Group):
+        """Test that rolling forward again adds only the newer transactions"""
+        now = datetime.now(timezone.utc)
+        add_expense(session, test_group, test_user, test_user_2,
+                    500, now - timedelta(days=60))
+        roll_checkpoints_forward(session, now - timedelta(days=50))
+        add_expense(session, test_group, test_user, test_user_2,
+                    250, now - timedelta(days=40))
+
+        # Rolling to the same point again is a no-op
+        assert roll_checkpoints_forward(
+            session, now - timedelta(days=50)) == 0
+        assert roll_checkpoints_forward(
+            session, now - timedelta(days=30)) == 1
+
+        entry = session.exec(select(BalanceCheckpointEntry)).one()
+        assert entry.net_amount == 750
+
+    def test_recent_write_keeps_checkpoint(self, session: Session, test_user: User,
+                                           test_user_2: User, test_group: Group):
+        """Test that transactions after the checkpoint leave it in place"""
+        now = datetime.now(timezone.utc)
+        add_expense(session, test_group, test_user, test_user_2,
+                    500, now - timedelta(days=60))
+        roll_checkpoints_forward(session, now - timedelta(days=30))
+
+        add_expense(session, test_group, test_user_2, test_user, 100, now)
+
+        assert session.get(BalanceCheckpoint, test_group.id) is not None
+
+    def test_old_edit_invalidates_checkpoint(self, client: TestClient, auth_headers: dict, session: Session,
+                                             test_user: User, test_user_2: User, test_group: Group):
+        """Test that editing a transaction covered by the checkpoint drops it"""
+        now = datetime.now(timezone.utc)
+        old = add_expense(session, test_group, test_user,
+                          test_user_2, 500, now - timedelta(days=60))
+        roll_checkpoints_forward(session, now - timedelta(days=30))
+
+        response = client.delete(
+            f"/transactions/{old.id}", headers=auth_headers)
+        assert response.status_code == 204
+
+        assert session.get(BalanceCheckpoint, test_group.id) is None
+        assert session.exec(select(BalanceCheckpointEntry)).all() == []
+        assert BalanceCheckpointService.compute_group_balances(
+            session.connection(), test_group.id) == {}
+
+    def test_roll_forward_locks_group_version_row(self, session: Session, test_group: Group):
+        """Test that rolling forward creates the group's version row so there is one to lock"""
+        assert session.get(PairwiseBalanceVersion, test_group.id) is None
+
+        assert BalanceCheckpointService.roll_forward(
+            session.connection(), test_group.id, datetime.now(timezone.utc))
+        session.commit()
+
+        assert session.get(PairwiseBalanceVersion, test_group.id) is not None
+
+    def test_rebuild_group_ledger(self, session: Session, test_user: User,
+                                  test_user_2: User, test_group: Group):
+        """Test that a group's ledger can be rebuilt from checkpoint and deltas"""
+        now = datetime.now(timezone.utc)
+        add_expense(session, test_group, test_user, test_user_2,
+                    800, now - timedelta(days=60))
+        roll_checkpoints_forward(session, now - timedelta(days=30))
+        add_expense(session, test_group, test_user_2, test_user, 300, now)
+        expected = ledger(session, test_group)
+
+        session.connection().execute(PairwiseBalance.__table__.update().values(
+            net_amount=PairwiseBalance.__table__.c.net_amount + 1))
+        PairwiseBalanceService.rebuild_group(
+            session.connection(), test_group.id)
+        session.commit()
+
+        assert ledger(session, test_group) == expected
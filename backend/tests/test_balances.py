@@ -1,10 +1,16 @@
+from datetime import datetime
+from uuid import UUID
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from sqlalchemy import event
+from sqlmodel import Session, select
 
 from app.database.models.group import Group
 from app.database.models.user import User
 from app.database.models.transaction import Transaction, TransactionType
 from app.database.models.transaction_participant import TransactionParticipant
+from app.database.models.pairwise_balance import PairwiseBalance
+from app.services.balance import BalanceService
+from tests.conftest import add_expense
 
 
 class TestBalanceEndpoints:
@@ -259,6 +265,48 @@ class TestBalanceEndpoints:
         assert balance_data["total_owed_to_others"] == 0
         assert balance_data["total_balance"] == 1500
 
+    def test_get_balances_per_group_totals(self, client: TestClient, auth_headers: dict, session: Session,
+                                           test_user: User, test_user_2: User, test_group: Group):
+        """Test that the global balance includes the totals of every group"""
+        group2 = Group(name="Second Test Group", users=[test_user, test_user_2])
+        session.add(group2)
+        test_group.users.append(test_user_2)
+        session.add(test_group)
+        session.commit()
+
+        for group, payer, debtor, amount in [
+            (test_group, test_user, test_user_2, 1000),
+            (group2, test_user_2, test_user, 300),
+            (group2, test_user, test_user_2, 100),
+        ]:
+            session.add(Transaction(
+                amount=amount,
+                title="Per group transaction",
+                transaction_type=TransactionType.AMOUNT,
+                group_id=group.id,
+                payer_id=payer.id,
+                participants=[TransactionParticipant(
+                    debtor_id=debtor.id, amount_owed=amount)]
+            ))
+        session.commit()
+
+        response = client.get("/balances/", headers=auth_headers)
+
+        assert response.status_code == 200
+        balance_data = response.json()
+        assert balance_data["total_balance"] == 800
+        assert len(balance_data["user_balances"]) == 1
+        assert balance_data["user_balances"][0]["balance"] == 800
+
+        groups = {group["group_id"]: group for group in balance_data["groups"]}
+        assert groups[str(test_group.id)]["total_balance"] == 1000
+        assert groups[str(group2.id)] == {
+            "group_id": str(group2.id),
+            "total_balance": -200,
+            "total_owed_by_others": 100,
+            "total_owed_to_others": 300
+        }
+
     def test_get_balances_no_debt_relationships(self, client: TestClient, auth_headers: dict, session: Session,
                                                 test_user: User, test_user_2: User, test_group: Group):
         """Test getting balances when user only pays for themselves"""
@@ -299,3 +347,308 @@ class TestBalanceEndpoints:
         assert balance_data["total_owed_by_others"] == 0
         assert balance_data["total_owed_to_others"] == 0
         assert balance_data["user_balances"] == []
+
+
+class TestPairwiseBalanceLedger:
+    """Tests that the pairwise ledger follows every transaction write"""
+
+    def _create_transaction(self, client: TestClient, auth_headers: dict, group: Group,
+                            payer: User, debtor: User, amount_owed: int) -> dict:
+        response = client.post("/transactions/", json={
+            "amount": amount_owed * 2,
+            "title": "Ledger transaction",
+            "transaction_type": "EVEN",
+            "group_id": str(group.id),
+            "payer_id": str(payer.id),
+            "participants": [
+                {"debtor_id": str(payer.id), "amount_owed": amount_owed},
+                {"debtor_id": str(debtor.id), "amount_owed": amount_owed}
+            ]
+        }, headers=auth_headers)
+        assert response.status_code == 201
+        return response.json()
+
+    def test_ledger_created_with_transaction(self, client: TestClient, auth_headers: dict, session: Session,
+                                             test_user: User, test_user_2: User, test_group: Group):
+        """Test that creating a transaction records what the debtor owes the payer"""
+        test_group.users.append(test_user_2)
+        session.add(test_group)
+        session.commit()
+
+        self._create_transaction(
+            client, auth_headers, test_group, test_user, test_user_2, 1200)
+
+        rows = session.exec(select(PairwiseBalance)).all()
+        # The payer's own share is not a debt
+        assert len(rows) == 1
+        assert rows[0].group_id == test_group.id
+        assert rows[0].user_a == test_user.id
+        assert rows[0].user_b == test_user_2.id
+        assert rows[0].net_amount == 1200
+
+    def test_ledger_follows_participant_update(self, client: TestClient, auth_headers: dict, session: Session,
+                                               test_user: User, test_user_2: User, test_group: Group):
+        """Test that changing an owed amount adjusts the ledger by the difference"""
+        test_group.users.append(test_user_2)
+        session.add(test_group)
+        session.commit()
+
+        created = self._create_transaction(
+            client, auth_headers, test_group, test_user, test_user_2, 1000)
+        self._create_transaction(
+            client, auth_headers, test_group, test_user, test_user_2, 500)
+
+        participant = session.exec(select(TransactionParticipant).where(
+            TransactionParticipant.transaction_id == UUID(created["id"]),
+            TransactionParticipant.debtor_id == test_user_2.id
+        )).one()
+        participant.amount_owed = 300
+        session.add(participant)
+        session.commit()
+
+        response = client.get("/balances/", headers=auth_headers)
+        assert response.json()["total_owed_by_others"] == 800
+
+    def test_ledger_follows_payer_change(self, client: TestClient, auth_headers: dict, session: Session,
+                                         test_user: User, test_user_2: User, test_group: Group):
+        """Test that moving a transaction to another payer reverses the debt"""
+        test_group.users.append(test_user_2)
+        session.add(test_group)
+        session.commit()
+
+        created = self._create_transaction(
+            client, auth_headers, test_group, test_user, test_user_2, 1000)
+
+        response = client.put(f"/transactions/{created['id']}", json={
+            "payer_id": str(test_user_2.id)
+        }, headers=auth_headers)
+        assert response.status_code == 200
+
+        balance = client.get("/balances/", headers=auth_headers).json()
+        # test_user now owes their own 1000 share to test_user_2
+        assert balance["total_owed_by_others"] == 0
+        assert balance["total_owed_to_others"] == 1000
+        assert balance["total_balance"] == -1000
+
+    def test_ledger_follows_transaction_delete(self, client: TestClient, auth_headers: dict, session: Session,
+                                               test_user: User, test_user_2: User, test_group: Group):
+        """Test that deleting a transaction removes its debt from the ledger"""
+        test_group.users.append(test_user_2)
+        session.add(test_group)
+        session.commit()
+
+        created = self._create_transaction(
+            client, auth_headers, test_group, test_user, test_user_2, 1000)
+        self._create_transaction(
+            client, auth_headers, test_group, test_user, test_user_2, 250)
+
+        response = client.delete(
+            f"/transactions/{created['id']}", headers=auth_headers)
+        assert response.status_code == 204
+
+        balance = client.get("/balances/", headers=auth_headers).json()
+        assert balance["total_balance"] == 250
+        assert len(balance["user_balances"]) == 1
+        assert balance["user_balances"][0]["balance"] == 250
+
+    def test_ledger_cleared_on_group_delete(self, client: TestClient, auth_headers: dict, session: Session,
+                                            test_user: User, test_user_2: User, test_group: Group):
+        """Test that deleting a group drops its ledger rows"""
+        test_group.users.append(test_user_2)
+        session.add(test_group)
+        session.commit()
+
+        self._create_transaction(
+            client, auth_headers, test_group, test_user, test_user_2, 1000)
+
+        response = client.delete(
+            f"/groups/{test_group.id}", headers=auth_headers)
+        assert response.status_code == 204
+
+        assert session.exec(select(PairwiseBalance)).all() == []
+
+
+class TestGroupBalanceEndpoints:
+    """Integration tests for the whole-group balance endpoint"""
+
+    def test_group_balances_empty(self, client: TestClient, auth_headers: dict,
+                                  test_user: User, test_group: Group):
+        """Test that members without transactions have a zero balance"""
+        response = client.get(
+            f"/groups/{test_group.id}/balances", headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["group_id"] == str(test_group.id)
+        assert data["debts"] == []
+        assert len(data["members"]) == 1
+        assert data["members"][0]["user"]["id"] == str(test_user.id)
+        assert data["members"][0]["balance"] == 0
+
+    def test_group_balances_nets_pairs(self, client: TestClient, auth_headers: dict, session: Session,
+                                       test_user: User, test_user_2: User, test_group: Group):
+        """Test that debts in both directions are netted per pair"""
+        test_group.users.append(test_user_2)
+        session.add(test_group)
+        session.commit()
+
+        for payer, debtor, amount in [(test_user, test_user_2, 1000), (test_user_2, test_user, 400)]:
+            session.add(Transaction(
+                amount=amount,
+                title="Group balance transaction",
+                transaction_type=TransactionType.AMOUNT,
+                group_id=test_group.id,
+                payer_id=payer.id,
+                participants=[TransactionParticipant(
+                    debtor_id=debtor.id, amount_owed=amount)]
+            ))
+        session.commit()
+
+        response = client.get(
+            f"/groups/{test_group.id}/balances", headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        members = {member["user"]["id"]: member["balance"]
+                   for member in data["members"]}
+        assert members == {str(test_user.id): 600, str(test_user_2.id): -600}
+        assert data["debts"] == [{
+            "creditor_id": str(test_user.id),
+            "debtor_id": str(test_user_2.id),
+            "amount": 600
+        }]
+
+    def test_group_balances_not_member(self, client: TestClient, auth_headers: dict, session: Session):
+        """Test that only members can see the group's balances"""
+        other_group = Group(name="Other Group")
+        session.add(other_group)
+        session.commit()
+
+        response = client.get(
+            f"/groups/{other_group.id}/balances", headers=auth_headers)
+
+        assert response.status_code == 403
+
+class TestBalanceService:
+    """Tests for the balance read path"""
+
+    def test_calculate_balance_single_query(self, engine, session: Session,
+                                            test_user: User, test_user_2: User, test_group: Group):
+        """Test that totals and per-user balances come from one statement"""
+        test_group.users.append(test_user_2)
+        session.add(test_group)
+        session.commit()
+
+        for payer, debtor, amount in [(test_user, test_user_2, 900), (test_user_2, test_user, 400)]:
+            session.add(Transaction(
+                amount=amount,
+                title="Single query transaction",
+                transaction_type=TransactionType.AMOUNT,
+                group_id=test_group.id,
+                payer_id=payer.id,
+                participants=[TransactionParticipant(
+                    debtor_id=debtor.id, amount_owed=amount)]
+            ))
+        session.commit()
+        user_id, group_id = test_user.id, test_group.id
+
+        statements = []
+
+        def record_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record_statement)
+        try:
+            balance = BalanceService.calculate_balance(
+                session, user_id, group_id)
+        finally:
+            event.remove(engine, "before_cursor_execute", record_statement)
+
+        assert len(statements) == 1
+        assert balance.total_owed_by_others == 900
+        assert balance.total_owed_to_others == 400
+        assert balance.total_balance == 500
+        assert len(balance.user_balances) == 1
+        assert balance.user_balances[0].balance == 500
+
+
+class TestBalanceHistoryEndpoints:
+    """Integration tests for the balance history endpoint"""
+
+    def test_history_empty(self, client: TestClient, auth_headers: dict, test_group: Group):
+        """Test that a user without transactions has an empty history"""
+        response = client.get(
+            f"/balances/history?group_id={test_group.id}", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.json() == []
+
+    def test_history_daily_running_balance(self, client: TestClient, auth_headers: dict, session: Session,
+                                           test_user: User, test_user_2: User, test_group: Group):
+        """Test that daily buckets carry the change and the running balance"""
+        test_group.users.append(test_user_2)
+        session.add(test_group)
+        session.commit()
+
+        add_expense(session, test_group, test_user, test_user_2,
+                  1000, datetime(2025, 3, 1, 10))
+        add_expense(session, test_group, test_user, test_user_2,
+                  500, datetime(2025, 3, 1, 18))
+        add_expense(session, test_group, test_user_2, test_user,
+                  2000, datetime(2025, 3, 4, 12))
+
+        response = client.get(
+            f"/balances/history?group_id={test_group.id}&bucket=day", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.json() == [
+            {"bucket": "2025-03-01", "change": 1500, "balance": 1500},
+            {"bucket": "2025-03-04", "change": -2000, "balance": -500},
+        ]
+
+    def test_history_week_and_month_buckets(self, client: TestClient, auth_headers: dict, session: Session,
+                                            test_user: User, test_user_2: User, test_group: Group):
+        """Test that weeks start on Monday and months on the first"""
+        test_group.users.append(test_user_2)
+        session.add(test_group)
+        session.commit()
+
+        # Wednesday and the following Sunday share the week of Monday 2025-03-03
+        add_expense(session, test_group, test_user, test_user_2,
+                  100, datetime(2025, 3, 5, 9))
+        add_expense(session, test_group, test_user, test_user_2,
+                  200, datetime(2025, 3, 9, 9))
+        add_expense(session, test_group, test_user, test_user_2,
+                  300, datetime(2025, 4, 2, 9))
+
+        weeks = client.get(
+            "/balances/history?bucket=week", headers=auth_headers).json()
+        assert weeks == [
+            {"bucket": "2025-03-03", "change": 300, "balance": 300},
+            {"bucket": "2025-03-31", "change": 300, "balance": 600},
+        ]
+
+        months = client.get(
+            "/balances/history?bucket=month", headers=auth_headers).json()
+        assert months == [
+            {"bucket": "2025-03-01", "change": 300, "balance": 300},
+            {"bucket": "2025-04-01", "change": 300, "balance": 600},
+        ]
+
+    def test_history_invalid_bucket(self, client: TestClient, auth_headers: dict):
+        """Test that unknown bucket sizes are rejected"""
+        response = client.get(
+            "/balances/history?bucket=year", headers=auth_headers)
+
+        assert response.status_code == 422
+
+    def test_history_not_member(self, client: TestClient, auth_headers: dict, session: Session):
+        """Test that the history of a foreign group is forbidden"""
+        other_group = Group(name="Other Group")
+        session.add(other_group)
+        session.commit()
+
+        response = client.get(
+            f"/balances/history?group_id={other_group.id}", headers=auth_headers)
+
+        assert response.status_code == 403
@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.database.models.group import Group
+from app.database.models.transaction import Transaction, TransactionType
+from app.database.models.user import User
+from app.services import transaction_export
+from tests.conftest import add_expense
+
+
+def export(client: TestClient, auth_headers: dict, group: Group, format: str) -> str:
+    response = client.get(f"/groups/{group.id}/export",
+                          params={"format": format}, headers=auth_headers)
+    assert response.status_code == 200
+    assert f"transactions-{group.id}.{format}" in response.headers["content-disposition"]
+    return response.text
+
+
+class TestGroupExport:
+    """Integration tests for the streaming transaction export"""
+
+    def test_csv_has_a_row_per_participant(self, client: TestClient, auth_headers: dict, session: Session,
+                                           test_user: User, test_user_2: User, test_group: Group):
+        """Test that the CSV export repeats each transaction for each of its participants"""
+        transaction = add_expense(
+            session, test_group, test_user, test_user_2, 1000)
+        session.add(Transaction(amount=0, title="No split", transaction_type=TransactionType.EVEN,
+                                group_id=test_group.id, payer_id=test_user.id, participants=[]))
+        session.commit()
+
+        rows = list(csv.DictReader(io.StringIO(
+            export(client, auth_headers, test_group, "csv"))))
+
+        assert len(rows) == 2
+        row = next(row for row in rows if row["transaction_id"] == str(transaction.id))
+        assert row["payer_username"] == test_user.username
+        assert row["debtor_username"] == test_user_2.username
+        assert row["amount_owed"] == "1000"
+        empty = next(row for row in rows if row["title"] == "No split")
+        assert empty["debtor_id"] == "" and empty["amount_owed"] == ""
+
+    def test_ndjson_nests_participants(self, client: TestClient, auth_headers: dict, session: Session,
+                                       test_user: User, test_user_2: User, test_group: Group,
+                                       monkeypatch):
+        """Test that NDJSON has one line per transaction across fetch batches"""
+        monkeypatch.setattr(transaction_export, "EXPORT_FETCH_SIZE", 2)
+        for amount in (100, 200, 300, 400, 500):
+            add_expense(session, test_group, test_user, test_user_2, amount)
+
+        lines = [json.loads(line) for line in export(
+            client, auth_headers, test_group, "ndjson").splitlines()]
+
+        assert sorted(line["amount"] for line in lines) == [100, 200, 300, 400, 500]
+        assert all(line["participants"] == [{
+            "debtor": {"id": str(test_user_2.id), "username": test_user_2.username},
+            "amount_owed": line["amount"]
+        }] for line in lines)
+
+    def test_export_requires_membership(self, client: TestClient, auth_headers: dict, session: Session,
+                                        test_user_2: User):
+        """Test that other groups can't be exported"""
+        other_group = Group(name="Other Group", users=[test_user_2])
+        session.add(other_group)
+        session.commit()
+
+        response = client.get(
+            f"/groups/{other_group.id}/export", headers=auth_headers)
+
+        assert response.status_code == 403
@@ -0,0 +1,129 @@
+import io
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.database.models.group import Group
+from app.database.models.transaction import Transaction
+from app.database.models.transaction_participant import TransactionParticipant
+from app.database.models.user import User
+from app.services import transaction_import
+from tests.conftest import add_expense
+
+
+def import_csv(client: TestClient, auth_headers: dict, group: Group, content: str | bytes):
+    if isinstance(content, str):
+        content = content.encode()
+    return client.post(f"/groups/{group.id}/import", headers=auth_headers,
+                       files={"file": ("transactions.csv", io.BytesIO(content), "text/csv")})
+
+
+class TestGroupImport:
+    """Integration tests for the CSV transaction import"""
+
+    def test_export_round_trips(self, client: TestClient, auth_headers: dict, session: Session,
+                                test_user: User, test_user_2: User, test_group: Group):
+        """Test that a group's export imports into another group as new transactions"""
+        test_group.users.append(test_user_2)
+        other_group = Group(name="Other Group", users=[test_user, test_user_2])
+        session.add(other_group)
+        session.commit()
+        add_expense(session, test_group, test_user, test_user_2, 1000)
+        add_expense(session, test_group, test_user_2, test_user, 400)
+        exported = client.get(
+            f"/groups/{test_group.id}/export", headers=auth_headers).text
+
+        response = import_csv(client, auth_headers, other_group, exported)
+
+        assert response.status_code == 200
+        assert response.json() == {"imported": 2, "failed": 0, "errors": []}
+        debts = client.get(f"/groups/{other_group.id}/balances",
+                           headers=auth_headers).json()["debts"]
+        assert debts == [{"creditor_id": str(test_user.id),
+                          "debtor_id": str(test_user_2.id), "amount": 600}]
+        assert len(session.exec(select(Transaction)).all()) == 4
+
+    def test_rows_refer_to_members_by_username(self, client: TestClient, auth_headers: dict, session: Session,
+                                               test_user: User, test_user_2: User, test_group: Group):
+        """Test that rows without a transaction id each become a transaction"""
+        test_group.users.append(test_user_2)
+        session.commit()
+
+        response = import_csv(client, auth_headers, test_group, (
+            "title,amount,transaction_type,purchased_on,payer_username,debtor_username,amount_owed\n"
+            f"Dinner,3000,AMOUNT,2024-05-01T19:00:00Z,{test_user.username},{test_user_2.username},1500\n"
+            f"Taxi,1200,,,{test_user_2.username},{test_user.username},600\n"
+        ))
+
+        assert response.json()["imported"] == 2
+        transactions = {transaction.title: transaction for transaction in session.exec(
+            select(Transaction)).all()}
+        assert transactions["Dinner"].purchased_on.year == 2024
+        assert transactions["Taxi"].payer_id == test_user_2.id
+
+    def test_invalid_rows_are_reported(self, client: TestClient, auth_headers: dict, session: Session,
+                                       test_user: User, test_user_2: User, test_user_3: User,
+                                       test_group: Group):
+        """Test that invalid transactions are skipped and reported by line"""
+        test_group.users.append(test_user_2)
+        session.commit()
+
+        response = import_csv(client, auth_headers, test_group, (
+            "transaction_id,title,amount,payer_id,debtor_id,amount_owed\n"
+            f"a,Valid,1000,{test_user.id},{test_user_2.id},500\n"
+            f"a,Valid,1000,{test_user.id},{test_user.id},500\n"
+            f"b,Bad amount,ten,{test_user.id},{test_user_2.id},10\n"
+            f"c,Outsider,1000,{test_user.id},{test_user_3.id},1000\n"
+            f"d,Unknown,1000,{test_user.id},,\n"
+        ))
+
+        result = response.json()
+        assert result["imported"] == 2
+        assert result["failed"] == 2
+        assert [error["line"] for error in result["errors"]] == [4, 5]
+        assert result["errors"][0]["detail"].startswith("amount:")
+        valid = session.exec(select(Transaction).where(
+            Transaction.title == "Valid")).one()
+        assert valid.amount == 1000
+
+    def test_batches_are_written_in_turn(self, client: TestClient, auth_headers: dict, session: Session,
+                                         test_user: User, test_user_2: User, test_group: Group, monkeypatch):
+        """Test that imports larger than a batch are written completely"""
+        monkeypatch.setattr(transaction_import, "IMPORT_BATCH_SIZE", 2)
+        test_group.users.append(test_user_2)
+        session.commit()
+        rows = "".join(
+            f"Expense {index},{index},{test_user.id},{test_user_2.id},{index}\n" for index in range(1, 6))
+
+        response = import_csv(client, auth_headers, test_group,
+                              "title,amount,payer_id,debtor_id,amount_owed\n" + rows)
+
+        assert response.json()["imported"] == 5
+        stats = client.get(f"/groups/{test_group.id}/stats",
+                           headers=auth_headers).json()
+        assert stats["total"] == 15 and stats["count"] == 5
+
+    def test_unusable_files_are_rejected(self, client: TestClient, auth_headers: dict, session: Session,
+                                         test_group: Group):
+        """Test that files without the required columns or not in UTF-8 are rejected whole"""
+        assert import_csv(client, auth_headers, test_group,
+                          "title,amount\nLunch,100\n").status_code == 400
+        assert import_csv(client, auth_headers, test_group,
+                          "title,amount,payer_id\n\xe9\n".encode("latin-1")).status_code == 400
+        assert session.exec(select(Transaction)).all() == []
+
+    def test_empty_amounts_are_split(self, client: TestClient, auth_headers: dict, session: Session,
+                                     test_user: User, test_user_2: User, test_group: Group):
+        """Test that participants without amount_owed are split by percentage"""
+        test_group.users.append(test_user_2)
+        session.commit()
+
+        response = import_csv(client, auth_headers, test_group, (
+            "transaction_id,title,amount,transaction_type,payer_id,debtor_id,amount_owed,percentage\n"
+            f"a,Rent,1001,PERCENTAGE,{test_user.id},{test_user.id},,70\n"
+            f"a,Rent,1001,PERCENTAGE,{test_user.id},{test_user_2.id},,30\n"
+        ))
+
+        assert response.json()["imported"] == 1
+        owed = session.exec(select(TransactionParticipant.debtor_id, TransactionParticipant.amount_owed)).all()
+        assert dict(owed) == {test_user.id: 701, test_user_2.id: 300}
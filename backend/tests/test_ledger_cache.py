@@ -0,0 +1,131 @@
+from datetime import datetime, timezone
+from typing import Generator
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.database.models.group import Group
+from app.database.models.pairwise_balance import PairwiseBalance
+from app.database.models.user import User
+from app.services.ledger_cache import GroupLedger, LedgerCache, ledger_cache
+from app.services.pairwise_balance import PairwiseBalanceService
+from tests.conftest import add_expense
+
+
+@pytest.fixture(name="cache")
+def cache_fixture() -> Generator[LedgerCache, None, None]:
+    ledger_cache.configure(1 << 20)
+    yield ledger_cache
+    ledger_cache.configure(0)
+
+
+def group_balances(client: TestClient, auth_headers: dict, group: Group) -> dict:
+    response = client.get(f"/groups/{group.id}/balances", headers=auth_headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestLedgerCache:
+    """Tests for the in-memory group ledger"""
+
+    def test_cached_reads_match_database(self, client: TestClient, auth_headers: dict, session: Session,
+                                         cache: LedgerCache, test_user: User, test_user_2: User,
+                                         test_group: Group):
+        """Test that balances served from memory equal the SQL computation"""
+        test_group.users.append(test_user_2)
+        session.commit()
+        now = datetime.now(timezone.utc)
+        add_expense(session, test_group, test_user, test_user_2, 1000, now)
+        add_expense(session, test_group, test_user_2, test_user, 400, now)
+
+        cached = group_balances(client, auth_headers, test_group)
+        assert test_group.id in cache
+        cache.configure(0)
+        assert group_balances(client, auth_headers, test_group) == cached
+
+        cache.configure(1 << 20)
+        response = client.get(f"/groups/{test_group.id}", headers=auth_headers)
+        assert response.json()["balance"]["total_balance"] == 600
+
+    def test_writes_patch_cached_ledger(self, client: TestClient, auth_headers: dict, session: Session,
+                                        cache: LedgerCache, test_user: User, test_user_2: User,
+                                        test_group: Group):
+        """Test that a write in this process updates the cached ledger in place"""
+        now = datetime.now(timezone.utc)
+        add_expense(session, test_group, test_user, test_user_2, 1000, now)
+        group_balances(client, auth_headers, test_group)
+        ledger = cache._ledgers[test_group.id]
+
+        add_expense(session, test_group, test_user, test_user_2, 500, now)
+
+        assert cache._ledgers[test_group.id] is ledger
+        debts = group_balances(client, auth_headers, test_group)["debts"]
+        assert debts == [{"creditor_id": str(test_user.id),
+                          "debtor_id": str(test_user_2.id), "amount": 1500}]
+        assert cache._ledgers[test_group.id] is ledger
+
+    def test_version_change_reloads_ledger(self, client: TestClient, auth_headers: dict, session: Session,
+                                           cache: LedgerCache, test_user: User, test_user_2: User,
+                                           test_group: Group):
+        """Test that a ledger changed elsewhere is reloaded instead of served stale"""
+        add_expense(session, test_group, test_user, test_user_2,
+                    1000, datetime.now(timezone.utc))
+        group_balances(client, auth_headers, test_group)
+
+        # What another worker's write looks like from this process
+        connection = session.connection()
+        connection.execute(PairwiseBalance.__table__.update().values(net_amount=700))
+        PairwiseBalanceService.bump_versions(connection, [test_group.id])
+        session.commit()
+
+        debts = group_balances(client, auth_headers, test_group)["debts"]
+        assert debts[0]["amount"] == 700
+
+    def test_least_recently_used_group_is_evicted(self, client: TestClient, auth_headers: dict,
+                                                  session: Session, cache: LedgerCache, test_user: User,
+                                                  test_user_2: User, test_group: Group):
+        """Test that the memory budget evicts the coldest group"""
+        other_group = Group(name="Other Group", users=[test_user, test_user_2])
+        session.add(other_group)
+        session.commit()
+        now = datetime.now(timezone.utc)
+        add_expense(session, test_group, test_user, test_user_2, 1000, now)
+        add_expense(session, other_group, test_user, test_user_2, 1000, now)
+
+        group_balances(client, auth_headers, test_group)
+        cache.max_bytes = cache._ledgers[test_group.id].nbytes
+        group_balances(client, auth_headers, other_group)
+
+        assert other_group.id in cache
+        assert test_group.id not in cache
+
+    def test_group_over_budget_falls_back_to_sql(self, client: TestClient, auth_headers: dict,
+                                                 session: Session, cache: LedgerCache, test_user: User,
+                                                 test_user_2: User, test_group: Group):
+        """Test that a ledger larger than the budget is never built and SQL answers instead"""
+        add_expense(session, test_group, test_user, test_user_2,
+                    1000, datetime.now(timezone.utc))
+        cache.max_bytes = 1
+
+        debts = group_balances(client, auth_headers, test_group)["debts"]
+
+        assert test_group.id not in cache
+        assert debts == [{"creditor_id": str(test_user.id),
+                          "debtor_id": str(test_user_2.id), "amount": 1000}]
+
+    def test_debts_net_open_pairs(self):
+        """Test that debts are read from the open pairs and netted per pair"""
+        user_ids = sorted(uuid4() for _ in range(3))
+        ledger = GroupLedger(None, [(user_ids[0], user_ids[1], 500),
+                                    (user_ids[1], user_ids[0], 200),
+                                    (user_ids[2], user_ids[1], 300)])
+
+        assert ledger.debts() == [(user_ids[0], user_ids[1], 300),
+                                  (user_ids[2], user_ids[1], 300)]
+
+        ledger.add([(user_ids[0], user_ids[1], -500)])
+        assert ledger.open_pairs == {1 * 3 + 0, 2 * 3 + 1}
+        assert ledger.debts() == [(user_ids[1], user_ids[0], 200),
+                                  (user_ids[2], user_ids[1], 300)]
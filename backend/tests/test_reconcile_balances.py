@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta, timezone
+
+import sqlalchemy as sa
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.database.models.balance_checkpoint import BalanceCheckpoint, BalanceCheckpointEntry
+from app.database.models.group import Group
+from app.database.models.pairwise_balance import PairwiseBalance
+from app.database.models.user import User
+from app.jobs.balance_checkpoints import roll_checkpoints_forward
+from app.database.seed import generate_dataset
+from app.jobs import reconcile_balances as reconcile_job
+from app.jobs.reconcile_balances import reconcile_balances
+from tests.conftest import add_expense
+
+
+class TestReconcileBalances:
+    """Tests for the balance reconciliation job"""
+
+    def test_consistent_balances_report_no_drift(self, engine, session: Session, test_user: User,
+                                                 test_user_2: User, test_group: Group):
+        """Test that a ledger maintained by the write path matches a recomputation"""
+        now = datetime.now(timezone.utc)
+        add_expense(session, test_group, test_user, test_user_2,
+                    1000, now - timedelta(days=60))
+        add_expense(session, test_group, test_user_2, test_user, 400, now)
+        roll_checkpoints_forward(session, now - timedelta(days=30))
+
+        assert list(reconcile_balances(engine)) == []
+
+    def test_ledger_drift_is_reported_and_repaired(self, engine, session: Session, test_user: User,
+                                                   test_user_2: User, test_group: Group):
+        """Test that a corrupted ledger row is reported and rebuilt with repair"""
+        add_expense(session, test_group, test_user, test_user_2,
+                    1000, datetime.now(timezone.utc))
+        session.connection().execute(
+            PairwiseBalance.__table__.update().values(net_amount=1))
+        session.commit()
+
+        drift, = reconcile_balances(engine)
+        assert drift.group_id == test_group.id
+        assert drift.ledger == {(test_user.id, test_user_2.id): (1, 1000)}
+        assert not drift.checkpoint
+        assert len(list(reconcile_balances(engine))) == 1
+
+        list(reconcile_balances(engine, repair=True))
+        assert list(reconcile_balances(engine)) == []
+        row = session.exec(select(PairwiseBalance)).one()
+        session.refresh(row)
+        assert row.net_amount == 1000
+
+    def test_checkpoint_drift_is_dropped(self, engine, session: Session, test_user: User,
+                                         test_user_2: User, test_group: Group):
+        """Test that a checkpoint disagreeing with raw transactions is removed on repair"""
+        now = datetime.now(timezone.utc)
+        add_expense(session, test_group, test_user, test_user_2,
+                    1000, now - timedelta(days=60))
+        roll_checkpoints_forward(session, now - timedelta(days=30))
+        session.connection().execute(
+            BalanceCheckpointEntry.__table__.update().values(net_amount=5))
+        session.commit()
+
+        drift, = reconcile_balances(engine, repair=True)
+        assert drift.checkpoint
+        assert drift.ledger == {}
+
+        assert session.exec(select(BalanceCheckpoint)).all() == []
+        assert list(reconcile_balances(engine)) == []
+
+    def test_worker_processes_repair_drift(self, tmp_path, monkeypatch):
+        """Test the process pool path against a file-backed database"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'reconcile.db'}")
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            dataset = generate_dataset(
+                session, users=40, groups=30, transactions=600)
+        # Several batches per worker so the bounded in-flight loop is used
+        monkeypatch.setattr(reconcile_job, "GROUP_BATCH_SIZE", 4)
+
+        with engine.begin() as connection:
+            connection.execute(sa.text(
+                "UPDATE pairwise_balances SET net_amount = net_amount + 1 WHERE rowid % 5 = 0"))
+            drifted_group_ids = set(connection.execute(sa.text(
+                "SELECT DISTINCT group_id FROM pairwise_balances WHERE rowid % 5 = 0")).scalars())
+
+        drifts = list(reconcile_balances(engine, repair=True, workers=2))
+
+        assert len(drifts) == len(drifted_group_ids) > 0
+        assert all(drift.ledger for drift in drifts)
+        assert {drift.group_id for drift in drifts} <= set(dataset.group_ids)
+        assert list(reconcile_balances(engine, workers=2)) == []
+        engine.dispose()
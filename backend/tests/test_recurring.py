@@ -0,0 +1,188 @@
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from app.database.models.group import Group
+from app.database.models.recurring_rule import RecurrenceFrequency, RecurringRule
+from app.database.models.transaction import Transaction
+from app.database.models.user import User
+from app.jobs.recurring_transactions import materialize_due
+from app.services.recurring_transactions import RecurringTransactionService, as_utc
+
+
+def create_template(client: TestClient, auth_headers: dict, group: Group, payer: User, debtor: User,
+                    amount: int, purchased_on: datetime) -> dict:
+    response = client.post("/transactions/", json={
+        "amount": amount,
+        "title": "Rent",
+        "transaction_type": "AMOUNT",
+        "group_id": str(group.id),
+        "payer_id": str(payer.id),
+        "purchased_on": purchased_on.isoformat(),
+        "participants": [{"debtor_id": str(debtor.id), "amount_owed": amount}]
+    }, headers=auth_headers)
+    assert response.status_code == 201
+    return response.json()
+
+
+def occurrences(session: Session) -> list[Transaction]:
+    session.expire_all()
+    return session.exec(select(Transaction).where(
+        Transaction.recurring_rule_id.is_not(None)).order_by(Transaction.occurrence)).all()
+
+
+def move_back(session: Session, rule_id: str, delta: timedelta) -> None:
+    """Let time pass for the rule by moving its schedule into the past"""
+    rule = session.get(RecurringRule, UUID(rule_id))
+    rule.starts_on -= delta
+    rule.next_occurrence = RecurringTransactionService.get_occurrence(rule, rule.occurrences)
+    session.commit()
+
+
+class TestRecurrenceSchedule:
+    """Occurrence times of recurring rules"""
+
+    def _rule(self, frequency: RecurrenceFrequency, starts_on: datetime, **kwargs) -> RecurringRule:
+        return RecurringRule(frequency=frequency, starts_on=starts_on, interval=kwargs.pop("interval", 1), **kwargs)
+
+    def test_months_are_clamped_to_their_last_day(self):
+        """Test that monthly and yearly rules fall back to the end of shorter months"""
+        monthly = self._rule(RecurrenceFrequency.MONTHLY, datetime(2024, 1, 31, 9, tzinfo=timezone.utc))
+        yearly = self._rule(RecurrenceFrequency.YEARLY, datetime(2024, 2, 29, 9, tzinfo=timezone.utc))
+
+        assert [RecurringTransactionService.get_occurrence(monthly, index).date().isoformat()
+                for index in range(4)] == ["2024-01-31", "2024-02-29", "2024-03-31", "2024-04-30"]
+        assert RecurringTransactionService.get_occurrence(yearly, 1).date().isoformat() == "2025-02-28"
+        assert RecurringTransactionService.get_occurrence(yearly, 4).date().isoformat() == "2028-02-29"
+
+    def test_count_and_until_end_the_rule(self):
+        """Test that occurrences stop after count or past until"""
+        starts_on = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        counted = self._rule(RecurrenceFrequency.WEEKLY, starts_on, interval=2, count=3)
+        bounded = self._rule(RecurrenceFrequency.DAILY, starts_on, until=datetime(2025, 1, 3, tzinfo=timezone.utc))
+
+        assert RecurringTransactionService.get_occurrence(counted, 2) == starts_on + timedelta(weeks=4)
+        assert RecurringTransactionService.get_occurrence(counted, 3) is None
+        assert RecurringTransactionService.get_occurrence(bounded, 2) == datetime(2025, 1, 3, tzinfo=timezone.utc)
+        assert RecurringTransactionService.get_occurrence(bounded, 3) is None
+
+
+class TestRecurringTransactions:
+    """Integration tests for recurring transactions"""
+
+    def test_past_templates_catch_up(self, client: TestClient, auth_headers: dict, session: Session,
+                                     test_user: User, test_user_2: User, test_group: Group):
+        """Test that a rule on a past template inserts the missed occurrences and nothing ahead"""
+        test_group.users.append(test_user_2)
+        session.commit()
+        now = datetime.now(timezone.utc)
+        template = create_template(client, auth_headers, test_group, test_user, test_user_2, 1000,
+                                   now - timedelta(days=20, hours=1))
+
+        response = client.post(f"/transactions/{template['id']}/recurrence/",
+                               json={"frequency": "WEEKLY"}, headers=auth_headers)
+
+        assert response.status_code == 201
+        rule = response.json()
+        assert rule["occurrences"] == 3
+        assert as_utc(datetime.fromisoformat(rule["next_occurrence"])) > now
+        assert [transaction.occurrence for transaction in occurrences(session)] == [1, 2]
+        balance = client.get("/balances/", headers=auth_headers).json()
+        assert balance["total_owed_by_others"] == 3000
+
+    def test_reads_materialize_due_occurrences(self, client: TestClient, auth_headers: dict, session: Session,
+                                               test_user: User, test_user_2: User, test_group: Group):
+        """Test that listings and balances see occurrences that became due since the last read"""
+        test_group.users.append(test_user_2)
+        session.commit()
+        template = create_template(client, auth_headers, test_group, test_user, test_user_2, 500,
+                                   datetime.now(timezone.utc))
+        rule = client.post(f"/transactions/{template['id']}/recurrence/",
+                           json={"frequency": "DAILY", "count": 3}, headers=auth_headers).json()
+        assert occurrences(session) == []
+
+        move_back(session, rule["id"], timedelta(days=5))
+
+        listed = client.get(f"/groups/{test_group.id}/transactions", headers=auth_headers).json()
+        assert len(listed) == 3
+        assert sorted(transaction["recurring_rule_id"] or "" for transaction in listed) == ["", rule["id"], rule["id"]]
+        group_balances = client.get(f"/groups/{test_group.id}/balances", headers=auth_headers).json()
+        assert {debt["amount"] for debt in group_balances["debts"]} == {1500}
+        stored = session.get(RecurringRule, UUID(rule["id"]))
+        assert (stored.occurrences, stored.next_occurrence) == (3, None)
+
+    def test_tick_takes_the_same_statements_for_any_number_of_rules(
+            self, engine, session: Session, test_user: User, test_user_2: User, test_group: Group):
+        """Test that a scheduler tick materializes every due rule with one set of bulk statements"""
+        now = datetime.now(timezone.utc)
+
+        def add_rules(count: int) -> None:
+            for _ in range(count):
+                template = Transaction(amount=100, title="Subscription", group_id=test_group.id,
+                                       payer_id=test_user.id, purchased_on=now - timedelta(days=1, minutes=1))
+                session.add(template)
+                session.flush()
+                session.add(RecurringRule(
+                    frequency=RecurrenceFrequency.DAILY, template_id=template.id, group_id=test_group.id,
+                    starts_on=template.purchased_on, next_occurrence=template.purchased_on + timedelta(days=1)))
+            session.commit()
+
+        def tick() -> list[str]:
+            statements = []
+
+            def record_statement(conn, cursor, statement, *args):
+                statements.append(statement)
+
+            event.listen(engine, "before_cursor_execute", record_statement)
+            try:
+                materialize_due(session, now)
+            finally:
+                event.remove(engine, "before_cursor_execute", record_statement)
+            return statements
+
+        add_rules(2)
+        few = tick()
+        add_rules(60)
+        many = tick()
+
+        assert len(few) == len(many)
+        assert len(occurrences(session)) == 62
+        assert session.exec(select(RecurringRule).where(RecurringRule.next_occurrence <= now)).all() == []
+
+    def test_rules_are_managed_by_the_payer(self, client: TestClient, auth_headers: dict, auth_headers_2: dict,
+                                            session: Session, test_user: User, test_user_2: User,
+                                            test_group: Group):
+        """Test that only the payer sets or removes a rule, once per transaction"""
+        test_group.users.append(test_user_2)
+        session.commit()
+        template = create_template(client, auth_headers, test_group, test_user, test_user_2, 500,
+                                   datetime.now(timezone.utc))
+        url = f"/transactions/{template['id']}/recurrence/"
+
+        assert client.post(url, json={"frequency": "MONTHLY"}, headers=auth_headers_2).status_code == 403
+        assert client.post(url, json={"frequency": "MONTHLY"}, headers=auth_headers).status_code == 201
+        assert client.post(url, json={"frequency": "MONTHLY"}, headers=auth_headers).status_code == 409
+        assert client.get(url, headers=auth_headers_2).json()["frequency"] == "MONTHLY"
+        assert client.delete(url, headers=auth_headers_2).status_code == 403
+        assert client.delete(url, headers=auth_headers).status_code == 204
+        assert client.get(url, headers=auth_headers).status_code == 404
+
+    def test_deleting_the_template_removes_the_rule(self, client: TestClient, auth_headers: dict,
+                                                    session: Session, test_user: User, test_user_2: User,
+                                                    test_group: Group):
+        """Test that the rule goes with its template while past occurrences stay"""
+        test_group.users.append(test_user_2)
+        session.commit()
+        template = create_template(client, auth_headers, test_group, test_user, test_user_2, 500,
+                                   datetime.now(timezone.utc) - timedelta(days=1, hours=1))
+        client.post(f"/transactions/{template['id']}/recurrence/",
+                    json={"frequency": "DAILY"}, headers=auth_headers)
+
+        response = client.delete(f"/transactions/{template['id']}", headers=auth_headers)
+
+        assert response.status_code == 204
+        assert session.exec(select(RecurringRule)).all() == []
+        assert len(occurrences(session)) == 1
@@ -0,0 +1,109 @@
+import random
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.database.models.group import Group
+from app.database.models.user import User
+from app.services.settlement import SettlementService
+from tests.conftest import add_expense
+
+
+class TestSettlementEndpoints:
+    """Integration tests for settle-up endpoints"""
+
+    def test_settle_plan_empty_group(self, client: TestClient, auth_headers: dict, test_group: Group):
+        """Test that a group without debts has nothing to settle"""
+        response = client.get(
+            f"/groups/{test_group.id}/settle-plan", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "group_id": str(test_group.id), "transfers": []}
+
+    def test_settle_plan_chain_collapses(self, client: TestClient, auth_headers: dict, session: Session,
+                                         test_user: User, test_user_2: User, test_user_3: User, test_group: Group):
+        """Test that a chain of debts is settled with a single transfer"""
+        test_group.users.extend([test_user_2, test_user_3])
+        session.add(test_group)
+        session.commit()
+
+        # user_3 owes user_2 and user_2 owes test_user the same amount
+        add_expense(session, test_group, test_user_2, test_user_3, 1000)
+        add_expense(session, test_group, test_user, test_user_2, 1000)
+
+        response = client.get(
+            f"/groups/{test_group.id}/settle-plan", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.json()["transfers"] == [{
+            "from_user_id": str(test_user_3.id),
+            "to_user_id": str(test_user.id),
+            "amount": 1000
+        }]
+
+    def test_settle_records_transactions(self, client: TestClient, auth_headers: dict, session: Session,
+                                         test_user: User, test_user_2: User, test_user_3: User, test_group: Group):
+        """Test that settling records the plan and leaves every balance at zero"""
+        test_group.users.extend([test_user_2, test_user_3])
+        session.add(test_group)
+        session.commit()
+
+        add_expense(session, test_group, test_user, test_user_2, 1500)
+        add_expense(session, test_group, test_user, test_user_3, 700)
+        add_expense(session, test_group, test_user_3, test_user, 200)
+
+        response = client.post(
+            f"/groups/{test_group.id}/settle", headers=auth_headers)
+
+        assert response.status_code == 201
+        assert len(response.json()["transfers"]) == 2
+
+        balance = client.get(
+            f"/groups/{test_group.id}", headers=auth_headers).json()["balance"]
+        assert balance["total_balance"] == 0
+        assert balance["user_balances"] == []
+
+        plan = client.get(
+            f"/groups/{test_group.id}/settle-plan", headers=auth_headers).json()
+        assert plan["transfers"] == []
+
+    def test_settle_already_settled(self, client: TestClient, auth_headers: dict, test_group: Group):
+        """Test that settling a group without debts fails"""
+        response = client.post(
+            f"/groups/{test_group.id}/settle", headers=auth_headers)
+
+        assert response.status_code == 400
+
+    def test_settle_plan_not_member(self, client: TestClient, auth_headers: dict, session: Session):
+        """Test that only members can see a group's settle plan"""
+        other_group = Group(name="Other Group")
+        session.add(other_group)
+        session.commit()
+
+        response = client.get(
+            f"/groups/{other_group.id}/settle-plan", headers=auth_headers)
+
+        assert response.status_code == 403
+
+
+class TestSettlementPlanner:
+    """Unit tests for the transfer planner"""
+
+    def test_plan_settles_every_balance(self):
+        """Test that applying the plan zeroes every balance"""
+        rng = random.Random(42)
+        balances = {uuid4(): rng.randint(-50_000, 50_000) for _ in range(200)}
+        first = next(iter(balances))
+        balances[first] -= sum(balances.values())
+
+        transfers = SettlementService.plan_transfers(balances)
+
+        remaining = dict(balances)
+        for transfer in transfers:
+            assert transfer.amount > 0
+            remaining[transfer.from_user_id] += transfer.amount
+            remaining[transfer.to_user_id] -= transfer.amount
+        assert all(amount == 0 for amount in remaining.values())
+        assert len(transfers) < len(balances)
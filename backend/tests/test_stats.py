@@ -0,0 +1,135 @@
+from datetime import datetime, timezone
+
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.database.models.group import Group
+from app.database.models.transaction import Transaction
+from app.database.models.transaction_stats import TransactionMonthlyTotal
+from app.database.models.user import User
+from app.database.seed import generate_dataset
+from tests.conftest import add_expense
+
+
+def group_stats(client: TestClient, auth_headers: dict, group: Group, **params) -> dict:
+    response = client.get(f"/groups/{group.id}/stats",
+                          params=params, headers=auth_headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def entries(stats: dict) -> list[tuple[str, str, int, int]]:
+    return [(entry["bucket"], entry["payer_id"], entry["total"], entry["count"])
+            for entry in stats["entries"]]
+
+
+def day(month: int, day: int) -> datetime:
+    return datetime(2025, month, day, 12, tzinfo=timezone.utc)
+
+
+class TestGroupStats:
+    """Integration tests for the group spending statistics"""
+
+    def test_monthly_stats_per_payer(self, client: TestClient, auth_headers: dict, session: Session,
+                                     test_user: User, test_user_2: User, test_group: Group):
+        """Test that spending is summed per month and payer"""
+        add_expense(session, test_group, test_user, test_user_2, 1000, day(1, 5))
+        add_expense(session, test_group, test_user, test_user_2, 500, day(1, 20))
+        add_expense(session, test_group, test_user_2, test_user, 300, day(1, 21))
+        add_expense(session, test_group, test_user, test_user_2, 700, day(3, 1))
+        user_id, user_2_id = str(test_user.id), str(test_user_2.id)
+
+        stats = group_stats(client, auth_headers, test_group)
+
+        assert sorted(entries(stats)) == sorted([
+            ("2025-01-01", user_id, 1500, 2),
+            ("2025-01-01", user_2_id, 300, 1),
+            ("2025-03-01", user_id, 700, 1),
+        ])
+        assert stats["total"] == 2500
+        assert stats["count"] == 4
+
+    def test_rollup_follows_writes(self, client: TestClient, auth_headers: dict, session: Session,
+                                   test_user: User, test_user_2: User, test_group: Group):
+        """Test that updates and deletes move amounts between months"""
+        moved = add_expense(session, test_group, test_user,
+                            test_user_2, 1000, day(1, 5))
+        deleted = add_expense(session, test_group, test_user,
+                              test_user_2, 500, day(1, 6))
+
+        assert client.put(f"/transactions/{moved.id}", json={
+            "amount": 1200, "purchased_on": day(2, 10).isoformat()
+        }, headers=auth_headers).status_code == 200
+        assert client.delete(f"/transactions/{deleted.id}",
+                             headers=auth_headers).status_code == 204
+
+        rows = session.exec(select(TransactionMonthlyTotal)).all()
+        assert [(row.month.isoformat(), row.total, row.count) for row in rows] == [
+            ("2025-02-01", 1200, 1)]
+
+    def test_partial_months_are_scanned(self, client: TestClient, auth_headers: dict, session: Session,
+                                        test_user: User, test_user_2: User, test_group: Group):
+        """Test that whole months come from the rollup and partial ones from the transactions"""
+        add_expense(session, test_group, test_user, test_user_2, 100, day(1, 10))
+        add_expense(session, test_group, test_user, test_user_2, 200, day(1, 20))
+        add_expense(session, test_group, test_user, test_user_2, 400, day(2, 10))
+        add_expense(session, test_group, test_user, test_user_2, 800, day(3, 5))
+        add_expense(session, test_group, test_user, test_user_2, 1600, day(3, 25))
+
+        # Whole months are read from the rollup only
+        february = session.exec(select(TransactionMonthlyTotal).where(
+            TransactionMonthlyTotal.month == day(2, 1).date())).one()
+        february.total = 450
+        session.commit()
+
+        stats = group_stats(client, auth_headers, test_group,
+                            **{"from": "2025-01-15", "to": "2025-03-05"})
+
+        user_id = str(test_user.id)
+        assert entries(stats) == [
+            ("2025-01-01", user_id, 200, 1),
+            ("2025-02-01", user_id, 450, 1),
+            ("2025-03-01", user_id, 800, 1),
+        ]
+
+        within = group_stats(client, auth_headers, test_group,
+                             **{"from": "2025-03-01", "to": "2025-03-20"})
+        assert entries(within) == [("2025-03-01", user_id, 800, 1)]
+
+    def test_daily_buckets(self, client: TestClient, auth_headers: dict, session: Session,
+                           test_user: User, test_user_2: User, test_group: Group):
+        """Test that finer buckets are aggregated from the transactions"""
+        add_expense(session, test_group, test_user, test_user_2, 100, day(1, 10))
+        add_expense(session, test_group, test_user, test_user_2, 200, day(1, 10))
+        add_expense(session, test_group, test_user, test_user_2, 400, day(1, 11))
+
+        stats = group_stats(client, auth_headers, test_group, bucket="day")
+
+        user_id = str(test_user.id)
+        assert entries(stats) == [
+            ("2025-01-10", user_id, 300, 2),
+            ("2025-01-11", user_id, 400, 1),
+        ]
+
+    def test_invalid_range(self, client: TestClient, auth_headers: dict, test_group: Group):
+        """Test that a range ending before it starts is rejected"""
+        response = client.get(f"/groups/{test_group.id}/stats", params={
+            "from": "2025-02-01", "to": "2025-01-01"}, headers=auth_headers)
+
+        assert response.status_code == 400
+
+    def test_seeded_dataset_has_rollup(self, session: Session):
+        """Test that the bulk-inserting seeder derives the monthly totals"""
+        generate_dataset(session, users=20, groups=5, transactions=200)
+
+        expected = session.exec(select(
+            Transaction.group_id, sa.func.sum(Transaction.amount), sa.func.count()
+        ).group_by(Transaction.group_id)).all()
+        rolled_up = session.exec(select(
+            TransactionMonthlyTotal.group_id,
+            sa.func.sum(TransactionMonthlyTotal.total),
+            sa.func.sum(TransactionMonthlyTotal.count)
+        ).group_by(TransactionMonthlyTotal.group_id)).all()
+
+        assert sorted(rolled_up) == sorted(expected)
@@ -0,0 +1,156 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app.database.models.group import Group
+from app.database.models.user import User
+from tests.conftest import add_expense
+
+
+def sync(client: TestClient, headers: dict, since: str | None = None, **params) -> dict:
+    if since is not None:
+        params["since"] = since
+    response = client.get("/sync/changes", params=params, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestSyncChanges:
+    """Integration tests for the delta sync endpoint"""
+
+    def test_first_sync_returns_current_state(self, client: TestClient, auth_headers: dict, session: Session,
+                                              test_user: User, test_user_2: User, test_group: Group):
+        """Test that a sync without cursor returns groups, members and transactions"""
+        test_group.users.append(test_user_2)
+        session.commit()
+        transaction = add_expense(
+            session, test_group, test_user, test_user_2, 1000)
+
+        data = sync(client, auth_headers)
+
+        assert data["has_more"] is False
+        assert data["groups"] == [
+            {"id": str(test_group.id), "name": test_group.name}]
+        assert {(m["group_id"], m["user_id"]) for m in data["memberships"]} == {
+            (str(test_group.id), str(test_user.id)), (str(test_group.id), str(test_user_2.id))}
+        assert [t["id"] for t in data["transactions"]] == [str(transaction.id)]
+        assert data["transactions"][0]["participants"][0]["debtor_id"] == str(
+            test_user_2.id)
+        assert set(data["users"]) == {str(test_user.id), str(test_user_2.id)}
+        assert data["tombstones"] == []
+
+    def test_sync_without_changes_probes_once(self, client: TestClient, auth_headers: dict, engine,
+                                              session: Session, test_user: User, test_user_2: User,
+                                              test_group: Group):
+        """Test that an up to date client gets nothing back from a single log read"""
+        add_expense(session, test_group, test_user, test_user_2, 1000)
+        cursor = sync(client, auth_headers)["cursor"]
+
+        statements = []
+
+        def record_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record_statement)
+        try:
+            data = sync(client, auth_headers, cursor)
+        finally:
+            event.remove(engine, "before_cursor_execute", record_statement)
+
+        assert data["cursor"] == cursor
+        assert data["transactions"] == [] and data["tombstones"] == []
+        assert sum("sync_changes" in statement for statement in statements) == 1
+
+    def test_updates_and_deletes_after_cursor(self, client: TestClient, auth_headers: dict, session: Session,
+                                              test_user: User, test_user_2: User, test_group: Group):
+        """Test that edits come back as rows and deletions as tombstones"""
+        test_group.users.append(test_user_2)
+        session.commit()
+        edited = add_expense(session, test_group, test_user, test_user_2, 1000)
+        deleted = add_expense(session, test_group, test_user, test_user_2, 500)
+        cursor = sync(client, auth_headers)["cursor"]
+
+        assert client.put(f"/transactions/{edited.id}", json={"title": "Edited"},
+                          headers=auth_headers).status_code == 200
+        assert client.delete(f"/transactions/{deleted.id}",
+                             headers=auth_headers).status_code == 204
+        assert client.put(f"/groups/{test_group.id}", json={"name": "Renamed"},
+                          headers=auth_headers).status_code == 200
+
+        data = sync(client, auth_headers, cursor)
+
+        assert [(t["id"], t["title"]) for t in data["transactions"]] == [
+            (str(edited.id), "Edited")]
+        assert data["tombstones"] == [{"entity": "transaction", "id": str(deleted.id),
+                                       "group_id": str(test_group.id)}]
+        assert data["groups"] == [{"id": str(test_group.id), "name": "Renamed"}]
+        assert data["memberships"] == []
+        assert sync(client, auth_headers, data["cursor"])["tombstones"] == []
+
+    def test_removed_member_gets_membership_tombstone(self, client: TestClient, auth_headers: dict,
+                                                      auth_headers_2: dict, session: Session, test_user: User,
+                                                      test_user_2: User, test_group: Group):
+        """Test that a member removed from a group learns about it and nothing more"""
+        test_group.users.append(test_user_2)
+        session.commit()
+        cursor = sync(client, auth_headers_2)["cursor"]
+
+        response = client.delete(
+            f"/groups/{test_group.id}/users/{test_user_2.id}", headers=auth_headers)
+        assert response.status_code == 200
+        add_expense(session, test_group, test_user, test_user, 300)
+
+        data = sync(client, auth_headers_2, cursor)
+
+        assert data["tombstones"] == [{"entity": "membership", "id": str(test_user_2.id),
+                                       "group_id": str(test_group.id)}]
+        assert data["transactions"] == []
+
+    def test_deleted_group_reaches_its_members(self, client: TestClient, auth_headers: dict,
+                                               auth_headers_2: dict, session: Session, test_user: User,
+                                               test_user_2: User, test_group: Group):
+        """Test that deleting a group leaves a membership tombstone for every member"""
+        test_group.users.append(test_user_2)
+        session.commit()
+        add_expense(session, test_group, test_user, test_user_2, 1000)
+        cursor = sync(client, auth_headers_2)["cursor"]
+
+        assert client.delete(f"/groups/{test_group.id}",
+                             headers=auth_headers).status_code == 204
+
+        data = sync(client, auth_headers_2, cursor)
+        assert data["tombstones"] == [{"entity": "membership", "id": str(test_user_2.id),
+                                       "group_id": str(test_group.id)}]
+
+    def test_other_groups_stay_private(self, client: TestClient, auth_headers_2: dict, session: Session,
+                                       test_user: User, test_user_2: User, test_group: Group):
+        """Test that changes of groups the caller is not in are never returned"""
+        add_expense(session, test_group, test_user, test_user, 1000)
+
+        data = sync(client, auth_headers_2)
+
+        assert data["transactions"] == [] and data["groups"] == []
+
+    def test_paged_sync_resumes_from_cursor(self, client: TestClient, auth_headers: dict, session: Session,
+                                            test_user: User, test_user_2: User, test_group: Group):
+        """Test that a limited sync hands out a cursor that resumes where it stopped"""
+        expenses = [add_expense(session, test_group, test_user, test_user_2, amount)
+                    for amount in range(100, 600, 100)]
+
+        seen, cursor = [], None
+        for _ in range(10):
+            data = sync(client, auth_headers, cursor, limit=2)
+            seen.extend(t["id"] for t in data["transactions"])
+            cursor = data["cursor"]
+            if not data["has_more"]:
+                break
+
+        assert set(seen) == {str(expense.id) for expense in expenses}
+
+    def test_invalid_cursor(self, client: TestClient, auth_headers: dict):
+        """Test that a malformed cursor is rejected"""
+        response = client.get(
+            "/sync/changes", params={"since": "nope"}, headers=auth_headers)
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
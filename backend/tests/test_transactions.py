@@ -1,12 +1,17 @@
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlmodel import Session, select
-from uuid import uuid4
-from datetime import datetime
+from uuid import UUID, uuid4
+from datetime import datetime, timezone
 
 from app.database.models.transaction import Transaction, TransactionType
 from app.database.models.group import Group
+from app.database.models.transaction_participant import TransactionParticipant
 from app.database.models.user import User
+from app.services.transaction_loading import TransactionLoading
+from app.services.transaction_split import TransactionSplitService
+from tests.conftest import add_expense
 
 
 class TestTransactionEndpoints:
@@ -237,4 +242,906 @@ class TestTransactionEndpoints:
         
         assert response.status_code == 200
         transactions = response.json()
-        assert isinstance(transactions, list) 
\ No newline at end of file
+        assert isinstance(transactions, list) 
+
+class TestTransactionBatchEndpoints:
+    """Integration tests for the batch mutation endpoint"""
+
+    def _create_item(self, group: Group, payer: User, debtor: User, amount: int, **extra) -> dict:
+        return {
+            "operation": "create",
+            "create": {
+                "id": str(uuid4()),
+                "amount": amount,
+                "title": "Queued expense",
+                "transaction_type": "AMOUNT",
+                "group_id": str(group.id),
+                "payer_id": str(payer.id),
+                "participants": [{"debtor_id": str(debtor.id), "amount_owed": amount}],
+                **extra
+            }
+        }
+
+    def test_batch_replays_queued_creates(self, client: TestClient, auth_headers: dict, test_group: Group,
+                                          test_user: User, test_user_2: User, session: Session):
+        """Test that hundreds of queued creates are stored with a single request"""
+        test_group.users.append(test_user_2)
+        session.commit()
+        items = [self._create_item(test_group, test_user, test_user_2, 100)
+                 for _ in range(500)]
+
+        response = client.post("/transactions/batch",
+                                json=items, headers=auth_headers)
+
+        assert response.status_code == 200
+        results = response.json()
+        assert [result["status_code"] for result in results] == [201] * 500
+        assert [result["index"] for result in results] == list(range(500))
+        assert len(session.exec(select(Transaction)).all()) == 500
+
+        balance = client.get(
+            f"/balances/?group_id={test_group.id}", headers=auth_headers).json()
+        assert balance["total_owed_by_others"] == 50000
+
+    def test_batch_mixed_operations(self, client: TestClient, auth_headers: dict, test_group: Group,
+                                    test_user: User, test_user_2: User, session: Session):
+        """Test that updates and deletes apply to existing and just-created transactions"""
+        existing = Transaction(
+            amount=1000,
+            title="Existing",
+            transaction_type=TransactionType.EVEN,
+            group_id=test_group.id,
+            payer_id=test_user.id
+        )
+        session.add(existing)
+        session.commit()
+        created = self._create_item(test_group, test_user, test_user_2, 300)
+        dropped = self._create_item(test_group, test_user, test_user_2, 700)
+
+        response = client.post("/transactions/batch", json=[
+            created,
+            dropped,
+            {"operation": "update", "transaction_id": created["create"]["id"],
+             "update": {"title": "Edited offline"}},
+            {"operation": "delete",
+                "transaction_id": dropped["create"]["id"]},
+            {"operation": "update", "transaction_id": str(existing.id),
+             "update": {"amount": 2000}},
+            {"operation": "delete", "transaction_id": str(uuid4())},
+        ], headers=auth_headers)
+
+        assert response.status_code == 200
+        assert [result["status_code"] for result in response.json()] == [
+            201, 201, 200, 204, 200, 404]
+
+        stored = session.get(Transaction, UUID(created["create"]["id"]),
+                             options=TransactionLoading.read_options())
+        assert stored.title == "Edited offline"
+        assert len(stored.participants) == 1
+        assert session.get(Transaction, UUID(dropped["create"]["id"])) is None
+        session.refresh(existing)
+        assert existing.amount == 2000
+
+    def test_batch_rejects_items_individually(self, client: TestClient, auth_headers: dict, test_group: Group,
+                                              test_user: User, test_user_2: User, session: Session):
+        """Test that failing items are reported without discarding the rest"""
+        other_group = Group(name="Other Group", users=[test_user_2])
+        session.add(other_group)
+        session.commit()
+        valid = self._create_item(test_group, test_user, test_user_2, 100)
+
+        response = client.post("/transactions/batch", json=[
+            valid,
+            self._create_item(other_group, test_user, test_user_2, 100),
+            valid,
+        ], headers=auth_headers)
+
+        assert response.status_code == 200
+        assert [result["status_code"] for result in response.json()] == [
+            201, 403, 409]
+        assert len(session.exec(select(Transaction)).all()) == 1
+
+    def test_batch_rejects_unknown_users(self, client: TestClient, auth_headers: dict, test_group: Group,
+                                         test_user: User, test_user_2: User, session: Session):
+        """Test that a create naming an unknown payer or debtor fails on its own"""
+        unknown = User(id=uuid4(), email="ghost@example.com",
+                       username="ghost", password="x")
+        valid = self._create_item(test_group, test_user, test_user_2, 100)
+
+        response = client.post("/transactions/batch", json=[
+            self._create_item(test_group, test_user, unknown, 100),
+            self._create_item(test_group, unknown, test_user, 100),
+            valid,
+        ], headers=auth_headers)
+
+        assert response.status_code == 200
+        assert [result["status_code"] for result in response.json()] == [
+            404, 404, 201]
+        assert [transaction.id for transaction in session.exec(select(Transaction)).all()] == [
+            UUID(valid["create"]["id"])]
+
+    def test_batch_requires_payload(self, client: TestClient, auth_headers: dict):
+        """Test that an update without a payload is rejected"""
+        response = client.post("/transactions/batch", json=[
+            {"operation": "update", "transaction_id": str(uuid4())}
+        ], headers=auth_headers)
+
+        assert response.status_code == 422
+
+
+class TestCreateTransactionStatements:
+    """Statement count of the create path"""
+
+    def _create(self, client: TestClient, engine, session: Session, auth_headers: dict, group_id: UUID,
+                payer_id: UUID, debtor_ids: list[UUID]) -> tuple[list[str], dict]:
+        statements = []
+
+        def record_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        # Start from an empty identity map like a fresh request session
+        session.expunge_all()
+        event.listen(engine, "before_cursor_execute", record_statement)
+        try:
+            response = client.post("/transactions/", json={
+                "amount": 100 * len(debtor_ids),
+                "title": "Counted transaction",
+                "transaction_type": "EVEN",
+                "group_id": str(group_id),
+                "payer_id": str(payer_id),
+                "participants": [{"debtor_id": str(debtor_id), "amount_owed": 100}
+                                 for debtor_id in debtor_ids]
+            }, headers=auth_headers)
+        finally:
+            event.remove(engine, "before_cursor_execute", record_statement)
+
+        assert response.status_code == 201
+        return statements, response.json()
+
+    def test_create_statement_count_is_constant(self, client: TestClient, engine, auth_headers: dict,
+                                                session: Session, test_group: Group, test_user: User):
+        """Test that creating a transaction takes the same statements for 1 or 25 participants"""
+        debtors = [User(email=f"debtor{index}@example.com", username=f"debtor{index}",
+                        password="x", email_verified=True) for index in range(25)]
+        test_group.users.extend(debtors)
+        session.commit()
+        group_id, user_id = test_group.id, test_user.id
+        debtor_ids = [debtor.id for debtor in debtors]
+
+        single, _ = self._create(
+            client, engine, session, auth_headers, group_id, user_id, debtor_ids[:1])
+        many, data = self._create(
+            client, engine, session, auth_headers, group_id, user_id, debtor_ids)
+
+        assert len(single) == len(many)
+        assert len(data["participants"]) == 25
+        assert {p["debtor"]["id"] for p in data["participants"]} == {
+            str(debtor_id) for debtor_id in debtor_ids}
+        assert data["payer"]["id"] == str(user_id)
+        assert data["group"]["id"] == str(group_id)
+        assert data["created_at"] is not None
+        assert sum(statement.lstrip().upper().startswith("INSERT INTO TRANSACTION_PARTICIPANTS")
+                   for statement in many) == 1
+
+
+class TestIdempotentCreateTransaction:
+    """Retries of transaction creates with the client-supplied id"""
+
+    def _payload(self, group: Group, payer: User, debtors: list[User], amount: int = 1000) -> dict:
+        return {
+            "id": str(uuid4()),
+            "amount": amount,
+            "title": "Retried expense",
+            "transaction_type": "AMOUNT",
+            "group_id": str(group.id),
+            "payer_id": str(payer.id),
+            "participants": [{"debtor_id": str(debtor.id), "amount_owed": amount // len(debtors)}
+                             for debtor in debtors]
+        }
+
+    def test_retry_returns_stored_transaction(self, client: TestClient, auth_headers: dict, session: Session,
+                                              test_group: Group, test_user: User, test_user_2: User):
+        """Test that repeating a create returns the stored transaction with 200 and counts once"""
+        test_group.users.append(test_user_2)
+        session.commit()
+        payload = self._payload(test_group, test_user, [test_user_2])
+
+        created = client.post("/transactions/", json=payload, headers=auth_headers)
+        retried = client.post("/transactions/", json=payload, headers=auth_headers)
+
+        assert created.status_code == 201
+        assert retried.status_code == 200
+        assert retried.json() == created.json()
+        assert len(session.exec(select(Transaction)).all()) == 1
+        balance = client.get(
+            f"/balances/?group_id={test_group.id}", headers=auth_headers).json()
+        assert balance["total_owed_by_others"] == 1000
+
+    def test_retry_ignores_participant_order(self, client: TestClient, auth_headers: dict, session: Session,
+                                             test_group: Group, test_user: User, test_user_2: User,
+                                             test_user_3: User):
+        """Test that a retry listing the same participants in another order is the same create"""
+        test_group.users.extend([test_user_2, test_user_3])
+        session.commit()
+        payload = self._payload(test_group, test_user, [test_user_2, test_user_3])
+
+        assert client.post("/transactions/", json=payload,
+                           headers=auth_headers).status_code == 201
+        payload["participants"].reverse()
+        assert client.post("/transactions/", json=payload,
+                           headers=auth_headers).status_code == 200
+
+    def test_reused_id_with_other_payload_conflicts(self, client: TestClient, auth_headers: dict,
+                                                    session: Session, test_group: Group, test_user: User,
+                                                    test_user_2: User):
+        """Test that an id taken by a different transaction is rejected and nothing changes"""
+        test_group.users.append(test_user_2)
+        session.commit()
+        payload = self._payload(test_group, test_user, [test_user_2])
+        assert client.post("/transactions/", json=payload,
+                           headers=auth_headers).status_code == 201
+
+        response = client.post("/transactions/", json={**payload, "amount": 999},
+                               headers=auth_headers)
+
+        assert response.status_code == 409
+        assert response.json()["detail"] == "Transaction already exists"
+        stored = session.get(Transaction, UUID(payload["id"]))
+        session.refresh(stored)
+        assert stored.amount == 1000
+
+    def test_retry_of_batch_create(self, client: TestClient, auth_headers: dict, session: Session,
+                                   test_group: Group, test_user: User, test_user_2: User):
+        """Test that a create first stored through the batch endpoint can be retried alone"""
+        test_group.users.append(test_user_2)
+        session.commit()
+        payload = self._payload(test_group, test_user, [test_user_2])
+        batch = client.post("/transactions/batch", json=[{"operation": "create", "create": payload}],
+                            headers=auth_headers)
+        assert batch.json()[0]["status_code"] == 201
+
+        response = client.post("/transactions/", json=payload, headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.json()["id"] == payload["id"]
+
+
+class TestTransactionSplit:
+    """Shares computed by the server for compact creates"""
+
+    def _payload(self, group: Group, payer: User, transaction_type: str, amount: int, participants: list) -> dict:
+        return {
+            "amount": amount,
+            "title": "Split expense",
+            "transaction_type": transaction_type,
+            "group_id": str(group.id),
+            "payer_id": str(payer.id),
+            "participants": participants
+        }
+
+    def _owed(self, response) -> dict[str, int]:
+        return {participant["debtor_id"]: participant["amount_owed"]
+                for participant in response.json()["participants"]}
+
+    def test_largest_remainder_is_cent_exact(self):
+        """Test that leftover cents go to the largest remainders, earlier first on ties"""
+        assert TransactionSplitService.largest_remainder(1000, [1, 1, 1]) == [334, 333, 333]
+        assert TransactionSplitService.largest_remainder(100, [1, 2, 3, 4]) == [10, 20, 30, 40]
+        assert TransactionSplitService.largest_remainder(101, [3333, 3333, 3334]) == [34, 33, 34]
+        assert TransactionSplitService.largest_remainder(-1000, [1, 1, 1]) == [-334, -333, -333]
+        assert sum(TransactionSplitService.largest_remainder(99_999, list(range(1, 500)))) == 99_999
+
+    def test_even_split_by_weight(self, client: TestClient, auth_headers: dict, session: Session,
+                                  test_group: Group, test_user: User, test_user_2: User, test_user_3: User):
+        """Test that EVEN creates without amounts are split by weight"""
+        test_group.users.extend([test_user_2, test_user_3])
+        session.commit()
+
+        response = client.post("/transactions/", json=self._payload(test_group, test_user, "EVEN", 1000, [
+            {"debtor_id": str(test_user.id)},
+            {"debtor_id": str(test_user_2.id)},
+            {"debtor_id": str(test_user_3.id), "weight": 2},
+        ]), headers=auth_headers)
+
+        assert response.status_code == 201
+        assert self._owed(response) == {
+            str(test_user.id): 250, str(test_user_2.id): 250, str(test_user_3.id): 500}
+
+    def test_percentage_split(self, client: TestClient, auth_headers: dict, session: Session,
+                              test_group: Group, test_user: User, test_user_2: User, test_user_3: User):
+        """Test that PERCENTAGE creates are split by percentage and must add up to 100"""
+        test_group.users.extend([test_user_2, test_user_3])
+        session.commit()
+        participants = [
+            {"debtor_id": str(test_user.id), "percentage": "33.33"},
+            {"debtor_id": str(test_user_2.id), "percentage": 33.33},
+            {"debtor_id": str(test_user_3.id), "percentage": 33.34},
+        ]
+
+        response = client.post("/transactions/", json=self._payload(
+            test_group, test_user, "PERCENTAGE", 1001, participants), headers=auth_headers)
+
+        assert response.status_code == 201
+        assert sorted(self._owed(response).values()) == [333, 334, 334]
+
+        participants[2]["percentage"] = 30
+        response = client.post("/transactions/", json=self._payload(
+            test_group, test_user, "PERCENTAGE", 1001, participants), headers=auth_headers)
+        assert response.status_code == 422
+        assert response.json()["detail"] == "Percentages must add up to 100"
+
+    def test_incomplete_amounts_are_rejected(self, client: TestClient, auth_headers: dict, session: Session,
+                                             test_group: Group, test_user: User, test_user_2: User):
+        """Test that AMOUNT creates and partly given amounts can't be split"""
+        test_group.users.append(test_user_2)
+        session.commit()
+
+        amount = client.post("/transactions/", json=self._payload(test_group, test_user, "AMOUNT", 1000, [
+            {"debtor_id": str(test_user_2.id)}]), headers=auth_headers)
+        partial = client.post("/transactions/", json=self._payload(test_group, test_user, "EVEN", 1000, [
+            {"debtor_id": str(test_user.id), "amount_owed": 500},
+            {"debtor_id": str(test_user_2.id)}]), headers=auth_headers)
+
+        assert amount.status_code == 422
+        assert partial.status_code == 422
+        assert session.exec(select(Transaction)).all() == []
+
+    def test_batch_creates_are_split(self, client: TestClient, auth_headers: dict, session: Session,
+                                     test_group: Group, test_user: User, test_user_2: User):
+        """Test that batch creates are split and unsplittable ones fail on their own"""
+        test_group.users.append(test_user_2)
+        session.commit()
+        debtors = [{"debtor_id": str(test_user.id)}, {"debtor_id": str(test_user_2.id)}]
+
+        response = client.post("/transactions/batch", json=[
+            {"operation": "create", "create": self._payload(test_group, test_user, "EVEN", 999, debtors)},
+            {"operation": "create", "create": self._payload(test_group, test_user, "AMOUNT", 999, debtors)},
+        ], headers=auth_headers)
+
+        assert [result["status_code"] for result in response.json()] == [201, 422]
+        owed = session.exec(select(TransactionParticipant.amount_owed)).all()
+        assert sorted(owed) == [499, 500]
+
+
+class TestParticipantUpdate:
+    """Updates that replace the participants of a transaction"""
+
+    def _create(self, client: TestClient, auth_headers: dict, group: Group, payer: User,
+                debtors: list[User], amount_owed: int = 100) -> dict:
+        response = client.post("/transactions/", json={
+            "amount": amount_owed * len(debtors),
+            "title": "Shared expense",
+            "transaction_type": "EVEN",
+            "group_id": str(group.id),
+            "payer_id": str(payer.id),
+            "participants": [{"debtor_id": str(debtor.id), "amount_owed": amount_owed} for debtor in debtors]
+        }, headers=auth_headers)
+        assert response.status_code == 201
+        return response.json()
+
+    def _participants(self, data: dict) -> dict[str, tuple[str, int]]:
+        return {participant["debtor"]["id"]: (participant["id"], participant["amount_owed"])
+                for participant in data["participants"]}
+
+    def test_one_changed_share_writes_one_row(self, client: TestClient, engine, auth_headers: dict,
+                                              session: Session, test_group: Group, test_user: User):
+        """Test that editing one share of a 200 person split updates a single row"""
+        debtors = [User(email=f"debtor{index}@example.com", username=f"debtor{index}",
+                        password="x", email_verified=True) for index in range(200)]
+        test_group.users.extend(debtors)
+        session.commit()
+        created = self._create(client, auth_headers, test_group, test_user, debtors)
+
+        participants = [{"debtor_id": str(debtor.id), "amount_owed": 100} for debtor in debtors]
+        participants[7]["amount_owed"] = 250
+        writes = []
+
+        def record_write(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")) \
+                    and "TRANSACTION_PARTICIPANTS" in statement.upper():
+                writes.append((statement.split()[0].upper(), cursor.rowcount))
+
+        event.listen(engine, "after_cursor_execute", record_write)
+        try:
+            response = client.put(f"/transactions/{created['id']}", json={
+                "amount": 20150, "participants": participants}, headers=auth_headers)
+        finally:
+            event.remove(engine, "after_cursor_execute", record_write)
+
+        assert response.status_code == 200
+        assert writes == [("UPDATE", 1)]
+        before, after = self._participants(created), self._participants(response.json())
+        changed = {debtor_id for debtor_id in after if after[debtor_id] != before[debtor_id]}
+        assert changed == {str(debtors[7].id)}
+        assert after[str(debtors[7].id)] == (before[str(debtors[7].id)][0], 250)
+
+    def test_debtors_are_added_and_removed(self, client: TestClient, auth_headers: dict, session: Session,
+                                           test_group: Group, test_user: User, test_user_2: User,
+                                           test_user_3: User):
+        """Test that new debtors are inserted, removed ones deleted and the ledger follows"""
+        test_group.users.extend([test_user_2, test_user_3])
+        session.commit()
+        created = self._create(client, auth_headers, test_group, test_user, [test_user, test_user_2], 500)
+
+        response = client.put(f"/transactions/{created['id']}", json={"participants": [
+            {"debtor_id": str(test_user_2.id), "amount_owed": 500},
+            {"debtor_id": str(test_user_3.id), "amount_owed": 500},
+        ]}, headers=auth_headers)
+
+        assert response.status_code == 200
+        after = self._participants(response.json())
+        assert set(after) == {str(test_user_2.id), str(test_user_3.id)}
+        assert after[str(test_user_2.id)] == self._participants(created)[str(test_user_2.id)]
+        stored = session.exec(select(TransactionParticipant.debtor_id).where(
+            TransactionParticipant.transaction_id == UUID(created["id"]))).all()
+        assert set(stored) == {test_user_2.id, test_user_3.id}
+        balance = client.get("/balances/", headers=auth_headers).json()
+        assert balance["total_owed_by_others"] == 1000
+
+    def test_left_out_shares_are_split(self, client: TestClient, auth_headers: dict, session: Session,
+                                       test_group: Group, test_user: User, test_user_2: User,
+                                       test_user_3: User):
+        """Test that compact participant lists are split over the updated amount"""
+        test_group.users.extend([test_user_2, test_user_3])
+        session.commit()
+        created = self._create(client, auth_headers, test_group, test_user, [test_user, test_user_2])
+        debtors = [{"debtor_id": str(user.id)} for user in (test_user, test_user_2, test_user_3)]
+
+        response = client.put(f"/transactions/{created['id']}", json={
+            "amount": 1000, "participants": debtors}, headers=auth_headers)
+
+        assert response.status_code == 200
+        assert sorted(amount for _, amount in self._participants(response.json()).values()) == [333, 333, 334]
+
+    def test_invalid_participants_are_rejected(self, client: TestClient, auth_headers: dict, session: Session,
+                                               test_group: Group, test_user: User, test_user_2: User):
+        """Test that duplicate, unknown or unsplittable participants leave the transaction as it was"""
+        test_group.users.append(test_user_2)
+        session.commit()
+        created = self._create(client, auth_headers, test_group, test_user, [test_user_2])
+        url = f"/transactions/{created['id']}"
+
+        duplicate = client.put(url, json={"title": "Renamed", "participants": [
+            {"debtor_id": str(test_user_2.id), "amount_owed": 50},
+            {"debtor_id": str(test_user_2.id), "amount_owed": 50},
+        ]}, headers=auth_headers)
+        unknown = client.put(url, json={"participants": [
+            {"debtor_id": str(uuid4()), "amount_owed": 100}]}, headers=auth_headers)
+        unsplittable = client.put(url, json={"transaction_type": "AMOUNT", "participants": [
+            {"debtor_id": str(test_user_2.id)}]}, headers=auth_headers)
+
+        assert duplicate.status_code == 422
+        assert unknown.status_code == 404
+        assert unsplittable.status_code == 422
+        transaction = client.get(url, headers=auth_headers).json()
+        assert transaction["title"] == created["title"]
+        assert self._participants(transaction) == self._participants(created)
+
+    def test_batch_updates_replace_participants(self, client: TestClient, auth_headers: dict, session: Session,
+                                                test_group: Group, test_user: User, test_user_2: User):
+        """Test that batch updates replace the participants of stored and pending transactions"""
+        test_group.users.append(test_user_2)
+        session.commit()
+        stored = self._create(client, auth_headers, test_group, test_user, [test_user, test_user_2])
+        deleted = self._create(client, auth_headers, test_group, test_user, [test_user_2])
+        pending_id = str(uuid4())
+        debtors = [{"debtor_id": str(test_user.id)}, {"debtor_id": str(test_user_2.id)}]
+
+        response = client.post("/transactions/batch", json=[
+            {"operation": "create", "create": {
+                "id": pending_id, "amount": 300, "title": "Pending", "transaction_type": "AMOUNT",
+                "group_id": str(test_group.id), "payer_id": str(test_user.id),
+                "participants": [{"debtor_id": str(test_user_2.id), "amount_owed": 300}]}},
+            {"operation": "update", "transaction_id": pending_id, "update": {
+                "transaction_type": "EVEN", "participants": debtors}},
+            {"operation": "update", "transaction_id": stored["id"], "update": {
+                "participants": [{"debtor_id": str(test_user_2.id), "amount_owed": 200}]}},
+            {"operation": "update", "transaction_id": deleted["id"], "update": {
+                "participants": [{"debtor_id": str(test_user.id), "amount_owed": 100}]}},
+            {"operation": "delete", "transaction_id": deleted["id"]},
+        ], headers=auth_headers)
+
+        assert [result["status_code"] for result in response.json()] == [201, 200, 200, 200, 204]
+        rows = session.exec(select(
+            TransactionParticipant.transaction_id, TransactionParticipant.debtor_id,
+            TransactionParticipant.amount_owed)).all()
+        assert sorted(rows) == sorted([
+            (UUID(pending_id), test_user.id, 150),
+            (UUID(pending_id), test_user_2.id, 150),
+            (UUID(stored["id"]), test_user_2.id, 200),
+        ])
+
+
+class TestTransactionFilters:
+    """Filters of the transaction listings"""
+
+    def _amounts(self, client: TestClient, auth_headers: dict, url: str, **params) -> list[int]:
+        response = client.get(url, params=params, headers=auth_headers)
+        assert response.status_code == 200
+        return sorted(transaction["amount"] for transaction in response.json())
+
+    def test_group_listing_filters(self, client: TestClient, auth_headers: dict, session: Session,
+                                   test_group: Group, test_user: User, test_user_2: User):
+        """Test the date range, payer and amount filters of the group listing"""
+        add_expense(session, test_group, test_user, test_user_2,
+                    100, datetime(2025, 1, 10, tzinfo=timezone.utc))
+        add_expense(session, test_group, test_user_2, test_user,
+                    200, datetime(2025, 2, 10, tzinfo=timezone.utc))
+        add_expense(session, test_group, test_user, test_user_2,
+                    300, datetime(2025, 3, 10, tzinfo=timezone.utc))
+        url = f"/groups/{test_group.id}/transactions"
+
+        # The start is inclusive, the end exclusive
+        assert self._amounts(client, auth_headers, url, purchased_from="2025-02-10T00:00:00Z") == [200, 300]
+        assert self._amounts(client, auth_headers, url, purchased_from="2025-02-01T00:00:00Z",
+                             purchased_to="2025-03-10T00:00:00Z") == [200]
+        assert self._amounts(client, auth_headers, url,
+                             payer_id=str(test_user.id)) == [100, 300]
+        assert self._amounts(client, auth_headers, url,
+                             min_amount=150, max_amount=300) == [200, 300]
+
+    def test_user_listing_filters(self, client: TestClient, auth_headers: dict, session: Session,
+                                  test_group: Group, test_user: User, test_user_2: User):
+        """Test that filters combine with the visibility of the user's listing"""
+        add_expense(session, test_group, test_user, test_user_2, 100)
+        add_expense(session, test_group, test_user_2, test_user, 200)
+
+        assert self._amounts(client, auth_headers, "/transactions/",
+                             payer_id=str(test_user_2.id)) == [200]
+        assert self._amounts(client, auth_headers, "/transactions/",
+                             max_amount=150) == [100]
+
+
+class TestTransactionSearch:
+    """Full-text search over transaction titles"""
+
+    def _add(self, session: Session, group: Group, payer: User, debtor: User, title: str) -> Transaction:
+        transaction = Transaction(
+            amount=100,
+            title=title,
+            transaction_type=TransactionType.AMOUNT,
+            group_id=group.id,
+            payer_id=payer.id,
+            participants=[TransactionParticipant(
+                debtor_id=debtor.id, amount_owed=100)]
+        )
+        session.add(transaction)
+        session.commit()
+        return transaction
+
+    def _search(self, client: TestClient, auth_headers: dict, **params) -> list[str]:
+        response = client.get("/transactions/search",
+                              params=params, headers=auth_headers)
+        assert response.status_code == 200
+        return [transaction["title"] for transaction in response.json()]
+
+    def test_search_matches_words_and_prefixes(self, client: TestClient, auth_headers: dict, session: Session,
+                                               test_group: Group, test_user: User, test_user_2: User):
+        """Test that whole words and word prefixes find titles, best match first"""
+        self._add(session, test_group, test_user, test_user_2, "Pizza night")
+        self._add(session, test_group, test_user, test_user_2, "Groceries")
+        self._add(session, test_group, test_user,
+                  test_user_2, "Pizza pizza pizza")
+
+        assert self._search(client, auth_headers, q="pizza") == [
+            "Pizza pizza pizza", "Pizza night"]
+        assert self._search(client, auth_headers, q="groc") == ["Groceries"]
+        assert self._search(client, auth_headers, q="sushi") == []
+
+    def test_search_follows_edits(self, client: TestClient, auth_headers: dict, session: Session,
+                                  test_group: Group, test_user: User, test_user_2: User):
+        """Test that renamed and deleted transactions leave the index"""
+        renamed = self._add(session, test_group, test_user,
+                            test_user_2, "Taxi home")
+        deleted = self._add(session, test_group, test_user,
+                            test_user_2, "Taxi to airport")
+
+        assert client.put(f"/transactions/{renamed.id}", json={"title": "Train home"},
+                          headers=auth_headers).status_code == 200
+        assert client.delete(f"/transactions/{deleted.id}",
+                             headers=auth_headers).status_code == 204
+
+        assert self._search(client, auth_headers, q="taxi") == []
+        assert self._search(client, auth_headers, q="train") == ["Train home"]
+
+    def test_search_respects_visibility(self, client: TestClient, auth_headers: dict, session: Session,
+                                        test_group: Group, test_user: User, test_user_2: User,
+                                        test_user_3: User):
+        """Test that only transactions the caller paid or owes on are found"""
+        other_group = Group(name="Other Group", users=[
+                            test_user, test_user_2, test_user_3])
+        session.add(other_group)
+        session.commit()
+        self._add(session, test_group, test_user, test_user_2, "Cinema mine")
+        self._add(session, other_group, test_user_2, test_user, "Cinema owed")
+        self._add(session, other_group, test_user_2,
+                  test_user_3, "Cinema hidden")
+
+        assert sorted(self._search(client, auth_headers, q="cinema")) == [
+            "Cinema mine", "Cinema owed"]
+        assert self._search(client, auth_headers, q="cinema", group_id=str(other_group.id)) == [
+            "Cinema owed"]
+
+    def test_search_pages_and_ignores_syntax(self, client: TestClient, auth_headers: dict, session: Session,
+                                             test_group: Group, test_user: User, test_user_2: User):
+        """Test that results page with skip/limit and operators in the query are plain text"""
+        for index in range(5):
+            self._add(session, test_group, test_user,
+                      test_user_2, f"Lunch {index}")
+
+        first = self._search(client, auth_headers, q="lunch", limit=3)
+        rest = self._search(client, auth_headers, q="lunch", skip=3, limit=3)
+
+        assert len(first) == 3 and len(rest) == 2
+        assert set(first) | set(rest) == {f"Lunch {index}" for index in range(5)}
+        assert self._search(client, auth_headers,
+                            q='"lunch*') == first + rest
+        assert self._search(client, auth_headers, q="%*") == []
+
+
+class TestReadTransactionStatements:
+    """Statement counts of the transaction reads"""
+
+    def _get(self, client: TestClient, engine, session: Session, auth_headers: dict, url: str) -> tuple[list[str], list | dict]:
+        statements = []
+
+        def record_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        session.expunge_all()
+        event.listen(engine, "before_cursor_execute", record_statement)
+        try:
+            response = client.get(url, headers=auth_headers)
+        finally:
+            event.remove(engine, "before_cursor_execute", record_statement)
+
+        assert response.status_code == 200
+        return statements, response.json()
+
+    @pytest.fixture(name="debtor_ids")
+    def debtor_ids_fixture(self, session: Session, test_group: Group, test_user: User) -> list[UUID]:
+        """Twenty transactions, each owed by three members of their own"""
+        debtors = [User(email=f"reader{index}@example.com", username=f"reader{index}",
+                        password="x", email_verified=True) for index in range(60)]
+        test_group.users.extend(debtors)
+        for index in range(20):
+            session.add(Transaction(
+                amount=300,
+                title=f"Read transaction {index}",
+                transaction_type=TransactionType.EVEN,
+                group_id=test_group.id,
+                payer_id=test_user.id,
+                participants=[TransactionParticipant(debtor_id=debtor.id, amount_owed=100)
+                              for debtor in debtors[3 * index:3 * index + 3]]
+            ))
+        session.commit()
+        return [debtor.id for debtor in debtors]
+
+    @pytest.mark.parametrize("path", ["/transactions/", "/groups/{group_id}/transactions"])
+    def test_list_statement_count_is_constant(self, client: TestClient, engine, auth_headers: dict,
+                                              session: Session, test_group: Group, debtor_ids: list[UUID],
+                                              path: str):
+        """Test that a page of 2 and a page of 20 transactions take the same statements"""
+        url = path.format(group_id=test_group.id)
+
+        small, small_page = self._get(
+            client, engine, session, auth_headers, f"{url}?limit=2")
+        large, large_page = self._get(
+            client, engine, session, auth_headers, f"{url}?limit=20")
+
+        assert len(small_page) == 2 and len(large_page) == 20
+        assert len(small) == len(large)
+        assert {participant["debtor"]["id"] for transaction in large_page
+                for participant in transaction["participants"]} == {str(debtor_id) for debtor_id in debtor_ids}
+
+    def test_group_statement_count_is_constant(self, client: TestClient, engine, auth_headers: dict,
+                                               session: Session, test_group: Group, test_user: User,
+                                               test_user_2: User, debtor_ids: list[UUID]):
+        """Test that the group detail embeds its latest transactions without a query per row"""
+        quiet_group = Group(name="Quiet Group", users=[test_user, test_user_2])
+        session.add(quiet_group)
+        session.add(Transaction(
+            amount=100,
+            title="Only transaction",
+            transaction_type=TransactionType.EVEN,
+            group=quiet_group,
+            payer_id=test_user.id,
+            participants=[TransactionParticipant(
+                debtor_id=test_user_2.id, amount_owed=100)]
+        ))
+        session.commit()
+        busy_id, quiet_id, user_id = test_group.id, quiet_group.id, test_user.id
+
+        quiet, _ = self._get(client, engine, session,
+                             auth_headers, f"/groups/{quiet_id}")
+        busy, data = self._get(client, engine, session,
+                               auth_headers, f"/groups/{busy_id}")
+
+        assert len(quiet) == len(busy)
+        assert len(data["transactions"]) == 10
+        assert all(transaction["payer"]["id"] == str(user_id)
+                   for transaction in data["transactions"])
+
+    def test_detail_statement_count_is_constant(self, client: TestClient, engine, auth_headers: dict,
+                                                session: Session, test_group: Group, test_user: User):
+        """Test that reading a transaction takes the same statements for 1 or 25 participants"""
+        debtors = [User(email=f"detail{index}@example.com", username=f"detail{index}",
+                        password="x", email_verified=True) for index in range(25)]
+        test_group.users.extend(debtors)
+        transactions = [Transaction(
+            amount=100 * count,
+            title=f"Detail transaction {count}",
+            transaction_type=TransactionType.EVEN,
+            group_id=test_group.id,
+            payer_id=test_user.id,
+            participants=[TransactionParticipant(debtor_id=debtor.id, amount_owed=100)
+                          for debtor in debtors[:count]]
+        ) for count in (1, 25)]
+        session.add_all(transactions)
+        session.commit()
+        single_id, many_id = (transaction.id for transaction in transactions)
+
+        single, _ = self._get(client, engine, session,
+                              auth_headers, f"/transactions/{single_id}")
+        many, data = self._get(client, engine, session,
+                               auth_headers, f"/transactions/{many_id}")
+
+        assert len(single) == len(many)
+        assert len(data["participants"]) == 25
+
+
+class TestCompactTransactionList:
+    """Compact listings with side-loaded users and groups"""
+
+    @pytest.fixture(name="shared_debtors")
+    def shared_debtors_fixture(self, session: Session, test_group: Group, test_user: User) -> list[User]:
+        """Ten transactions split between the same five members"""
+        debtors = [User(email=f"compact{index}@example.com", username=f"compact{index}",
+                        password="x", email_verified=True) for index in range(5)]
+        test_group.users.extend(debtors)
+        for index in range(10):
+            session.add(Transaction(
+                amount=500,
+                title=f"Compact transaction {index}",
+                transaction_type=TransactionType.EVEN,
+                group_id=test_group.id,
+                payer_id=test_user.id,
+                participants=[TransactionParticipant(debtor_id=debtor.id, amount_owed=100)
+                              for debtor in debtors]
+            ))
+        session.commit()
+        return debtors
+
+    @pytest.mark.parametrize("path", ["/transactions/", "/groups/{group_id}/transactions"])
+    def test_compact_page_lists_users_and_groups_once(self, client: TestClient, auth_headers: dict,
+                                                      test_group: Group, test_user: User,
+                                                      shared_debtors: list[User], path: str):
+        """Test that compact rows carry ids and every user and group appears once"""
+        url = path.format(group_id=test_group.id)
+        response = client.get(
+            url, params={"compact": True}, headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["transactions"]) == 10
+        row = data["transactions"][0]
+        assert "payer" not in row and "group" not in row
+        assert row["payer_id"] == str(test_user.id)
+        assert {participant["debtor_id"] for participant in row["participants"]} == {
+            str(debtor.id) for debtor in shared_debtors}
+        assert set(data["users"]) == {str(test_user.id)} | {
+            str(debtor.id) for debtor in shared_debtors}
+        assert data["users"][str(test_user.id)] == {
+            "id": str(test_user.id), "username": test_user.username}
+        assert data["groups"] == {str(test_group.id): {
+            "id": str(test_group.id), "name": test_group.name}}
+
+        full = client.get(url, headers=auth_headers)
+        assert len(response.content) < len(full.content) / 2
+
+    def test_compact_page_keeps_cursor(self, client: TestClient, auth_headers: dict, test_group: Group,
+                                       shared_debtors: list[User]):
+        """Test that compact pages paginate like the full listing"""
+        response = client.get(f"/groups/{test_group.id}/transactions",
+                              params={"compact": True, "limit": 4}, headers=auth_headers)
+
+        assert response.status_code == 200
+        assert len(response.json()["transactions"]) == 4
+        assert "X-Next-Cursor" in response.headers
+
+    def test_listing_never_serializes_password(self, client: TestClient, auth_headers: dict,
+                                               test_group: Group, shared_debtors: list[User]):
+        """Test that embedded payers and debtors are response models, not table rows"""
+        response = client.get(
+            f"/groups/{test_group.id}/transactions", headers=auth_headers)
+
+        assert response.status_code == 200
+        transaction = response.json()[0]
+        assert "password" not in transaction["payer"]
+        assert all("password" not in participant["debtor"]
+                   for participant in transaction["participants"])
+
+
+class TestTransactionCursorPagination:
+    """Keyset pagination of transaction listings"""
+
+    def _add_transactions(self, session: Session, group: Group, payer: User, count: int,
+                          purchased_on: datetime) -> None:
+        for index in range(count):
+            session.add(Transaction(
+                amount=100 + index,
+                title=f"Paged transaction {index}",
+                transaction_type=TransactionType.EVEN,
+                purchased_on=purchased_on,
+                group_id=group.id,
+                payer_id=payer.id
+            ))
+        session.commit()
+
+    def _read_all(self, client: TestClient, auth_headers: dict, url: str) -> list[dict]:
+        pages, cursor = [], None
+        for _ in range(20):
+            params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+            response = client.get(url, params=params, headers=auth_headers)
+            assert response.status_code == 200
+            pages.append(response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                return pages
+        pytest.fail("Cursor pagination did not reach the last page")
+
+    def test_group_cursor_walks_every_transaction(self, client: TestClient, auth_headers: dict,
+                                                  test_group: Group, test_user: User, session: Session):
+        """Test that cursors visit each transaction once, newest first, even with tied timestamps"""
+        self._add_transactions(session, test_group, test_user,
+                               4, datetime(2024, 1, 1, 12, 0))
+        self._add_transactions(session, test_group, test_user,
+                               4, datetime(2024, 3, 1, 12, 0))
+
+        pages = self._read_all(
+            client, auth_headers, f"/groups/{test_group.id}/transactions")
+
+        assert [len(page) for page in pages] == [3, 3, 2]
+        transactions = [transaction for page in pages for transaction in page]
+        assert len({transaction["id"] for transaction in transactions}) == 8
+        purchased = [transaction["purchased_on"] for transaction in transactions]
+        assert purchased == sorted(purchased, reverse=True)
+
+    def test_user_cursor_is_stable_under_inserts(self, client: TestClient, auth_headers: dict,
+                                                 test_group: Group, test_user: User, session: Session):
+        """Test that new expenses don't shift the following pages"""
+        self._add_transactions(session, test_group, test_user,
+                               6, datetime(2024, 1, 1, 12, 0))
+
+        first = client.get("/transactions/", params={"limit": 3},
+                           headers=auth_headers)
+        self._add_transactions(session, test_group, test_user,
+                               2, datetime(2024, 6, 1, 12, 0))
+        second = client.get("/transactions/", params={
+            "limit": 3, "cursor": first.headers["X-Next-Cursor"]}, headers=auth_headers)
+
+        seen = {transaction["id"] for transaction in first.json()}
+        assert len(second.json()) == 3
+        assert seen.isdisjoint(transaction["id"]
+                               for transaction in second.json())
+        assert "X-Next-Cursor" not in second.headers
+
+    def test_cursor_with_skip(self, client: TestClient, auth_headers: dict, test_group: Group,
+                              test_user: User, session: Session):
+        """Test that skip can't be combined with a cursor"""
+        self._add_transactions(session, test_group, test_user,
+                               4, datetime(2024, 1, 1, 12, 0))
+        first = client.get(f"/groups/{test_group.id}/transactions",
+                           params={"limit": 3}, headers=auth_headers)
+
+        response = client.get(f"/groups/{test_group.id}/transactions", params={
+            "skip": 1, "cursor": first.headers["X-Next-Cursor"]}, headers=auth_headers)
+
+        assert response.status_code == 400
+
+    def test_invalid_cursor(self, client: TestClient, auth_headers: dict, test_group: Group):
+        """Test that a malformed cursor is rejected"""
+        response = client.get(f"/groups/{test_group.id}/transactions",
+                              params={"cursor": "not-a-cursor"}, headers=auth_headers)
+
+        assert response.status_code == 400